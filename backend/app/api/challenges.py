@@ -1,20 +1,89 @@
-from fastapi import APIRouter, HTTPException
+import time
 
-from app import db
-from app.schemas import Challenge
+from fastapi import APIRouter, HTTPException, Request, Response
+from pydantic import TypeAdapter
+
+from app import http_cache, telemetry
+from app.schemas import Challenge, DesignCandidate, NodeSizing, OptimizeRequest, OptimizeResult
+from app.services.catalog import challenge_catalog
+from app.services.graph_ir import GraphValidationError, compile_graph
+from app.services.tuner import TunedDesign, TuningTargets, optimize
 
 router = APIRouter(prefix="/challenges", tags=["challenges"])
 
+_CHALLENGES = TypeAdapter(list[Challenge])
+
 
 @router.get("", response_model=list[Challenge])
-def list_challenges() -> list[Challenge]:
-    return [Challenge(**challenge) for challenge in db.list_challenges()]
+def list_challenges(request: Request) -> Response:
+    snapshot = challenge_catalog.snapshot()
+    return http_cache.conditional_json(
+        request,
+        http_cache.make_etag("catalog", snapshot.version),
+        http_cache.REVALIDATE,
+        lambda: _CHALLENGES.dump_json(list(snapshot.challenges)),
+    )
 
 
 @router.get("/{slug}", response_model=Challenge)
-def get_challenge(slug: str) -> Challenge:
-    challenge = db.get_challenge(slug)
-    if challenge is None:
+def get_challenge(slug: str, request: Request) -> Response:
+    snapshot = challenge_catalog.snapshot()
+    entry = snapshot.by_slug.get(slug)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Challenge not found")
+    return http_cache.conditional_json(
+        request,
+        http_cache.make_etag("catalog", snapshot.version, slug),
+        http_cache.REVALIDATE,
+        lambda: entry.challenge.model_dump_json().encode(),
+    )
+
+
+def _to_candidate(design: TunedDesign) -> DesignCandidate:
+    return DesignCandidate(
+        nodes=[
+            NodeSizing(id=node_id, replicas=replicas, shards=shards if is_db else None)
+            for node_id, replicas, shards, is_db in zip(
+                design.node_ids, design.replicas.tolist(), design.shards.tolist(), design.is_db.tolist()
+            )
+        ],
+        metrics=design.metrics,
+        meets_targets=design.meets_targets,
+    )
+
+
+@router.post("/{slug}/optimize", response_model=OptimizeResult)
+def optimize_design(slug: str, payload: OptimizeRequest) -> OptimizeResult:
+    entry = challenge_catalog.get(slug)
+    if entry is None:
         raise HTTPException(status_code=404, detail="Challenge not found")
-    return Challenge(**challenge)
 
+    started = time.perf_counter()
+    with telemetry.stage("compile"):
+        try:
+            ir = compile_graph(payload.graph)
+        except GraphValidationError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from None
+    with telemetry.stage("optimize"):
+        result = optimize(
+            ir,
+            payload.graph,
+            TuningTargets.from_scoring(entry.scoring, payload.min_availability_pct),
+            seed=payload.seed,
+            max_replicas=payload.max_replicas,
+            max_shards=payload.max_shards,
+            time_budget_s=payload.time_budget_ms / 1000.0,
+            frontier_limit=payload.frontier_limit,
+        )
+
+    return OptimizeResult(
+        challenge_slug=slug,
+        feasible=result.best is not None,
+        best=_to_candidate(result.best) if result.best is not None else None,
+        best_graph=result.best.graph if result.best is not None else None,
+        frontier=[_to_candidate(design) for design in result.frontier],
+        candidates_evaluated=result.evaluated,
+        candidates_pruned=result.pruned,
+        search_complete=result.complete,
+        elapsed_ms=round((time.perf_counter() - started) * 1000.0, 3),
+    )
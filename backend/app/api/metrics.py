@@ -0,0 +1,47 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app import db, http_cache, telemetry
+from app.services.jobs import job_manager
+from app.services.sim_cache import simulation_cache
+from app.services.simulation import scored_flights, simulation_flights
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _scrape_time_gauges() -> list[tuple[str, str, float]]:
+    pool = db.pool_stats()
+    cache = simulation_cache.stats()
+    jobs = job_manager.stats()
+    writes = db.write_batch_stats()
+    flights = simulation_flights.stats()
+    scored = scored_flights.stats()
+    return [
+        ("db_connections_opened", "gauge", pool["opened"]),
+        ("db_connections_in_use", "gauge", pool["in_use"]),
+        ("db_connection_checkouts_total", "counter", pool["checkouts"]),
+        ("db_connection_waits_total", "counter", pool["waits"]),
+        ("db_write_batches_total", "counter", writes["batches"]),
+        ("db_write_batched_runs_total", "counter", writes["records"]),
+        ("db_write_queue_depth", "gauge", writes["pending"]),
+        ("sim_cache_memory_hits_total", "counter", cache["memory_hits"]),
+        ("sim_cache_disk_hits_total", "counter", cache["disk_hits"]),
+        ("sim_cache_misses_total", "counter", cache["misses"]),
+        ("sim_cache_evictions_total", "counter", cache["evictions"]),
+        ("sim_cache_rows_pruned_total", "counter", cache["rows_pruned"]),
+        ("sim_cache_entries", "gauge", cache["size"]),
+        ("simulations_computed_total", "counter", flights["computed"]),
+        ("simulations_coalesced_total", "counter", flights["coalesced"]),
+        ("simulations_in_flight", "gauge", flights["in_flight"]),
+        ("scored_runs_computed_total", "counter", scored["computed"]),
+        ("scored_runs_coalesced_total", "counter", scored["coalesced"]),
+        ("jobs_pending", "gauge", jobs["pending"]),
+        ("http_body_cache_entries", "gauge", len(http_cache.response_bodies)),
+    ]
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(telemetry.render(_scrape_time_gauges()), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,28 +1,74 @@
-from fastapi import APIRouter, HTTPException, Query
+import base64
+import binascii
+import json
+import os
+from typing import Any, Iterator
 
-from app import db
-from app.schemas import Graph, RunRecord, RunRequest, RunResult
-from app.services.scoring import score_run
-from app.services.simulation import run_simulation_for_graph
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
-router = APIRouter(prefix="/runs", tags=["runs"])
+from app import db, http_cache, telemetry
+from app.schemas import (
+    BatchRunRequest,
+    BatchRunResult,
+    Graph,
+    JobRequest,
+    JobStatus,
+    MAX_PROFILE_NODES,
+    MAX_PROFILE_TICKS,
+    Metrics,
+    NodeSeries,
+    PreviewRequest,
+    PreviewResult,
+    ProfileRequest,
+    ProfileResult,
+    RerunRequest,
+    RunRecord,
+    RunRequest,
+    RunResult,
+    ScoreBreakdown,
+    SweepPoint,
+    SweepRequest,
+    SweepResult,
+)
+from app.services.catalog import CatalogEntry, challenge_catalog
+from app.services.graph_ir import GraphIR, GraphValidationError, compile_graph
+from app.services.jobs import Job, JobQueueFull, job_manager
+from app.services.leaderboard import leaderboards
+from app.services.rerun import RunState, apply_patch, run_states
+from app.services.scoring import score_batch, score_run
+from app.services.simulation import (
+    busiest_nodes,
+    cached_metrics,
+    engine,
+    find_knee,
+    prepare_simulation,
+    remember_metrics,
+    run_load_ramp_for_graph,
+    run_profile_for_graph,
+    run_simulation_batch_for_graph,
+    run_simulation_for_compiled,
+    run_simulation_for_graph,
+    scored_flights,
+    simulate_metrics,
+    traffic_series,
+)
 
+router = APIRouter(prefix="/runs", tags=["runs"])
 
-def _validate_graph(graph: Graph) -> None:
-    if not graph.nodes:
-        raise HTTPException(status_code=400, detail="Graph must include at least one node")
+JOB_EVENT_HEARTBEAT_SECONDS = 15.0
+# Opt-in: serve runs by splicing their stored JSON columns into the response
+# instead of rebuilding pydantic models.  The rows are our own writes, so they
+# skip response-model validation.
+FAST_JSON = os.getenv("SDG_FAST_JSON", "0") != "0"
 
-    node_ids = [node.id for node in graph.nodes]
-    if len(node_ids) != len(set(node_ids)):
-        raise HTTPException(status_code=400, detail="Node IDs must be unique")
 
-    node_set = set(node_ids)
-    for edge in graph.edges:
-        if edge.source not in node_set or edge.target not in node_set:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Edge references unknown node(s): {edge.source} -> {edge.target}",
-            )
+def _compile_graph(graph: Graph) -> GraphIR:
+    try:
+        return compile_graph(graph)
+    except GraphValidationError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from None
 
 
 def _to_run_result(run: dict) -> RunResult:
@@ -33,6 +79,8 @@ def _to_run_result(run: dict) -> RunResult:
         metrics=run["metrics"],
         score=run["score"],
         created_at=run["created_at"],
+        parent_run_id=run["parent_run_id"],
+        user_id=run["user_id"],
     )
 
 
@@ -45,48 +93,512 @@ def _to_run_record(run: dict) -> RunRecord:
         metrics=run["metrics"],
         score=run["score"],
         created_at=run["created_at"],
+        parent_run_id=run["parent_run_id"],
+        user_id=run["user_id"],
+    )
+
+
+def _raw_run_json(row: dict[str, Any]) -> str:
+    """A run row from ``db.list_raw_runs``/``get_raw_run`` as JSON, its JSON columns spliced in as stored."""
+    text = (
+        f'{{"run_id":{row["id"]},"challenge_slug":{json.dumps(row["challenge_slug"])},'
+        f'"seed":{row["seed"]},"metrics":{row["metrics_json"]},"score":{row["score_json"]},'
+        f'"created_at":{json.dumps(row["created_at"])},'
+        f'"parent_run_id":{json.dumps(row["parent_run_id"])},"user_id":{json.dumps(row["user_id"])}'
+    )
+    if "graph_json" in row:
+        text += f',"graph":{row["graph_json"]}'
+    return text + "}"
+
+
+def _json_response(body: str) -> Response:
+    return Response(content=body, media_type="application/json")
+
+
+def _persist_run(
+    payload: RunRequest, ir: GraphIR, metrics: dict[str, Any] | str, score: dict[str, Any] | str, total: float
+) -> tuple[int, str]:
+    with telemetry.stage("persist"):
+        run_id, created_at = db.record_run(
+            challenge_slug=payload.challenge_slug,
+            graph=ir.canonical_json,
+            seed=payload.seed,
+            metrics=metrics,
+            score=score,
+            user_id=payload.user_id,
+        )
+        leaderboards.record(payload.challenge_slug, payload.user_id, total)
+    return run_id, created_at
+
+
+def _score(challenge: CatalogEntry, ir: GraphIR, metrics: Metrics) -> ScoreBreakdown:
+    with telemetry.stage("score"):
+        return score_run(challenge.scoring, ir.structure, metrics)
+
+
+def _simulate_and_score(
+    challenge: CatalogEntry, ir: GraphIR, seed: int, persist: bool = True
+) -> tuple[Metrics, ScoreBreakdown]:
+    """Metrics and score for ``ir``, shared by concurrent requests for the exact same graph."""
+
+    def compute() -> tuple[Metrics, ScoreBreakdown]:
+        with telemetry.stage("simulate"):
+            metrics = run_simulation_for_graph(
+                ir, seed, offered_rps=challenge.scoring.target_throughput, persist=persist
+            )
+        return metrics, _score(challenge, ir, metrics)
+
+    return scored_flights.do((ir.canonical_json, seed, challenge.scoring, persist), compute)
+
+
+def _score_and_record(
+    challenge: CatalogEntry, payload: RunRequest, ir: GraphIR, metrics: Metrics
+) -> RunResult:
+    return _record(payload, ir, metrics, _score(challenge, ir, metrics))
+
+
+def _record(payload: RunRequest, ir: GraphIR, metrics: Metrics, score: ScoreBreakdown) -> RunResult:
+    run_id, created_at = _persist_run(payload, ir, metrics.model_dump(), score.model_dump(), score.total)
+    return RunResult(
+        run_id=run_id,
+        challenge_slug=payload.challenge_slug,
+        seed=payload.seed,
+        metrics=metrics,
+        score=score,
+        created_at=created_at,
+        user_id=payload.user_id,
+    )
+
+
+def _record_raw(payload: RunRequest, ir: GraphIR, metrics: Metrics, score: ScoreBreakdown) -> Response:
+    """``_record`` for ``FAST_JSON``: the columns are encoded once, stored, and spliced into the body."""
+    metrics_json = metrics.model_dump_json()
+    score_json = score.model_dump_json()
+    run_id, created_at = _persist_run(payload, ir, metrics_json, score_json, score.total)
+    return _json_response(
+        _raw_run_json(
+            {
+                "id": run_id,
+                "challenge_slug": payload.challenge_slug,
+                "seed": payload.seed,
+                "metrics_json": metrics_json,
+                "score_json": score_json,
+                "created_at": created_at,
+                "parent_run_id": None,
+                "user_id": payload.user_id,
+            }
+        )
     )
 
 
 @router.post("/evaluate", response_model=RunResult)
-def evaluate_run(payload: RunRequest) -> RunResult:
-    challenge = db.get_challenge(payload.challenge_slug)
+def evaluate_run(payload: RunRequest) -> RunResult | Response:
+    challenge = challenge_catalog.get(payload.challenge_slug)
     if challenge is None:
         raise HTTPException(status_code=404, detail="Challenge not found")
 
-    _validate_graph(payload.graph)
+    with telemetry.stage("compile"):
+        ir = _compile_graph(payload.graph)
+    metrics, score = _simulate_and_score(challenge, ir, payload.seed)
+    if FAST_JSON:
+        return _record_raw(payload, ir, metrics, score)
+    return _record(payload, ir, metrics, score)
+
+
+@router.post("/preview", response_model=PreviewResult)
+def preview_run(payload: PreviewRequest) -> PreviewResult:
+    """Metrics and score for live editor feedback; nothing is persisted."""
+    challenge = challenge_catalog.get(payload.challenge_slug)
+    if challenge is None:
+        raise HTTPException(status_code=404, detail="Challenge not found")
+
+    with telemetry.stage("compile"):
+        ir = _compile_graph(payload.graph)
+    metrics, score = _simulate_and_score(challenge, ir, payload.seed, persist=False)
+    return PreviewResult(challenge_slug=payload.challenge_slug, seed=payload.seed, metrics=metrics, score=score)
+
+
+def _percentile_band(values: np.ndarray) -> dict[str, float]:
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return {"p5": round(float(p5), 2), "p50": round(float(p50), 2), "p95": round(float(p95), 2)}
+
+
+def _batch_seeds(payload: BatchRunRequest) -> tuple[np.ndarray, dict]:
+    if (payload.seeds is None) == (payload.seed_count is None):
+        raise HTTPException(status_code=400, detail="Provide either seeds or seed_count")
+    if payload.seeds is not None:
+        return np.array(payload.seeds, dtype=np.int64), {"seeds": payload.seeds}
+    seeds = np.arange(payload.seed_start, payload.seed_start + payload.seed_count, dtype=np.int64)
+    return seeds, {"start": payload.seed_start, "count": payload.seed_count}
+
+
+@router.post("/evaluate-batch", response_model=BatchRunResult)
+def evaluate_batch(payload: BatchRunRequest) -> BatchRunResult:
+    challenge = challenge_catalog.get(payload.challenge_slug)
+    if challenge is None:
+        raise HTTPException(status_code=404, detail="Challenge not found")
 
-    metrics = run_simulation_for_graph(payload.graph, payload.seed)
-    score = score_run(challenge, payload.graph, metrics)
+    ir = _compile_graph(payload.graph)
+    seeds, seed_spec = _batch_seeds(payload)
 
-    run_id = db.insert_run(
+    batch = run_simulation_batch_for_graph(ir, seeds, offered_rps=challenge.scoring.target_throughput)
+    totals = score_batch(
+        challenge.scoring,
+        ir.structure,
+        batch.throughput_rps,
+        batch.latency_p95_ms,
+        batch.monthly_cost_usd,
+    )
+    summary = {
+        "throughput_rps": _percentile_band(batch.throughput_rps),
+        "latency_p95_ms": _percentile_band(batch.latency_p95_ms),
+        "availability_pct": _percentile_band(batch.availability_pct),
+        "total_score": _percentile_band(totals),
+    }
+
+    batch_id = db.insert_run_batch(
         challenge_slug=payload.challenge_slug,
         graph=payload.graph.model_dump(),
-        seed=payload.seed,
-        metrics=metrics.model_dump(),
-        score=score.model_dump(),
+        seeds=seed_spec,
+        seed_count=int(seeds.size),
+        summary=summary,
+    )
+    saved_batch = db.get_run_batch(batch_id)
+    if saved_batch is None:
+        raise HTTPException(status_code=500, detail="Failed to load saved batch")
+
+    return BatchRunResult(
+        batch_id=saved_batch["id"],
+        challenge_slug=saved_batch["challenge_slug"],
+        seed_count=saved_batch["seed_count"],
+        created_at=saved_batch["created_at"],
+        **saved_batch["summary"],
+    )
+
+
+@router.post("/sweep", response_model=SweepResult)
+def sweep_load(payload: SweepRequest) -> SweepResult:
+    """Latency-vs-load curve for a graph; nothing is persisted."""
+    challenge = challenge_catalog.get(payload.challenge_slug)
+    if challenge is None:
+        raise HTTPException(status_code=404, detail="Challenge not found")
+
+    target = challenge.scoring.target_throughput
+    start = payload.start_rps if payload.start_rps is not None else target / 10
+    stop = payload.stop_rps if payload.stop_rps is not None else target * 2
+    if start >= stop:
+        raise HTTPException(status_code=400, detail="start_rps must be below stop_rps")
+
+    ir = _compile_graph(payload.graph)
+    ramp = run_load_ramp_for_graph(ir, payload.seed, np.linspace(start, stop, payload.steps))
+    node_ids = ir.compiled.node_ids
+    points = [
+        SweepPoint(
+            offered_rps=round(offered, 3),
+            throughput_rps=throughput,
+            latency_p95_ms=latency,
+            saturated=saturated,
+            bottleneck_node=node_ids[bottleneck],
+            bottleneck_utilization=round(utilization, 4),
+        )
+        for offered, throughput, latency, saturated, bottleneck, utilization in zip(
+            ramp.offered_rps.tolist(),
+            ramp.throughput_rps.tolist(),
+            ramp.latency_p95_ms.tolist(),
+            ramp.saturated.tolist(),
+            ramp.bottleneck.tolist(),
+            ramp.bottleneck_utilization.tolist(),
+        )
+    ]
+    knee = find_knee(ramp)
+    return SweepResult(
+        challenge_slug=payload.challenge_slug,
+        target_throughput=target,
+        saturation_rps=ramp.saturation_rps,
+        saturation_node=node_ids[ramp.saturation_node],
+        knee_rps=round(knee, 3) if knee is not None else None,
+        points=points,
     )
-    db.upsert_best_score(payload.challenge_slug, score.total, run_id)
 
-    saved_run = db.get_run(run_id)
-    if saved_run is None:
-        raise HTTPException(status_code=500, detail="Failed to load saved run")
 
-    return _to_run_result(saved_run)
+def _series(values: np.ndarray) -> list[float]:
+    return np.round(values, 3).tolist()
 
 
-@router.get("", response_model=list[RunRecord])
+@router.post("/profile", response_model=ProfileResult)
+def profile_load(payload: ProfileRequest) -> ProfileResult:
+    """Time series of a graph under bursts, steps and diurnal load; nothing is persisted."""
+    challenge = challenge_catalog.get(payload.challenge_slug)
+    if challenge is None:
+        raise HTTPException(status_code=404, detail="Challenge not found")
+
+    tick_s = payload.tick_ms / 1000
+    if payload.duration_s / tick_s > MAX_PROFILE_TICKS:
+        raise HTTPException(
+            status_code=400, detail=f"Profile exceeds {MAX_PROFILE_TICKS} ticks; raise tick_ms or shorten duration_s"
+        )
+    base = payload.base_rps if payload.base_rps is not None else challenge.scoring.target_throughput
+    offered = traffic_series(base, payload.duration_s, tick_s, payload.events)
+
+    ir = _compile_graph(payload.graph)
+    node_ids = ir.compiled.node_ids
+    if payload.node_ids is None:
+        tracked = busiest_nodes(ir, payload.seed, float(offered.max()), MAX_PROFILE_NODES)
+    else:
+        index = {node_id: position for position, node_id in enumerate(node_ids)}
+        unknown = [node_id for node_id in payload.node_ids if node_id not in index]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown node(s): {', '.join(unknown)}")
+        tracked = np.array([index[node_id] for node_id in payload.node_ids], dtype=np.int64)
+
+    profile = run_profile_for_graph(ir, payload.seed, offered, tick_s, payload.points, tracked)
+    nodes = [
+        NodeSeries(
+            node_id=node_ids[node],
+            backlog=_series(profile.backlog[row]),
+            drop_rate=_series(profile.node_drop_rate[row]),
+            latency_p95_ms=_series(profile.node_latency_p95_ms[row]),
+            peak_backlog=round(float(profile.peak_backlog[node]), 3),
+            dropped_requests=round(float(profile.dropped[node]), 3),
+        )
+        for row, node in enumerate(profile.tracked.tolist())
+    ]
+    return ProfileResult(
+        challenge_slug=payload.challenge_slug,
+        tick_ms=payload.tick_ms,
+        bucket_s=round(profile.ticks_per_point * tick_s, 6),
+        time_s=_series(profile.time_s),
+        offered_rps=_series(profile.offered_rps),
+        served_rps=_series(profile.served_rps),
+        drop_rate=_series(profile.drop_rate),
+        latency_p95_ms=_series(profile.latency_p95_ms),
+        dropped_requests=round(profile.dropped_requests, 3),
+        peak_latency_p95_ms=round(float(profile.latency_p95_ms.max(initial=0.0)), 3),
+        nodes=nodes,
+    )
+
+
+def _encode_cursor(run: dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(f"{run['created_at']}|{run['id']}".encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str | None) -> tuple[str, int] | None:
+    if cursor is None:
+        return None
+    try:
+        created_at, run_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").rsplit("|", 1)
+        return created_at, int(run_id)
+    except (ValueError, UnicodeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+
+@router.get("", response_model=list[RunRecord] | list[RunResult])
 def list_runs(
+    response: Response,
     challenge_slug: str | None = None,
     limit: int = Query(default=20, ge=1, le=100),
-) -> list[RunRecord]:
-    return [_to_run_record(run) for run in db.list_runs(challenge_slug=challenge_slug, limit=limit)]
+    cursor: str | None = None,
+    include_graph: bool = True,
+) -> list[RunRecord] | list[RunResult] | Response:
+    if FAST_JSON:
+        rows = db.list_raw_runs(
+            challenge_slug=challenge_slug,
+            limit=limit,
+            before=_decode_cursor(cursor),
+            include_graph=include_graph,
+        )
+        # Returning a Response bypasses the injected one, so the cursor goes on this one.
+        body = _json_response("[" + ",".join(_raw_run_json(row) for row in rows) + "]")
+        if len(rows) == limit:
+            body.headers["X-Next-Cursor"] = _encode_cursor(rows[-1])
+        return body
+
+    runs = db.list_runs(
+        challenge_slug=challenge_slug,
+        limit=limit,
+        before=_decode_cursor(cursor),
+        include_graph=include_graph,
+    )
+    if len(runs) == limit:
+        response.headers["X-Next-Cursor"] = _encode_cursor(runs[-1])
+    if include_graph:
+        return [_to_run_record(run) for run in runs]
+    return [_to_run_result(run) for run in runs]
+
+
+def _ndjson_lines(rows: Iterator[dict[str, Any]]) -> Iterator[str]:
+    for row in rows:
+        yield _raw_run_json(row) + "\n"
+
+
+@router.get("/export")
+def export_runs(
+    challenge_slug: str | None = None,
+    cursor: str | None = None,
+    include_graph: bool = False,
+) -> StreamingResponse:
+    rows = db.iter_raw_runs(
+        challenge_slug=challenge_slug,
+        before=_decode_cursor(cursor),
+        include_graph=include_graph,
+    )
+    return StreamingResponse(_ndjson_lines(rows), media_type="application/x-ndjson")
+
+
+def _to_job_status(job: Job) -> JobStatus:
+    return JobStatus(
+        job_id=job.id,
+        state=job.state,
+        progress=job.progress,
+        result=job.result,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    )
+
+
+@router.post("/jobs", response_model=JobStatus, status_code=202)
+def submit_job(payload: JobRequest) -> JobStatus:
+    challenge = challenge_catalog.get(payload.challenge_slug)
+    if challenge is None:
+        raise HTTPException(status_code=404, detail="Challenge not found")
+
+    ir = _compile_graph(payload.graph)
+
+    request = prepare_simulation(ir, payload.seed, offered_rps=challenge.scoring.target_throughput)
+    cached = cached_metrics(request.cache_key, ir.compiled, ir.form)
+    if cached is not None:
+        return _to_job_status(job_manager.record_completed(_score_and_record(challenge, payload, ir, cached)))
+
+    def finish(fields: dict[str, Any]) -> RunResult:
+        metrics = Metrics(**fields)
+        remember_metrics(request.cache_key, ir.compiled, ir.form, metrics)
+        return _score_and_record(challenge, payload, ir, metrics)
+
+    try:
+        job = job_manager.submit(
+            simulate_metrics,
+            (request.compiled, request.offered_rps, request.seed),
+            finish=finish,
+            timeout=payload.timeout_s,
+        )
+    except JobQueueFull as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from None
+    return _to_job_status(job)
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+def get_job(job_id: str) -> JobStatus:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _to_job_status(job)
+
+
+@router.delete("/jobs/{job_id}", response_model=JobStatus)
+def cancel_job(job_id: str) -> JobStatus:
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _to_job_status(job)
+
+
+def _job_events(job_id: str) -> Iterator[str]:
+    seen = 0
+    while True:
+        events = job_manager.wait_for_events(job_id, seen, timeout=JOB_EVENT_HEARTBEAT_SECONDS)
+        if not events:
+            yield ": keep-alive\n\n"
+        for event in events:
+            yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+        seen += len(events)
+        job = job_manager.get(job_id)
+        if job is None or (job.done and seen >= len(job.events)):
+            if job is not None:
+                yield f"event: result\ndata: {_to_job_status(job).model_dump_json()}\n\n"
+            return
+
+
+@router.get("/jobs/{job_id}/events")
+def stream_job_events(job_id: str) -> StreamingResponse:
+    if job_manager.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        _job_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@router.post("/{run_id}/rerun", response_model=RunResult)
+def rerun(run_id: int, payload: RerunRequest) -> RunResult:
+    """Apply ``payload.patch`` to a stored run's graph and store the result as a child run; see ``app.services.rerun``."""
+    parent = run_states.get(run_id)
+    if parent is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    challenge = challenge_catalog.get(parent.challenge_slug)
+    if challenge is None:
+        raise HTTPException(status_code=404, detail="Challenge not found")
+
+    with telemetry.stage("compile"):
+        try:
+            state = apply_patch(parent.graph, payload.patch)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from None
+        graph_json = state.canonical_json()
+        form = engine.canonical_form(state.compiled)
+
+    seed = parent.seed if payload.seed is None else payload.seed
+    with telemetry.stage("simulate"):
+        metrics = run_simulation_for_compiled(
+            state.compiled, form, seed, offered_rps=challenge.scoring.target_throughput
+        )
+    with telemetry.stage("score"):
+        score = score_run(challenge.scoring, state.structure, metrics)
+
+    with telemetry.stage("persist"):
+        child_id, created_at = db.record_run(
+            challenge_slug=parent.challenge_slug,
+            graph=graph_json,
+            seed=seed,
+            metrics=metrics.model_dump(),
+            score=score.model_dump(),
+            parent_run_id=run_id,
+            user_id=parent.user_id,
+        )
+        leaderboards.record(parent.challenge_slug, parent.user_id, score.total)
+        run_states.put(child_id, RunState(parent.challenge_slug, seed, parent.user_id, state))
+
+    return RunResult(
+        run_id=child_id,
+        challenge_slug=parent.challenge_slug,
+        seed=seed,
+        metrics=metrics,
+        score=score,
+        created_at=created_at,
+        parent_run_id=run_id,
+        user_id=parent.user_id,
+    )
 
 
 @router.get("/{run_id}", response_model=RunRecord)
-def get_run(run_id: int) -> RunRecord:
-    run = db.get_run(run_id)
-    if run is None:
+def get_run(run_id: int, request: Request) -> Response:
+    """A stored run; runs never change once written, so clients may cache them indefinitely."""
+
+    def render() -> bytes:
+        if FAST_JSON:
+            row = db.get_raw_run(run_id)
+            if row is None:
+                raise HTTPException(status_code=404, detail="Run not found")
+            return _raw_run_json(row).encode()
+        run = db.get_run(run_id)
+        if run is None:
+            raise HTTPException(status_code=404, detail="Run not found")
+        return _to_run_record(run).model_dump_json().encode()
+
+    etag = http_cache.make_etag("run", run_id)
+    # A cached body proves the run exists; otherwise ``If-None-Match: *`` must not 304 a missing run.
+    if http_cache.response_bodies.get(etag) is None and not db.run_exists(run_id):
         raise HTTPException(status_code=404, detail="Run not found")
-    return _to_run_record(run)
+    return http_cache.conditional_json(request, etag, http_cache.IMMUTABLE, render)
 
@@ -1,12 +1,58 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
 
-from app import db
-from app.schemas import BestScore
+from app import db, http_cache
+from app.schemas import BestScore, Leaderboard, LeaderboardEntry, LeaderboardStanding
+from app.services.catalog import challenge_catalog
+from app.services.leaderboard import leaderboards
 
 router = APIRouter(tags=["scores"])
 
+_BEST_SCORES = TypeAdapter(list[BestScore])
+
 
 @router.get("/best-scores", response_model=list[BestScore])
-def list_best_scores() -> list[BestScore]:
-    return [BestScore(**score) for score in db.list_best_scores()]
+def list_best_scores(request: Request) -> Response:
+    etag = http_cache.make_etag("best-scores", db.best_scores_version())
+    return http_cache.conditional_json(
+        request,
+        etag,
+        http_cache.REVALIDATE,
+        lambda: _BEST_SCORES.dump_json([BestScore(**score) for score in db.list_best_scores()]),
+    )
+
+
+def _require_challenge(challenge_slug: str) -> None:
+    if challenge_catalog.get(challenge_slug) is None:
+        raise HTTPException(status_code=404, detail="Challenge not found")
+
+
+@router.get("/leaderboards/{challenge_slug}", response_model=Leaderboard)
+def get_leaderboard(challenge_slug: str, limit: int = Query(default=50, ge=1, le=500)) -> Leaderboard:
+    _require_challenge(challenge_slug)
+    players, entries = leaderboards.top(challenge_slug, limit)
+    return Leaderboard(
+        challenge_slug=challenge_slug,
+        players=players,
+        entries=[LeaderboardEntry(**entry) for entry in entries],
+    )
+
 
+@router.get("/leaderboards/{challenge_slug}/users/{user_id}", response_model=LeaderboardStanding)
+def get_leaderboard_standing(
+    challenge_slug: str,
+    user_id: str,
+    neighbors: int = Query(default=5, ge=0, le=50),
+) -> LeaderboardStanding:
+    _require_challenge(challenge_slug)
+    standing = leaderboards.standing(challenge_slug, user_id, neighbors)
+    if standing is None:
+        raise HTTPException(status_code=404, detail="User has no runs for this challenge")
+    players, rank, entries = standing
+    return LeaderboardStanding(
+        challenge_slug=challenge_slug,
+        players=players,
+        user_id=user_id,
+        rank=rank,
+        entries=[LeaderboardEntry(**entry) for entry in entries],
+    )
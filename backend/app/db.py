@@ -1,23 +1,150 @@
 from __future__ import annotations
 
+from concurrent.futures import Future
 from contextlib import contextmanager
+from dataclasses import dataclass
 import json
 import os
+import queue
+import re
 import sqlite3
+import threading
 from pathlib import Path
+from time import monotonic, perf_counter
 from typing import Any, Iterator
 
+from app import graph_codec, telemetry
+
 DB_PATH = Path(os.getenv("SDG_DB_PATH", Path(__file__).resolve().parent / "system_design_game.db"))
+POOL_SIZE = int(os.getenv("SDG_DB_POOL_SIZE", "8"))
+POOL_TIMEOUT_SECONDS = 30.0
+STATEMENT_CACHE_SIZE = 256
+ANONYMOUS_USER_ID = "anonymous"
+# Group commit for run inserts: one writer thread commits up to WRITE_BATCH_SIZE
+# runs per transaction, waiting at most WRITE_BATCH_WINDOW_MS for a batch to fill.
+# The default window of 0 takes only the runs that queued during the previous
+# commit, so a lone write is never held back.
+WRITE_BATCHING = os.getenv("SDG_WRITE_BATCHING", "1") != "0"
+WRITE_BATCH_SIZE = int(os.getenv("SDG_WRITE_BATCH_SIZE", "64"))
+WRITE_BATCH_WINDOW_MS = float(os.getenv("SDG_WRITE_BATCH_WINDOW_MS", "0"))
+
+# ``best_scores_version`` re-reads the shared counter at most this often, so a
+# change committed by another process reaches ``/best-scores`` ETags within it.
+# This process's own changes are seen at once.
+BEST_SCORES_REFRESH_SECONDS = float(os.getenv("SDG_BEST_SCORES_REFRESH_S", "1.0"))
+_best_scores_seen: tuple[int, float] | None = None
+_best_scores_writes = 0
+_best_scores_lock = threading.Lock()
+
+_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA cache_size = -16384",
+    "PRAGMA temp_store = MEMORY",
+)
+
+
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections shared across request threads."""
+
+    def __init__(self, size: int = POOL_SIZE) -> None:
+        self.size = size
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._checkouts = 0
+        self._waits = 0
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            DB_PATH,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in _PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            self._checkouts += 1
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._opened < self.size
+            if can_open:
+                self._opened += 1
+            else:
+                self._waits += 1
+        if can_open:
+            try:
+                return self._open()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        return self._idle.get(timeout=POOL_TIMEOUT_SECONDS)
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+            return
+        self._idle.put_nowait(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            idle = self._idle.qsize()
+            return {
+                "size": self.size,
+                "opened": self._opened,
+                "idle": idle,
+                "in_use": self._opened - idle,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+            }
+
+
+_pool = ConnectionPool()
 
 
 @contextmanager
 def _connection() -> Iterator[sqlite3.Connection]:
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = _pool.acquire()
+    changes = conn.total_changes
     try:
         yield conn
     finally:
-        conn.close()
+        telemetry.increment("db_rows_written_total", conn.total_changes - changes)
+        _pool.release(conn)
+
+
+def pool_stats() -> dict[str, int]:
+    return _pool.stats()
+
+
+def close_pool() -> None:
+    _run_writer.close()
+    _pool.close()
 
 
 def _dumps(payload: Any) -> str:
@@ -28,6 +155,12 @@ def _loads(raw: str) -> Any:
     return json.loads(raw)
 
 
+def _json_column(value: Any) -> str:
+    """Encode a JSON column, passing through text a caller already serialized."""
+    return value if isinstance(value, str) else _dumps(value)
+
+
+@telemetry.timed("db.init_db")
 def init_db() -> None:
     with _connection() as conn:
         conn.executescript(
@@ -45,15 +178,45 @@ def init_db() -> None:
                 budget_monthly_usd REAL NOT NULL
             );
 
+            CREATE TABLE IF NOT EXISTS catalog_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            );
+
+            INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0);
+
+            CREATE TABLE IF NOT EXISTS best_scores_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            );
+
+            INSERT OR IGNORE INTO best_scores_version (id, version) VALUES (1, 0);
+
+            CREATE TABLE IF NOT EXISTS leaderboard_versions (
+                challenge_slug TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS graphs (
+                hash TEXT PRIMARY KEY,
+                encoding TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+            );
+
             CREATE TABLE IF NOT EXISTS runs (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 challenge_slug TEXT NOT NULL,
-                graph_json TEXT NOT NULL,
+                graph_hash TEXT NOT NULL,
                 seed INTEGER NOT NULL,
                 metrics_json TEXT NOT NULL,
                 score_json TEXT NOT NULL,
                 created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
-                FOREIGN KEY(challenge_slug) REFERENCES challenges(slug)
+                parent_run_id INTEGER REFERENCES runs(id),
+                user_id TEXT NOT NULL DEFAULT 'anonymous',
+                FOREIGN KEY(challenge_slug) REFERENCES challenges(slug),
+                FOREIGN KEY(graph_hash) REFERENCES graphs(hash)
             );
 
             CREATE TABLE IF NOT EXISTS best_scores (
@@ -65,19 +228,160 @@ def init_db() -> None:
                 FOREIGN KEY(run_id) REFERENCES runs(id)
             );
 
-            CREATE INDEX IF NOT EXISTS idx_runs_challenge_created_at
-            ON runs(challenge_slug, created_at DESC);
+            CREATE TABLE IF NOT EXISTS user_best_scores (
+                challenge_slug TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                total REAL NOT NULL,
+                run_id INTEGER NOT NULL,
+                updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+                PRIMARY KEY (challenge_slug, user_id),
+                FOREIGN KEY(challenge_slug) REFERENCES challenges(slug),
+                FOREIGN KEY(run_id) REFERENCES runs(id)
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS run_batches (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                challenge_slug TEXT NOT NULL,
+                graph_hash TEXT NOT NULL,
+                seeds_json TEXT NOT NULL,
+                seed_count INTEGER NOT NULL,
+                summary_json TEXT NOT NULL,
+                created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+                FOREIGN KEY(challenge_slug) REFERENCES challenges(slug),
+                FOREIGN KEY(graph_hash) REFERENCES graphs(hash)
+            );
+
+            CREATE TABLE IF NOT EXISTS sim_cache (
+                cache_key TEXT PRIMARY KEY,
+                metrics_json TEXT NOT NULL,
+                created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+            );
+
+            DROP INDEX IF EXISTS idx_runs_challenge_created_at;
+
+            CREATE INDEX IF NOT EXISTS idx_runs_created_at_id
+            ON runs(created_at DESC, id DESC);
+
+            CREATE INDEX IF NOT EXISTS idx_runs_challenge_created_at_id
+            ON runs(challenge_slug, created_at DESC, id DESC);
+
+            CREATE INDEX IF NOT EXISTS idx_user_best_scores_rank
+            ON user_best_scores(challenge_slug, total DESC, updated_at, user_id, run_id);
             """
         )
+        _migrate_inline_graphs(conn)
+        _migrate_run_parent(conn)
+        _migrate_run_users(conn)
         conn.commit()
 
 
+def _store_graph(conn: sqlite3.Connection, graph: dict[str, Any] | str) -> str:
+    """Ensure ``graph`` (or canonical graph JSON) is in ``graphs`` and return its hash."""
+    return _store_graph_payload(conn, *_graph_payload(graph))
+
+
+def _graph_payload(graph: dict[str, Any] | str) -> tuple[str, str]:
+    """``(canonical JSON, hash)`` for ``graph``; needs no connection, so callers can do it up front."""
+    payload = graph if isinstance(graph, str) else graph_codec.canonical_graph_json(graph)
+    return payload, graph_codec.graph_digest(payload)
+
+
+def _store_graph_payload(conn: sqlite3.Connection, payload: str, digest: str) -> str:
+    exists = conn.execute("SELECT 1 FROM graphs WHERE hash = ?", (digest,)).fetchone()
+    if exists is None:
+        encoding, blob = graph_codec.encode_graph(payload)
+        conn.execute(
+            "INSERT INTO graphs (hash, encoding, payload, size) VALUES (?, ?, ?, ?)",
+            (digest, encoding, blob, len(payload)),
+        )
+    return digest
+
+
+def _migrate_inline_graphs(conn: sqlite3.Connection, batch_size: int = 1000) -> None:
+    """Move inline ``graph_json`` from databases created before graph dedup into ``graphs``."""
+    for table in ("runs", "run_batches"):
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if "graph_json" not in columns:
+            continue
+        if "graph_hash" not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN graph_hash TEXT REFERENCES graphs(hash)")
+
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                f"SELECT id, graph_json FROM {table} WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, batch_size),
+            ).fetchall()
+            if not rows:
+                break
+            for row_id, graph_json in rows:
+                digest = _store_graph(conn, _loads(graph_json))
+                conn.execute(f"UPDATE {table} SET graph_hash = ? WHERE id = ?", (digest, row_id))
+            last_id = rows[-1][0]
+
+        _drop_column(conn, table, "graph_json")
+
+
+def _drop_column(conn: sqlite3.Connection, table: str, column: str) -> None:
+    """``ALTER TABLE ... DROP COLUMN``, rebuilding the table on SQLite older than 3.35."""
+    if sqlite3.sqlite_version_info >= (3, 35, 0):
+        conn.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+        return
+
+    # The schemas in init_db declare one column per line, so the stored CREATE
+    # statement minus that line is the table without the column.
+    (create_sql,) = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    create_sql = re.sub(rf"\n[ \t]*{column}\b[^\n]*", "", create_sql, count=1)
+    create_sql = create_sql.replace(f"CREATE TABLE {table}", f"CREATE TABLE {table}_rebuilt", 1)
+    index_sql = [
+        sql
+        for (sql,) in conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (table,),
+        )
+    ]
+    kept = ", ".join(row[1] for row in conn.execute(f"PRAGMA table_info({table})") if row[1] != column)
+
+    conn.execute(create_sql)
+    conn.execute(f"INSERT INTO {table}_rebuilt ({kept}) SELECT {kept} FROM {table}")
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_rebuilt RENAME TO {table}")
+    for sql in index_sql:
+        conn.execute(sql)
+
+
+def _migrate_run_parent(conn: sqlite3.Connection) -> None:
+    """Add ``runs.parent_run_id`` to databases created before incremental reruns."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(runs)")}
+    if "parent_run_id" not in columns:
+        conn.execute("ALTER TABLE runs ADD COLUMN parent_run_id INTEGER REFERENCES runs(id)")
+
+
+def _migrate_run_users(conn: sqlite3.Connection) -> None:
+    """Add ``runs.user_id`` to older databases; their runs all belong to the anonymous user."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(runs)")}
+    if "user_id" in columns:
+        return
+    conn.execute(f"ALTER TABLE runs ADD COLUMN user_id TEXT NOT NULL DEFAULT '{ANONYMOUS_USER_ID}'")
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO user_best_scores (challenge_slug, user_id, total, run_id, updated_at)
+        SELECT challenge_slug, ?, total, run_id, updated_at FROM best_scores
+        """,
+        (ANONYMOUS_USER_ID,),
+    )
+
+
+@telemetry.timed("db.count_challenges")
 def count_challenges() -> int:
     with _connection() as conn:
         row = conn.execute("SELECT COUNT(*) AS total FROM challenges").fetchone()
     return int(row["total"]) if row else 0
 
 
+@telemetry.timed("db.upsert_challenge")
 def upsert_challenge(challenge: dict[str, Any]) -> None:
     with _connection() as conn:
         conn.execute(
@@ -118,9 +422,17 @@ def upsert_challenge(challenge: dict[str, Any]) -> None:
                 float(challenge["budget_monthly_usd"]),
             ),
         )
+        conn.execute("UPDATE catalog_version SET version = version + 1 WHERE id = 1")
         conn.commit()
 
 
+@telemetry.timed("db.get_catalog_version")
+def get_catalog_version() -> int:
+    with _connection() as conn:
+        row = conn.execute("SELECT version FROM catalog_version WHERE id = 1").fetchone()
+    return int(row["version"]) if row else 0
+
+
 def _challenge_row_to_dict(row: sqlite3.Row) -> dict[str, Any]:
     return {
         "slug": row["slug"],
@@ -136,6 +448,7 @@ def _challenge_row_to_dict(row: sqlite3.Row) -> dict[str, Any]:
     }
 
 
+@telemetry.timed("db.list_challenges")
 def list_challenges() -> list[dict[str, Any]]:
     with _connection() as conn:
         rows = conn.execute(
@@ -150,6 +463,7 @@ def list_challenges() -> list[dict[str, Any]]:
     return [_challenge_row_to_dict(row) for row in rows]
 
 
+@telemetry.timed("db.get_challenge")
 def get_challenge(slug: str) -> dict[str, Any] | None:
     with _connection() as conn:
         row = conn.execute(
@@ -167,6 +481,7 @@ def get_challenge(slug: str) -> dict[str, Any] | None:
     return _challenge_row_to_dict(row)
 
 
+@telemetry.timed("db.insert_run")
 def insert_run(
     challenge_slug: str,
     graph: dict[str, Any],
@@ -175,11 +490,12 @@ def insert_run(
     score: dict[str, Any],
 ) -> int:
     with _connection() as conn:
+        graph_hash = _store_graph(conn, graph)
         cursor = conn.execute(
             """
             INSERT INTO runs (
                 challenge_slug,
-                graph_json,
+                graph_hash,
                 seed,
                 metrics_json,
                 score_json
@@ -187,7 +503,7 @@ def insert_run(
             """,
             (
                 challenge_slug,
-                _dumps(graph),
+                graph_hash,
                 seed,
                 _dumps(metrics),
                 _dumps(score),
@@ -198,79 +514,513 @@ def insert_run(
 
 
 def _run_row_to_dict(row: sqlite3.Row) -> dict[str, Any]:
-    return {
+    run = {
         "id": row["id"],
         "challenge_slug": row["challenge_slug"],
-        "graph": _loads(row["graph_json"]),
         "seed": row["seed"],
         "metrics": _loads(row["metrics_json"]),
         "score": _loads(row["score_json"]),
         "created_at": row["created_at"],
+        "parent_run_id": row["parent_run_id"],
+        "user_id": row["user_id"],
     }
+    if "graph_payload" in row.keys():
+        run["graph"] = _loads(graph_codec.decode_graph(row["graph_encoding"], row["graph_payload"]))
+    return run
 
 
-def list_runs(challenge_slug: str | None = None, limit: int = 20) -> list[dict[str, Any]]:
-    query = """
-        SELECT id, challenge_slug, graph_json, seed, metrics_json, score_json, created_at
-        FROM runs
-    """
-    params: tuple[Any, ...]
-    if challenge_slug:
-        query += " WHERE challenge_slug = ?"
-        params = (challenge_slug, limit)
-        query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+_GRAPH_COLUMNS = ", g.encoding AS graph_encoding, g.payload AS graph_payload"
+_GRAPH_JOIN = " JOIN graphs g ON g.hash = r.graph_hash"
+
+
+def _run_page_query(
+    challenge_slug: str | None,
+    before: tuple[str, int] | None,
+    include_graph: bool,
+) -> tuple[str, list[Any]]:
+    query = (
+        "SELECT r.id, r.challenge_slug, r.seed, r.metrics_json, r.score_json, r.created_at, r.parent_run_id,"
+        " r.user_id"
+    )
+    if include_graph:
+        query += _GRAPH_COLUMNS + " FROM runs r" + _GRAPH_JOIN
     else:
-        params = (limit,)
-        query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        query += " FROM runs r"
+    conditions: list[str] = []
+    params: list[Any] = []
+    if challenge_slug:
+        conditions.append("r.challenge_slug = ?")
+        params.append(challenge_slug)
+    if before is not None:
+        conditions.append("(r.created_at, r.id) < (?, ?)")
+        params.extend(before)
 
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY r.created_at DESC, r.id DESC LIMIT ?"
+    return query, params
+
+
+@telemetry.timed("db.list_runs")
+def list_runs(
+    challenge_slug: str | None = None,
+    limit: int = 20,
+    before: tuple[str, int] | None = None,
+    include_graph: bool = True,
+) -> list[dict[str, Any]]:
+    """Newest-first page of runs; ``before`` is the ``(created_at, id)`` keyset cursor of the previous page."""
+    query, params = _run_page_query(challenge_slug, before, include_graph)
     with _connection() as conn:
-        rows = conn.execute(query, params).fetchall()
+        rows = conn.execute(query, (*params, limit)).fetchall()
 
     return [_run_row_to_dict(row) for row in rows]
 
 
+def _raw_run_row(row: sqlite3.Row) -> dict[str, Any]:
+    raw = dict(row)
+    if "graph_payload" in raw:
+        raw["graph_json"] = graph_codec.decode_graph(raw.pop("graph_encoding"), raw.pop("graph_payload"))
+    return raw
+
+
+@telemetry.timed("db.list_raw_runs")
+def list_raw_runs(
+    challenge_slug: str | None = None,
+    limit: int = 20,
+    before: tuple[str, int] | None = None,
+    include_graph: bool = True,
+) -> list[dict[str, Any]]:
+    """``list_runs`` with ``metrics_json``, ``score_json`` and ``graph_json`` left encoded."""
+    query, params = _run_page_query(challenge_slug, before, include_graph)
+    with _connection() as conn:
+        rows = conn.execute(query, (*params, limit)).fetchall()
+    return [_raw_run_row(row) for row in rows]
+
+
+def iter_raw_runs(
+    challenge_slug: str | None = None,
+    before: tuple[str, int] | None = None,
+    include_graph: bool = True,
+    batch_size: int = 500,
+) -> Iterator[dict[str, Any]]:
+    """Stream runs newest-first with their JSON columns left encoded."""
+    while True:
+        query, params = _run_page_query(challenge_slug, before, include_graph)
+        with telemetry.stage("db.iter_raw_runs"), _connection() as conn:
+            rows = conn.execute(query, (*params, batch_size)).fetchall()
+        for row in rows:
+            yield _raw_run_row(row)
+        if len(rows) < batch_size:
+            return
+        before = (rows[-1]["created_at"], rows[-1]["id"])
+
+
+_GET_RUN_SQL = """
+    SELECT r.id, r.challenge_slug, r.seed, r.metrics_json, r.score_json, r.created_at,
+           r.parent_run_id, r.user_id, g.encoding AS graph_encoding, g.payload AS graph_payload
+    FROM runs r
+    JOIN graphs g ON g.hash = r.graph_hash
+    WHERE r.id = ?
+"""
+
+
+@telemetry.timed("db.get_run")
 def get_run(run_id: int) -> dict[str, Any] | None:
+    with _connection() as conn:
+        row = conn.execute(_GET_RUN_SQL, (run_id,)).fetchone()
+    if row is None:
+        return None
+    return _run_row_to_dict(row)
+
+
+@telemetry.timed("db.run_exists")
+def run_exists(run_id: int) -> bool:
+    with _connection() as conn:
+        return conn.execute("SELECT 1 FROM runs WHERE id = ?", (run_id,)).fetchone() is not None
+
+
+@telemetry.timed("db.get_raw_run")
+def get_raw_run(run_id: int) -> dict[str, Any] | None:
+    """``get_run`` with the JSON columns left encoded."""
+    with _connection() as conn:
+        row = conn.execute(_GET_RUN_SQL, (run_id,)).fetchone()
+    if row is None:
+        return None
+    return _raw_run_row(row)
+
+
+@telemetry.timed("db.insert_run_batch")
+def insert_run_batch(
+    challenge_slug: str,
+    graph: dict[str, Any],
+    seeds: dict[str, Any],
+    seed_count: int,
+    summary: dict[str, Any],
+) -> int:
+    with _connection() as conn:
+        graph_hash = _store_graph(conn, graph)
+        cursor = conn.execute(
+            """
+            INSERT INTO run_batches (
+                challenge_slug,
+                graph_hash,
+                seeds_json,
+                seed_count,
+                summary_json
+            ) VALUES (?, ?, ?, ?, ?)
+            """,
+            (
+                challenge_slug,
+                graph_hash,
+                _dumps(seeds),
+                seed_count,
+                _dumps(summary),
+            ),
+        )
+        conn.commit()
+        return int(cursor.lastrowid)
+
+
+@telemetry.timed("db.get_run_batch")
+def get_run_batch(batch_id: int) -> dict[str, Any] | None:
     with _connection() as conn:
         row = conn.execute(
             """
-            SELECT id, challenge_slug, graph_json, seed, metrics_json, score_json, created_at
-            FROM runs
-            WHERE id = ?
+            SELECT b.id, b.challenge_slug, g.encoding AS graph_encoding, g.payload AS graph_payload,
+                   b.seeds_json, b.seed_count, b.summary_json, b.created_at
+            FROM run_batches b
+            JOIN graphs g ON g.hash = b.graph_hash
+            WHERE b.id = ?
             """,
-            (run_id,),
+            (batch_id,),
         ).fetchone()
     if row is None:
         return None
-    return _run_row_to_dict(row)
+    return {
+        "id": row["id"],
+        "challenge_slug": row["challenge_slug"],
+        "graph": _loads(graph_codec.decode_graph(row["graph_encoding"], row["graph_payload"])),
+        "seeds": _loads(row["seeds_json"]),
+        "seed_count": row["seed_count"],
+        "summary": _loads(row["summary_json"]),
+        "created_at": row["created_at"],
+    }
 
 
-def upsert_best_score(challenge_slug: str, total: float, run_id: int) -> None:
+@telemetry.timed("db.get_cached_metrics")
+def get_cached_metrics(cache_key: str) -> dict[str, Any] | None:
     with _connection() as conn:
-        existing = conn.execute(
-            "SELECT total FROM best_scores WHERE challenge_slug = ?",
-            (challenge_slug,),
+        row = conn.execute(
+            "SELECT metrics_json FROM sim_cache WHERE cache_key = ?",
+            (cache_key,),
         ).fetchone()
+    if row is None:
+        return None
+    return _loads(row["metrics_json"])
 
-        if existing is None:
-            conn.execute(
-                """
-                INSERT INTO best_scores (challenge_slug, total, run_id)
-                VALUES (?, ?, ?)
-                """,
-                (challenge_slug, total, run_id),
-            )
-        elif total > float(existing["total"]):
-            conn.execute(
-                """
-                UPDATE best_scores
-                SET total = ?, run_id = ?, updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
-                WHERE challenge_slug = ?
-                """,
-                (total, run_id, challenge_slug),
+
+@telemetry.timed("db.put_cached_metrics")
+def put_cached_metrics(cache_key: str, metrics: dict[str, Any]) -> None:
+    with _connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO sim_cache (cache_key, metrics_json)
+            VALUES (?, ?)
+            ON CONFLICT(cache_key) DO NOTHING
+            """,
+            (cache_key, _dumps(metrics)),
+        )
+        conn.commit()
+
+
+
+@telemetry.timed("db.prune_sim_cache")
+def prune_sim_cache(max_rows: int, keep_prefix: str | None = None) -> int:
+    """Delete cached metrics whose key lacks ``keep_prefix``, then all but the newest ``max_rows``."""
+    with _connection() as conn:
+        deleted = 0
+        if keep_prefix is not None:
+            deleted += conn.execute(
+                "DELETE FROM sim_cache WHERE substr(cache_key, 1, length(?1)) != ?1",
+                (keep_prefix,),
+            ).rowcount
+        deleted += conn.execute(
+            """
+            DELETE FROM sim_cache WHERE rowid IN (
+                SELECT rowid FROM sim_cache ORDER BY rowid DESC LIMIT -1 OFFSET ?
             )
+            """,
+            (max_rows,),
+        ).rowcount
         conn.commit()
+        return deleted
+
+_UPSERT_BEST_SCORE_SQL = """
+    INSERT INTO best_scores (challenge_slug, total, run_id)
+    VALUES (?, ?, ?)
+    ON CONFLICT(challenge_slug) DO UPDATE SET
+        total = excluded.total,
+        run_id = excluded.run_id,
+        updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+    WHERE excluded.total > best_scores.total
+"""
+
+
+_UPSERT_USER_BEST_SCORE_SQL = """
+    INSERT INTO user_best_scores (challenge_slug, user_id, total, run_id)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(challenge_slug, user_id) DO UPDATE SET
+        total = excluded.total,
+        run_id = excluded.run_id,
+        updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+    WHERE excluded.total > user_best_scores.total
+"""
+
+
+_BUMP_BEST_SCORES_VERSION_SQL = "UPDATE best_scores_version SET version = version + 1 WHERE id = 1"
+
+_BUMP_LEADERBOARD_VERSION_SQL = """
+    INSERT INTO leaderboard_versions (challenge_slug, version) VALUES (?, 1)
+    ON CONFLICT(challenge_slug) DO UPDATE SET version = version + 1
+"""
 
 
+@telemetry.timed("db.get_best_scores_version")
+def get_best_scores_version() -> int:
+    with _connection() as conn:
+        row = conn.execute("SELECT version FROM best_scores_version WHERE id = 1").fetchone()
+    return int(row["version"]) if row else 0
+
+
+def best_scores_version() -> int:
+    """``get_best_scores_version``, re-read at most once per ``BEST_SCORES_REFRESH_SECONDS``."""
+    global _best_scores_seen
+    seen = _best_scores_seen
+    if seen is not None and monotonic() - seen[1] < BEST_SCORES_REFRESH_SECONDS:
+        return seen[0]
+    writes = _best_scores_writes
+    version = get_best_scores_version()
+    with _best_scores_lock:
+        # A write committed during the read may be missing from it; re-read next time.
+        if writes == _best_scores_writes:
+            _best_scores_seen = (version, monotonic())
+    return version
+
+
+@telemetry.timed("db.get_leaderboard_version")
+def get_leaderboard_version(challenge_slug: str) -> int:
+    """Counter bumped whenever a user's best total for ``challenge_slug`` changes."""
+    with _connection() as conn:
+        row = conn.execute(
+            "SELECT version FROM leaderboard_versions WHERE challenge_slug = ?", (challenge_slug,)
+        ).fetchone()
+    return int(row["version"]) if row else 0
+
+
+def _forget_best_scores_version() -> None:
+    global _best_scores_seen, _best_scores_writes
+    with _best_scores_lock:
+        _best_scores_writes += 1
+        _best_scores_seen = None
+
+
+@telemetry.timed("db.upsert_best_score")
+def upsert_best_score(challenge_slug: str, total: float, run_id: int) -> None:
+    with _connection() as conn:
+        changed = conn.execute(_UPSERT_BEST_SCORE_SQL, (challenge_slug, total, run_id)).rowcount
+        if changed:
+            conn.execute(_BUMP_BEST_SCORES_VERSION_SQL)
+        conn.commit()
+    if changed:
+        _forget_best_scores_version()
+
+
+@dataclass(frozen=True)
+class _RunWrite:
+    """One ``record_run`` call, with its JSON encoded and graph hashed on the caller's thread."""
+
+    challenge_slug: str
+    graph_json: str
+    graph_hash: str
+    seed: int
+    metrics_json: str
+    score_json: str
+    total: float
+    parent_run_id: int | None
+    user_id: str
+
+
+def _write_run(conn: sqlite3.Connection, run: _RunWrite) -> tuple[int, str, bool]:
+    """Insert ``run`` and its best-score upserts; returns ``(id, created_at, best_scores_changed)``."""
+    graph_hash = _store_graph_payload(conn, run.graph_json, run.graph_hash)
+    row = conn.execute(
+        """
+        INSERT INTO runs (
+            challenge_slug,
+            graph_hash,
+            seed,
+            metrics_json,
+            score_json,
+            parent_run_id,
+            user_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        RETURNING id, created_at
+        """,
+        (
+            run.challenge_slug,
+            graph_hash,
+            run.seed,
+            run.metrics_json,
+            run.score_json,
+            run.parent_run_id,
+            run.user_id,
+        ),
+    ).fetchone()
+    run_id = int(row["id"])
+    best_changed = conn.execute(_UPSERT_BEST_SCORE_SQL, (run.challenge_slug, run.total, run_id)).rowcount
+    if best_changed:
+        conn.execute(_BUMP_BEST_SCORES_VERSION_SQL)
+    if conn.execute(_UPSERT_USER_BEST_SCORE_SQL, (run.challenge_slug, run.user_id, run.total, run_id)).rowcount:
+        conn.execute(_BUMP_LEADERBOARD_VERSION_SQL, (run.challenge_slug,))
+    return run_id, row["created_at"], bool(best_changed)
+
+
+class RunWriter:
+    """Group commit for ``record_run``: one writer thread commits queued runs in a single transaction."""
+
+    def __init__(
+        self, max_batch: int = WRITE_BATCH_SIZE, window_seconds: float = WRITE_BATCH_WINDOW_MS / 1000.0
+    ) -> None:
+        self.max_batch = max(1, max_batch)
+        self.window_seconds = max(0.0, window_seconds)
+        self._queue: queue.SimpleQueue[tuple[_RunWrite, Future[tuple[int, str]]] | None] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.records = 0
+
+    def submit(self, run: _RunWrite) -> Future[tuple[int, str]]:
+        future: Future[tuple[int, str]] = Future()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="sdg-run-writer", daemon=True)
+                self._thread.start()
+            self._queue.put((run, future))
+        return future
+
+    def close(self) -> None:
+        """Commit everything already queued and stop the writer; a later ``submit`` restarts it."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(None)
+        if thread is not None:
+            thread.join()
+
+    def stats(self) -> dict[str, int]:
+        return {"batches": self.batches, "records": self.records, "pending": self._queue.qsize()}
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            stopping = self._gather(batch)
+            self._commit(batch)
+            if stopping:
+                return
+
+    def _gather(self, batch: list[tuple[_RunWrite, Future[tuple[int, str]]]]) -> bool:
+        """Add queued runs to ``batch`` until it is full or the window closes; True if told to stop."""
+        deadline = perf_counter() + self.window_seconds
+        while len(batch) < self.max_batch:
+            remaining = deadline - perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                return False
+            if item is None:
+                return True
+            batch.append(item)
+        return False
+
+    def _commit(self, batch: list[tuple[_RunWrite, Future[tuple[int, str]]]]) -> None:
+        outcomes: list[tuple[Future[tuple[int, str]], tuple[int, str] | None, Exception | None]] = []
+        best_changed = False
+        try:
+            with telemetry.stage("db.write_batch"), _connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                for run, future in batch:
+                    conn.execute("SAVEPOINT run_write")
+                    try:
+                        run_id, created_at, changed = _write_run(conn, run)
+                    except sqlite3.Error as exc:
+                        conn.execute("ROLLBACK TO run_write")
+                        outcomes.append((future, None, exc))
+                    else:
+                        best_changed |= changed
+                        outcomes.append((future, (run_id, created_at), None))
+                    conn.execute("RELEASE run_write")
+                conn.commit()
+        except Exception as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+
+        self.batches += 1
+        self.records += len(batch)
+        if best_changed:
+            _forget_best_scores_version()
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+_run_writer = RunWriter()
+
+
+def write_batch_stats() -> dict[str, int]:
+    return _run_writer.stats()
+
+
+@telemetry.timed("db.record_run")
+def record_run(
+    challenge_slug: str,
+    graph: dict[str, Any] | str,
+    seed: int,
+    metrics: dict[str, Any] | str,
+    score: dict[str, Any] | str,
+    parent_run_id: int | None = None,
+    user_id: str = ANONYMOUS_USER_ID,
+) -> tuple[int, str]:
+    """Insert a run and fold it into ``best_scores`` and ``user_best_scores`` in one transaction."""
+    graph_json, graph_hash = _graph_payload(graph)
+    run = _RunWrite(
+        challenge_slug=challenge_slug,
+        graph_json=graph_json,
+        graph_hash=graph_hash,
+        seed=seed,
+        metrics_json=_json_column(metrics),
+        score_json=_json_column(score),
+        total=float((_loads(score) if isinstance(score, str) else score)["total"]),
+        parent_run_id=parent_run_id,
+        user_id=user_id,
+    )
+    if WRITE_BATCHING:
+        return _run_writer.submit(run).result()
+
+    with _connection() as conn:
+        run_id, created_at, best_changed = _write_run(conn, run)
+        conn.commit()
+    if best_changed:
+        _forget_best_scores_version()
+    return run_id, created_at
+
+
+@telemetry.timed("db.list_best_scores")
 def list_best_scores() -> list[dict[str, Any]]:
     with _connection() as conn:
         rows = conn.execute(
@@ -289,3 +1039,77 @@ def list_best_scores() -> list[dict[str, Any]]:
         }
         for row in rows
     ]
+
+
+_LEADERBOARD_COLUMNS = "SELECT user_id, total, run_id, updated_at FROM user_best_scores"
+
+
+def _leaderboard_row_to_dict(row: sqlite3.Row) -> dict[str, Any]:
+    return {
+        "user_id": row["user_id"],
+        "total": float(row["total"]),
+        "run_id": int(row["run_id"]),
+        "updated_at": row["updated_at"],
+    }
+
+
+@telemetry.timed("db.list_user_best_totals")
+def list_user_best_totals(challenge_slug: str) -> dict[str, float]:
+    """Every user's best total for a challenge, read from the rank index alone."""
+    with _connection() as conn:
+        rows = conn.execute(
+            "SELECT user_id, total FROM user_best_scores WHERE challenge_slug = ?",
+            (challenge_slug,),
+        ).fetchall()
+    return {row["user_id"]: float(row["total"]) for row in rows}
+
+
+@telemetry.timed("db.list_leaderboard")
+def list_leaderboard(challenge_slug: str, limit: int) -> list[dict[str, Any]]:
+    with _connection() as conn:
+        rows = conn.execute(
+            _LEADERBOARD_COLUMNS
+            + " WHERE challenge_slug = ? ORDER BY total DESC, updated_at, user_id LIMIT ?",
+            (challenge_slug, limit),
+        ).fetchall()
+    return [_leaderboard_row_to_dict(row) for row in rows]
+
+
+@telemetry.timed("db.get_leaderboard_neighbors")
+def get_leaderboard_neighbors(
+    challenge_slug: str, user_id: str, count: int
+) -> tuple[list[dict[str, Any]], dict[str, Any], list[dict[str, Any]]] | None:
+    """A user's leaderboard row with up to ``count`` rows directly above and below it."""
+    with _connection() as conn:
+        row = conn.execute(
+            _LEADERBOARD_COLUMNS + " WHERE challenge_slug = ? AND user_id = ?",
+            (challenge_slug, user_id),
+        ).fetchone()
+        if row is None:
+            return None
+        position = (row["total"], row["total"], row["updated_at"], row["updated_at"], row["user_id"])
+        above = conn.execute(
+            _LEADERBOARD_COLUMNS
+            + """
+            WHERE challenge_slug = ?
+              AND (total > ? OR (total = ? AND (updated_at < ? OR (updated_at = ? AND user_id < ?))))
+            ORDER BY total, updated_at DESC, user_id DESC
+            LIMIT ?
+            """,
+            (challenge_slug, *position, count),
+        ).fetchall()
+        below = conn.execute(
+            _LEADERBOARD_COLUMNS
+            + """
+            WHERE challenge_slug = ?
+              AND (total < ? OR (total = ? AND (updated_at > ? OR (updated_at = ? AND user_id > ?))))
+            ORDER BY total DESC, updated_at, user_id
+            LIMIT ?
+            """,
+            (challenge_slug, *position, count),
+        ).fetchall()
+    return (
+        [_leaderboard_row_to_dict(item) for item in reversed(above)],
+        _leaderboard_row_to_dict(row),
+        [_leaderboard_row_to_dict(item) for item in below],
+    )
@@ -0,0 +1,48 @@
+"""Canonical serialization, hashing and compressed storage encoding for design graphs."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import zlib
+from typing import Any
+
+COMPRESS_THRESHOLD_BYTES = 1024
+ENCODING_JSON = "json"
+ENCODING_ZLIB = "zlib"
+
+
+def stable_graph_json(nodes: list[dict[str, Any]], edges: list[dict[str, Any]]) -> str:
+    """Order-independent JSON for a graph: nodes sorted by id, edges by (source, target, mode)."""
+    nodes = sorted(nodes, key=lambda item: item["id"])
+    edges = sorted(edges, key=lambda item: (item["source"], item["target"], item["mode"]))
+    return json.dumps({"nodes": nodes, "edges": edges}, separators=(",", ":"), sort_keys=True)
+
+
+def canonical_graph_json(graph: dict[str, Any]) -> str:
+    nodes = [
+        {"id": node["id"], "type": node["type"], "config": node.get("config", {})}
+        for node in graph.get("nodes", [])
+    ]
+    edges = [
+        {"source": edge["source"], "target": edge["target"], "mode": edge.get("mode", "sync")}
+        for edge in graph.get("edges", [])
+    ]
+    return stable_graph_json(nodes, edges)
+
+
+def graph_digest(payload: str) -> str:
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def encode_graph(payload: str) -> tuple[str, bytes]:
+    raw = payload.encode("utf-8")
+    if len(raw) >= COMPRESS_THRESHOLD_BYTES:
+        return ENCODING_ZLIB, zlib.compress(raw, 6)
+    return ENCODING_JSON, raw
+
+
+def decode_graph(encoding: str, blob: bytes) -> str:
+    if encoding == ENCODING_ZLIB:
+        blob = zlib.decompress(blob)
+    return bytes(blob).decode("utf-8")
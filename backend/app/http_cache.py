@@ -0,0 +1,83 @@
+"""Conditional GET support: strong ETags, ``304`` answers and cached response bodies."""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+from fastapi import Request, Response
+
+from app import telemetry
+
+MAX_CACHED_BODIES = int(os.getenv("SDG_RESPONSE_CACHE_SIZE", "1024"))
+# Bump when a cached representation changes shape, so clients drop old ETags.
+REPRESENTATION_VERSION = 1
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+def make_etag(*parts: object) -> str:
+    return '"' + "-".join(str(part) for part in (f"v{REPRESENTATION_VERSION}", *parts)) + '"'
+
+
+def matches(request: Request, etag: str) -> bool:
+    """Whether ``If-None-Match`` names ``etag`` (weak comparison, as RFC 9110 asks for GET)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+class BodyCache:
+    """Bounded LRU of serialized response bodies keyed by ETag."""
+
+    def __init__(self, max_entries: int = MAX_CACHED_BODIES) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag: str) -> bytes | None:
+        with self._lock:
+            body = self._entries.get(etag)
+            if body is not None:
+                self._entries.move_to_end(etag)
+            return body
+
+    def put(self, etag: str, body: bytes) -> None:
+        with self._lock:
+            self._entries[etag] = body
+            self._entries.move_to_end(etag)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+response_bodies = BodyCache()
+
+
+def conditional_json(request: Request, etag: str, cache_control: str, render: Callable[[], bytes]) -> Response:
+    """``304`` if the client already holds ``etag``, else the cached (or freshly rendered) JSON body."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if matches(request, etag):
+        telemetry.increment("http_not_modified_total")
+        return Response(status_code=304, headers=headers)
+
+    body = response_bodies.get(etag)
+    if body is None:
+        telemetry.increment("http_body_cache_misses_total")
+        body = render()
+        response_bodies.put(etag, body)
+    else:
+        telemetry.increment("http_body_cache_hits_total")
+    return Response(content=body, media_type="application/json", headers=headers)
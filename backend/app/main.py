@@ -2,7 +2,10 @@ from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app import db, seed
-from app.api import challenges_router, runs_router, scores_router
+from app.api import challenges_router, metrics_router, runs_router, scores_router
+from app.middleware import ServerTimingMiddleware
+from app.services.jobs import job_manager
+from app.services.simulation import prune_simulation_cache
 
 app = FastAPI(title="System Design Game API", version="0.2.0")
 
@@ -12,13 +15,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing", "ETag"],
 )
+app.add_middleware(ServerTimingMiddleware)
 
 
 @app.on_event("startup")
 def startup() -> None:
     db.init_db()
     seed.seed_challenges_if_empty()
+    prune_simulation_cache()
+
+
+@app.on_event("shutdown")
+def shutdown() -> None:
+    job_manager.shutdown()
+    db.close_pool()
 
 
 @app.get("/health")
@@ -43,3 +55,4 @@ def favicon() -> Response:
 app.include_router(challenges_router)
 app.include_router(runs_router)
 app.include_router(scores_router)
+app.include_router(metrics_router)
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from time import perf_counter
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import telemetry
+
+
+class ServerTimingMiddleware:
+    """Adds a ``Server-Timing`` header listing the stages timed while handling the request."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not telemetry.ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        timings, token = telemetry.begin_request()
+        started = perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("Server-Timing", timings.server_timing(perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            telemetry.end_request(token)
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
-from typing import Any, Literal
+from typing import Annotated, Any, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+MAX_BATCH_SEEDS = 100_000
+MAX_SWEEP_STEPS = 1000
+MAX_PROFILE_TICKS = 100_000
+MAX_PROFILE_POINTS = 2000
+MAX_PROFILE_NODES = 64
 
 NodeType = Literal["lb", "api", "db", "cache", "queue", "cdn", "object_store"]
 EdgeMode = Literal["sync", "async"]
+JobState = Literal["queued", "running", "finishing", "succeeded", "failed", "cancelled", "timed_out"]
 
 
 class Node(BaseModel):
@@ -26,6 +33,8 @@ class Graph(BaseModel):
 
 
 class Challenge(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     slug: str
     title: str
     difficulty: str
@@ -38,10 +47,65 @@ class Challenge(BaseModel):
     budget_monthly_usd: float
 
 
+UserId = Annotated[str, Field(min_length=1, max_length=64)]
+
+
 class RunRequest(BaseModel):
     challenge_slug: str
     graph: Graph
     seed: int = 42
+    user_id: UserId = "anonymous"
+
+
+class JobRequest(RunRequest):
+    timeout_s: float = Field(default=60.0, gt=0, le=600)
+
+
+class NodeUpdate(BaseModel):
+    id: str = Field(..., min_length=1)
+    type: NodeType | None = None
+    # Merged into the existing config; a null value removes the key.
+    config: dict[str, Any] = Field(default_factory=dict)
+
+
+class GraphPatch(BaseModel):
+    """Delta against a stored run's graph, applied as removes, then updates, then adds."""
+
+    add_nodes: list[Node] = Field(default_factory=list)
+    remove_nodes: list[str] = Field(default_factory=list)
+    update_nodes: list[NodeUpdate] = Field(default_factory=list)
+    add_edges: list[Edge] = Field(default_factory=list)
+    remove_edges: list[Edge] = Field(default_factory=list)
+
+
+class RerunRequest(BaseModel):
+    patch: GraphPatch
+    seed: int | None = None
+
+
+class BatchRunRequest(BaseModel):
+    challenge_slug: str
+    graph: Graph
+    seeds: list[int] | None = Field(default=None, min_length=1, max_length=MAX_BATCH_SEEDS)
+    seed_start: int = 0
+    seed_count: int | None = Field(default=None, ge=1, le=MAX_BATCH_SEEDS)
+
+
+class NodeLoad(BaseModel):
+    node_id: str
+    # Offered demand over capacity; above 1 the node caps throughput.
+    utilization: float
+    headroom: float
+    on_critical_path: bool
+
+
+class PathAnalysis(BaseModel):
+    critical_path: list[str] = Field(default_factory=list)
+    critical_path_latency_ms: float = 0.0
+    # Tightest first.
+    bottlenecks: list[NodeLoad] = Field(default_factory=list)
+    # Sync edges that close a cycle; routing and latency ignore them.
+    cycle_edges: list[Edge] = Field(default_factory=list)
 
 
 class Metrics(BaseModel):
@@ -49,6 +113,11 @@ class Metrics(BaseModel):
     latency_p95_ms: int
     availability_pct: float
     monthly_cost_usd: float
+    # 95% interval of the Monte Carlo availability estimate.
+    availability_ci_pct: tuple[float, float] | None = None
+    # Minimal sets of nodes whose joint failure cuts every request off, most likely first.
+    cut_sets: list[list[str]] = Field(default_factory=list)
+    analysis: PathAnalysis | None = None
 
 
 class ScoreBreakdown(BaseModel):
@@ -67,6 +136,48 @@ class RunResult(BaseModel):
     metrics: Metrics
     score: ScoreBreakdown
     created_at: str
+    parent_run_id: int | None = None
+    user_id: str = "anonymous"
+
+
+class PreviewRequest(BaseModel):
+    challenge_slug: str
+    graph: Graph
+    seed: int = 42
+
+
+class PreviewResult(BaseModel):
+    challenge_slug: str
+    seed: int
+    metrics: Metrics
+    score: ScoreBreakdown
+
+
+class PercentileBand(BaseModel):
+    p5: float
+    p50: float
+    p95: float
+
+
+class BatchRunResult(BaseModel):
+    batch_id: int
+    challenge_slug: str
+    seed_count: int
+    throughput_rps: PercentileBand
+    latency_p95_ms: PercentileBand
+    availability_pct: PercentileBand
+    total_score: PercentileBand
+    created_at: str
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    state: JobState
+    progress: float
+    result: RunResult | None = None
+    error: str | None = None
+    created_at: str
+    updated_at: str
 
 
 class RunRecord(RunResult):
@@ -79,3 +190,149 @@ class BestScore(BaseModel):
     run_id: int
     updated_at: str
 
+
+class SweepRequest(BaseModel):
+    challenge_slug: str
+    graph: Graph
+    seed: int = 42
+    # Default ramp: a tenth of the challenge's target throughput up to twice it.
+    start_rps: float | None = Field(default=None, gt=0)
+    stop_rps: float | None = Field(default=None, gt=0)
+    steps: int = Field(default=25, ge=2, le=MAX_SWEEP_STEPS)
+
+
+class SweepPoint(BaseModel):
+    offered_rps: float
+    throughput_rps: int
+    latency_p95_ms: int
+    saturated: bool
+    bottleneck_node: str
+    bottleneck_utilization: float
+
+
+class SweepResult(BaseModel):
+    challenge_slug: str
+    target_throughput: int
+    saturation_rps: int
+    saturation_node: str
+    knee_rps: float | None = None
+    points: list[SweepPoint]
+
+
+class BurstEvent(BaseModel):
+    """Extra load for a window of the profile."""
+
+    kind: Literal["burst"]
+    start_s: float = Field(..., ge=0)
+    duration_s: float = Field(..., gt=0)
+    rps: float
+
+
+class StepEvent(BaseModel):
+    """Load that changes by ``rps`` at ``start_s`` and stays changed."""
+
+    kind: Literal["step"]
+    start_s: float = Field(..., ge=0)
+    rps: float
+
+
+class DiurnalEvent(BaseModel):
+    """A sine wave ``amplitude_rps * sin(2*pi*(t - phase_s) / period_s)``; the period defaults to the whole profile."""
+
+    kind: Literal["diurnal"]
+    amplitude_rps: float = Field(..., ge=0)
+    period_s: float | None = Field(default=None, gt=0)
+    phase_s: float = 0.0
+
+
+TrafficEvent = Annotated[BurstEvent | StepEvent | DiurnalEvent, Field(discriminator="kind")]
+
+
+class ProfileRequest(BaseModel):
+    challenge_slug: str
+    graph: Graph
+    seed: int = 42
+    # Defaults to the challenge's target throughput; events add to it.
+    base_rps: float | None = Field(default=None, ge=0)
+    duration_s: float = Field(default=600.0, gt=0)
+    tick_ms: float = Field(default=100.0, gt=0)
+    events: list[TrafficEvent] = Field(default_factory=list)
+    points: int = Field(default=200, ge=1, le=MAX_PROFILE_POINTS)
+    # Nodes to return series for; defaults to the most loaded nodes at peak.
+    node_ids: list[str] | None = Field(default=None, max_length=MAX_PROFILE_NODES)
+
+
+class NodeSeries(BaseModel):
+    node_id: str
+    backlog: list[float]
+    drop_rate: list[float]
+    latency_p95_ms: list[float]
+    peak_backlog: float
+    dropped_requests: float
+
+
+class ProfileResult(BaseModel):
+    challenge_slug: str
+    tick_ms: float
+    bucket_s: float
+    time_s: list[float]
+    offered_rps: list[float]
+    served_rps: list[float]
+    drop_rate: list[float]
+    latency_p95_ms: list[float]
+    dropped_requests: float
+    peak_latency_p95_ms: float
+    nodes: list[NodeSeries]
+
+
+class OptimizeRequest(BaseModel):
+    graph: Graph
+    seed: int = 42
+    time_budget_ms: int = Field(default=1000, ge=10, le=30_000)
+    max_replicas: int = Field(default=16, ge=1, le=256)
+    max_shards: int = Field(default=8, ge=1, le=256)
+    min_availability_pct: float | None = Field(default=None, ge=0, le=100)
+    frontier_limit: int = Field(default=50, ge=1, le=500)
+
+
+class NodeSizing(BaseModel):
+    id: str
+    replicas: int
+    shards: int | None = None
+
+
+class DesignCandidate(BaseModel):
+    nodes: list[NodeSizing]
+    metrics: Metrics
+    meets_targets: bool
+
+
+class OptimizeResult(BaseModel):
+    challenge_slug: str
+    feasible: bool
+    best: DesignCandidate | None = None
+    best_graph: Graph | None = None
+    frontier: list[DesignCandidate]
+    candidates_evaluated: int
+    candidates_pruned: int
+    search_complete: bool
+    elapsed_ms: float
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: str
+    total: float
+    run_id: int
+    updated_at: str
+
+
+class Leaderboard(BaseModel):
+    challenge_slug: str
+    players: int
+    entries: list[LeaderboardEntry]
+
+
+class LeaderboardStanding(Leaderboard):
+    user_id: str
+    rank: int
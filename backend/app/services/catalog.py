@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+
+from app import db
+from app.schemas import Challenge
+from app.services.scoring import ScoringInputs
+
+REFRESH_INTERVAL_SECONDS = float(os.getenv("SDG_CATALOG_REFRESH_S", "1.0"))
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    challenge: Challenge
+    scoring: ScoringInputs
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: int
+    challenges: tuple[Challenge, ...]
+    by_slug: Mapping[str, CatalogEntry]
+
+
+class ChallengeCatalog:
+    """Immutable in-process copy of the challenge table."""
+
+    def __init__(self, refresh_interval: float = REFRESH_INTERVAL_SECONDS) -> None:
+        self.refresh_interval = refresh_interval
+        self._snapshot: CatalogSnapshot | None = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.refresh_interval:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic() - self._checked_at < self.refresh_interval:
+                return snapshot
+            version = db.get_catalog_version()
+            if snapshot is None or snapshot.version != version:
+                snapshot = self._load(version)
+                self._snapshot = snapshot
+            self._checked_at = time.monotonic()
+            return snapshot
+
+    @staticmethod
+    def _load(version: int) -> CatalogSnapshot:
+        entries: dict[str, CatalogEntry] = {}
+        challenges: list[Challenge] = []
+        for raw in db.list_challenges():
+            challenge = Challenge(**raw)
+            challenges.append(challenge)
+            entries[challenge.slug] = CatalogEntry(
+                challenge=challenge,
+                scoring=ScoringInputs.from_challenge(raw),
+            )
+        return CatalogSnapshot(
+            version=version,
+            challenges=tuple(challenges),
+            by_slug=MappingProxyType(entries),
+        )
+
+    def get(self, slug: str) -> CatalogEntry | None:
+        return self.snapshot().by_slug.get(slug)
+
+    def list(self) -> tuple[Challenge, ...]:
+        return self.snapshot().challenges
+
+    def invalidate(self) -> None:
+        """Force the next read to re-check the catalog version."""
+        self._checked_at = float("-inf")
+
+
+challenge_catalog = ChallengeCatalog()
@@ -0,0 +1,108 @@
+"""Single-pass compilation of a request ``Graph`` into the form every stage consumes."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+from app import graph_codec
+from app.schemas import Graph
+from app.services.scoring import CRITICAL_NODE_TYPES, GraphStructure
+from app.services.simulation import engine
+
+_CRITICAL_CODES = frozenset(engine.TYPE_CODES[node_type] for node_type in CRITICAL_NODE_TYPES)
+
+
+class GraphValidationError(ValueError):
+    pass
+
+
+class GraphIR:
+    """A validated graph, parsed once: engine arrays, scoring structure, stored JSON and canonical form."""
+
+    __slots__ = ("compiled", "structure", "canonical_json", "form")
+
+    def __init__(
+        self,
+        compiled: engine.CompiledGraph,
+        structure: GraphStructure,
+        canonical_json: str,
+        form: engine.CanonicalForm,
+    ) -> None:
+        self.compiled = compiled
+        self.structure = structure
+        self.canonical_json = canonical_json
+        self.form = form
+
+    @property
+    def digest(self) -> str:
+        return self.form.digest
+
+    @property
+    def node_count(self) -> int:
+        return self.compiled.node_count
+
+    @property
+    def edge_count(self) -> int:
+        return self.compiled.edge_count
+
+
+def compile_graph(graph: Graph) -> GraphIR:
+    """Validate and compile ``graph``; raises ``GraphValidationError`` if it is empty or inconsistent."""
+    if not graph.nodes:
+        raise GraphValidationError("Graph must include at least one node")
+
+    index: dict[str, int] = {}
+    node_ids: list[str] = []
+    node_payload: list[dict[str, Any]] = []
+    codes: list[int] = []
+    replicas: list[int] = []
+    shards: list[int] = []
+    hit_ratio: list[float] = []
+    node_types: set[str] = set()
+    replicated_critical = False
+
+    for position, node in enumerate(graph.nodes):
+        if index.setdefault(node.id, position) != position:
+            raise GraphValidationError("Node IDs must be unique")
+        code, node_replicas, node_shards, node_hit_ratio = engine.node_params(node.type, node.config)
+        node_ids.append(node.id)
+        node_payload.append({"id": node.id, "type": node.type, "config": node.config})
+        codes.append(code)
+        replicas.append(node_replicas)
+        shards.append(node_shards)
+        hit_ratio.append(node_hit_ratio)
+        node_types.add(node.type)
+        replicated_critical = replicated_critical or (code in _CRITICAL_CODES and node_replicas >= 2)
+
+    edge_payload: list[dict[str, Any]] = []
+    src: list[int] = []
+    dst: list[int] = []
+    sync: list[bool] = []
+    for edge in graph.edges:
+        source = index.get(edge.source)
+        target = index.get(edge.target)
+        if source is None or target is None:
+            raise GraphValidationError(f"Edge references unknown node(s): {edge.source} -> {edge.target}")
+        edge_payload.append({"source": edge.source, "target": edge.target, "mode": edge.mode})
+        src.append(source)
+        dst.append(target)
+        sync.append(edge.mode == "sync")
+
+    compiled = engine.build_compiled_graph(
+        node_ids=tuple(node_ids),
+        type_codes=np.array(codes, dtype=np.int64),
+        replicas=np.array(replicas, dtype=np.int64),
+        shards=np.array(shards, dtype=np.int64),
+        cache_hit_ratio=np.array(hit_ratio, dtype=float),
+        src=np.array(src, dtype=np.int64),
+        dst=np.array(dst, dtype=np.int64),
+        sync=np.array(sync, dtype=bool),
+    )
+    return GraphIR(
+        compiled=compiled,
+        structure=GraphStructure(node_types=frozenset(node_types), replicated_critical=replicated_critical),
+        canonical_json=graph_codec.stable_graph_json(node_payload, edge_payload),
+        form=engine.canonical_form(compiled),
+    )
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+MAX_WORKERS = int(os.getenv("SDG_JOB_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+MAX_PENDING_JOBS = int(os.getenv("SDG_JOB_QUEUE_DEPTH", "64"))
+MAX_RETAINED_JOBS = 1000
+
+TERMINAL_STATES = frozenset({"succeeded", "failed", "cancelled", "timed_out"})
+STATE_PROGRESS = {
+    "queued": 0.0,
+    "running": 0.25,
+    "finishing": 0.75,
+    "succeeded": 1.0,
+    "failed": 1.0,
+    "cancelled": 1.0,
+    "timed_out": 1.0,
+}
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+# Set in each worker process: where it reports the id of every job it starts.
+_started: Any = None
+
+
+def _init_worker(started: Any) -> None:
+    global _started
+    _started = started
+
+
+def _run(job_id: str, work: Callable[..., Any], *args: Any) -> Any:
+    _started.put(job_id)
+    return work(*args)
+
+
+def _timestamp() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+@dataclass
+class Job:
+    id: str
+    state: str = "queued"
+    result: Any = None
+    error: str | None = None
+    created_at: str = field(default_factory=_timestamp)
+    updated_at: str = field(default_factory=_timestamp)
+    events: list[dict[str, Any]] = field(default_factory=list)
+    future: Future | None = None
+    timer: threading.Timer | None = None
+
+    @property
+    def done(self) -> bool:
+        return self.state in TERMINAL_STATES
+
+    @property
+    def progress(self) -> float:
+        return STATE_PROGRESS[self.state]
+
+
+class JobManager:
+    """Runs CPU-bound work in a process pool and tracks it as pollable jobs."""
+
+    def __init__(
+        self,
+        max_workers: int = MAX_WORKERS,
+        max_pending: int = MAX_PENDING_JOBS,
+        max_retained: int = MAX_RETAINED_JOBS,
+    ) -> None:
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_retained = max_retained
+        self._executor: ProcessPoolExecutor | None = None
+        # ``finish`` callbacks score and persist; they run here rather than on
+        # the process pool's management thread, which must keep collecting results.
+        self._finishers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sdg-job-finish")
+        self._started: Any = None
+        self._watcher: threading.Thread | None = None
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._pending = 0
+        self._changed = threading.Condition()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            context = multiprocessing.get_context("spawn")
+            if self._started is None:
+                self._started = context.SimpleQueue()
+            if self._watcher is None or not self._watcher.is_alive():
+                self._watcher = threading.Thread(
+                    target=self._watch_starts, args=(self._started,), name="sdg-job-starts", daemon=True
+                )
+                self._watcher.start()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self._started,),
+            )
+        return self._executor
+
+    def submit(
+        self,
+        work: Callable[..., Any],
+        args: tuple[Any, ...],
+        finish: Callable[[Any], Any],
+        timeout: float,
+    ) -> Job:
+        with self._changed:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"Job queue is full ({self.max_pending} pending)")
+            job_id = uuid.uuid4().hex
+            try:
+                future = self._pool().submit(_run, job_id, work, *args)
+            except BrokenProcessPool:
+                # A worker died; start a fresh pool for this and later jobs.
+                self._executor = None
+                future = self._pool().submit(_run, job_id, work, *args)
+            job = self._add(Job(id=job_id, future=future))
+            self._pending += 1
+            self._emit(job)
+            job.timer = threading.Timer(timeout, self._expire, args=(job.id,))
+            job.timer.daemon = True
+            job.timer.start()
+        job.future.add_done_callback(lambda future: self._complete(job, future, finish))
+        return job
+
+    def record_completed(self, result: Any) -> Job:
+        """Register a job whose result is already known (for example a cache hit)."""
+        with self._changed:
+            job = self._add(Job(id=uuid.uuid4().hex, state="succeeded", result=result))
+            self._emit(job)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._changed:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Job | None:
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return job
+            self._finish(job, "cancelled")
+            if job.future is not None:
+                job.future.cancel()
+            return job
+
+    def wait_for_events(self, job_id: str, seen: int, timeout: float) -> list[dict[str, Any]]:
+        """Block until job ``job_id`` has more than ``seen`` events or ``timeout`` elapses."""
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return []
+            if len(job.events) <= seen and not job.done:
+                self._changed.wait(timeout)
+            return list(job.events[seen:])
+
+    def shutdown(self) -> None:
+        with self._changed:
+            for job in self._jobs.values():
+                if job.timer is not None:
+                    job.timer.cancel()
+            executor, self._executor = self._executor, None
+            watcher, self._watcher = self._watcher, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if watcher is not None:
+            self._started.put(None)
+
+    def stats(self) -> dict[str, int]:
+        with self._changed:
+            return {"pending": self._pending, "retained": len(self._jobs), "max_pending": self.max_pending}
+
+    def _add(self, job: Job) -> Job:
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.max_retained:
+            oldest_id = next((job_id for job_id, old in self._jobs.items() if old.done), None)
+            if oldest_id is None:
+                break
+            del self._jobs[oldest_id]
+        return job
+
+    def _emit(self, job: Job) -> None:
+        job.updated_at = _timestamp()
+        job.events.append({"state": job.state, "progress": job.progress, "at": job.updated_at})
+        self._changed.notify_all()
+
+    def _transition(self, job: Job, state: str) -> None:
+        job.state = state
+        self._emit(job)
+
+    def _finish(self, job: Job, state: str, result: Any = None, error: str | None = None) -> None:
+        if job.timer is not None:
+            job.timer.cancel()
+        job.result = result
+        job.error = error
+        self._transition(job, state)
+
+    def _watch_starts(self, started: Any) -> None:
+        # Process pools do not report when a task starts, so workers tell us.
+        while (job_id := started.get()) is not None:
+            with self._changed:
+                job = self._jobs.get(job_id)
+                if job is not None and job.state == "queued":
+                    self._transition(job, "running")
+
+    def _expire(self, job_id: str) -> None:
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return
+            self._finish(job, "timed_out", error="Job exceeded its timeout")
+            if job.future is not None:
+                job.future.cancel()
+
+    def _complete(self, job: Job, future: Future, finish: Callable[[Any], Any]) -> None:
+        with self._changed:
+            self._pending -= 1
+            if job.done:
+                return
+            if future.cancelled():
+                self._finish(job, "cancelled")
+                return
+            error = future.exception()
+            if error is not None:
+                self._finish(job, "failed", error=str(error) or type(error).__name__)
+                return
+            self._transition(job, "finishing")
+        self._finishers.submit(self._run_finish, job, future.result(), finish)
+
+    def _run_finish(self, job: Job, output: Any, finish: Callable[[Any], Any]) -> None:
+        try:
+            result = finish(output)
+        except Exception as exc:  # noqa: BLE001 - surfaced to the client as job.error
+            with self._changed:
+                if not job.done:
+                    self._finish(job, "failed", error=str(exc) or type(exc).__name__)
+            return
+
+        with self._changed:
+            if not job.done:
+                self._finish(job, "succeeded", result=result)
+
+
+job_manager = JobManager()
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any
+
+import numpy as np
+
+from app import db
+
+# Totals are rounded to cents and never exceed 100, so a challenge's whole
+# score range fits in a fixed array of buckets.
+SCORE_SCALE = 100
+MAX_TOTAL = 100.0
+BUCKET_COUNT = int(MAX_TOTAL * SCORE_SCALE) + 1
+
+# A loaded index re-checks its challenge's ``leaderboard_versions`` row at most
+# this often and reloads when another process has changed a best total.
+REFRESH_INTERVAL_SECONDS = float(os.getenv("SDG_LEADERBOARD_REFRESH_S", "1.0"))
+
+
+def _bucket(total: float) -> int:
+    return min(max(int(round(total * SCORE_SCALE)), 0), BUCKET_COUNT - 1)
+
+
+class ScoreIndex:
+    """Order-statistics index over one challenge's per-user best totals."""
+
+    __slots__ = ("_tree", "_buckets")
+
+    def __init__(self, totals: dict[str, float]) -> None:
+        buckets = np.clip(
+            np.rint(np.fromiter(totals.values(), dtype=float, count=len(totals)) * SCORE_SCALE),
+            0,
+            BUCKET_COUNT - 1,
+        ).astype(np.int64)
+        self._buckets = dict(zip(totals, buckets.tolist()))
+        counts = np.bincount(buckets, minlength=BUCKET_COUNT)
+        # Node i (1-based) covers buckets (i - lowbit(i), i]; build from prefix sums in one pass.
+        prefix = np.concatenate(([0], np.cumsum(counts)))
+        positions = np.arange(1, BUCKET_COUNT + 1)
+        tree = np.zeros(BUCKET_COUNT + 1, dtype=np.int64)
+        tree[1:] = prefix[positions] - prefix[positions - (positions & -positions)]
+        self._tree: list[int] = tree.tolist()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _add(self, bucket: int, delta: int) -> None:
+        position = bucket + 1
+        while position <= BUCKET_COUNT:
+            self._tree[position] += delta
+            position += position & -position
+
+    def _count_at_most(self, bucket: int) -> int:
+        position = bucket + 1
+        count = 0
+        while position > 0:
+            count += self._tree[position]
+            position -= position & -position
+        return count
+
+    def record(self, user_id: str, total: float) -> bool:
+        """Apply a new run's total; returns whether it became the user's best."""
+        bucket = _bucket(total)
+        current = self._buckets.get(user_id)
+        if current is not None and bucket <= current:
+            return False
+        if current is not None:
+            self._add(current, -1)
+        self._add(bucket, 1)
+        self._buckets[user_id] = bucket
+        return True
+
+    def rank(self, total: float) -> int:
+        """Competition rank of ``total``: one more than the number of players strictly above it."""
+        return len(self._buckets) - self._count_at_most(_bucket(total)) + 1
+
+
+class Leaderboards:
+    """Per-challenge ``ScoreIndex`` instances, loaded lazily and kept in sync by ``record``."""
+
+    def __init__(self, refresh_interval: float = REFRESH_INTERVAL_SECONDS) -> None:
+        self.refresh_interval = refresh_interval
+        # slug -> (index, leaderboard version it was loaded at, monotonic time of the last check)
+        self._indexes: dict[str, tuple[ScoreIndex, int, float]] = {}
+        self._lock = threading.Lock()
+
+    def _index(self, challenge_slug: str) -> ScoreIndex:
+        with self._lock:
+            loaded = self._indexes.get(challenge_slug)
+            if loaded is not None and time.monotonic() - loaded[2] < self.refresh_interval:
+                return loaded[0]
+            # Loading under the lock means a concurrent ``record`` either
+            # lands in the loaded rows or is applied right after. The version
+            # is read first, so a write racing the load only forces another one.
+            version = db.get_leaderboard_version(challenge_slug)
+            if loaded is None or loaded[1] != version:
+                index = ScoreIndex(db.list_user_best_totals(challenge_slug))
+            else:
+                index = loaded[0]
+            self._indexes[challenge_slug] = (index, version, time.monotonic())
+            return index
+
+    def record(self, challenge_slug: str, user_id: str, total: float) -> None:
+        """Call after a run is committed so loaded indexes see the new total."""
+        with self._lock:
+            loaded = self._indexes.get(challenge_slug)
+            if loaded is not None:
+                loaded[0].record(user_id, total)
+
+    def invalidate(self, challenge_slug: str | None = None) -> None:
+        with self._lock:
+            if challenge_slug is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(challenge_slug, None)
+
+    def _ranked(self, index: ScoreIndex, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        with self._lock:
+            return [{**row, "rank": index.rank(row["total"])} for row in rows]
+
+    def top(self, challenge_slug: str, limit: int) -> tuple[int, list[dict[str, Any]]]:
+        index = self._index(challenge_slug)
+        entries = self._ranked(index, db.list_leaderboard(challenge_slug, limit))
+        return len(index), entries
+
+    def standing(
+        self, challenge_slug: str, user_id: str, neighbors: int
+    ) -> tuple[int, int, list[dict[str, Any]]] | None:
+        """``(players, rank, entries)`` for ``user_id`` and up to ``neighbors`` rows either side."""
+        index = self._index(challenge_slug)
+        window = db.get_leaderboard_neighbors(challenge_slug, user_id, neighbors)
+        if window is None:
+            return None
+        above, own, below = window
+        entries = self._ranked(index, [*above, own, *below])
+        return len(index), entries[len(above)]["rank"], entries
+
+
+leaderboards = Leaderboards()
@@ -0,0 +1,354 @@
+"""Incremental re-evaluation of a stored run's graph under a small patch.
+
+Parsing, validation, structure scoring and re-serialization only touch the
+patched nodes and edges, and replica/shard edits keep the compiled routing.
+The digest, the simulation and persisting the child's graph still cover the
+whole graph: a child run must match a fresh evaluation of its graph, whose
+seed derives from the canonical digest of all of it.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Iterable
+
+import numpy as np
+
+from app import db
+from app.schemas import GraphPatch
+from app.services.scoring import GraphStructure, is_replicated_critical
+from app.services.simulation import engine
+
+MAX_CACHED_STATES = int(os.getenv("SDG_RERUN_STATE_CACHE_SIZE", "64"))
+
+EdgeKey = tuple[str, str, str]
+
+
+@dataclass(frozen=True)
+class GraphState:
+    """A graph kept in every form a patch needs to update; never mutated, so cached parents stay valid."""
+
+    nodes: dict[str, dict[str, Any]]
+    edges: dict[EdgeKey, int]
+    index: dict[str, int]
+    compiled: engine.CompiledGraph
+    type_counts: Counter[str]
+    replicated_count: int
+    node_json: dict[str, str]
+    node_order: list[str]
+    edge_json: dict[EdgeKey, str]
+    edge_order: list[EdgeKey]
+    edges_text: str
+
+    @classmethod
+    def from_graph(cls, graph: dict[str, Any]) -> GraphState:
+        nodes = {
+            node["id"]: {"id": node["id"], "type": node["type"], "config": node.get("config", {})}
+            for node in graph["nodes"]
+        }
+        edges = Counter(
+            (edge["source"], edge["target"], edge.get("mode", "sync")) for edge in graph["edges"]
+        )
+        compiled = engine.compile_graph(nodes.values(), graph["edges"])
+        edge_json = {key: _edge_json(key, count) for key, count in edges.items()}
+        edge_order = sorted(edges)
+        return cls(
+            nodes=nodes,
+            edges=dict(edges),
+            index={node_id: position for position, node_id in enumerate(compiled.node_ids)},
+            compiled=compiled,
+            type_counts=Counter(node["type"] for node in nodes.values()),
+            replicated_count=sum(is_replicated_critical(node["type"], node["config"]) for node in nodes.values()),
+            node_json={node_id: _node_json(node) for node_id, node in nodes.items()},
+            node_order=sorted(nodes),
+            edge_json=edge_json,
+            edge_order=edge_order,
+            edges_text=_join(edge_json, edge_order),
+        )
+
+    @property
+    def structure(self) -> GraphStructure:
+        return GraphStructure(
+            node_types=frozenset(node_type for node_type, count in self.type_counts.items() if count > 0),
+            replicated_critical=self.replicated_count > 0,
+        )
+
+    def graph(self) -> dict[str, Any]:
+        edges = [
+            {"source": source, "target": target, "mode": mode}
+            for (source, target, mode), count in self.edges.items()
+            for _ in range(count)
+        ]
+        return {"nodes": list(self.nodes.values()), "edges": edges}
+
+    def canonical_json(self) -> str:
+        """``graph_codec.stable_graph_json`` of this graph, joined from the stored fragments."""
+        nodes = _join(self.node_json, self.node_order)
+        return f'{{"edges":[{self.edges_text}],"nodes":[{nodes}]}}'
+
+
+def _join(fragments: dict[Any, str], order: list[Any]) -> str:
+    return ",".join(map(fragments.__getitem__, order))
+
+
+def _node_json(node: dict[str, Any]) -> str:
+    return json.dumps(node, separators=(",", ":"), sort_keys=True)
+
+
+def _edge_json(key: EdgeKey, count: int) -> str:
+    source, target, mode = key
+    fragment = json.dumps({"mode": mode, "source": source, "target": target}, separators=(",", ":"))
+    return ",".join([fragment] * count)
+
+
+def _reordered(order: list[Any], removed: Iterable[Hashable], added: Iterable[Hashable]) -> list[Any]:
+    """``order`` (sorted) without ``removed`` and with ``added``; ``order`` itself when neither has keys."""
+    removed, added = list(removed), list(added)
+    if not removed and not added:
+        return order
+    order = list(order)
+    for key in removed:
+        del order[bisect.bisect_left(order, key)]
+    for key in added:
+        bisect.insort(order, key)
+    return order
+
+
+def _merge_config(config: dict[str, Any], changes: dict[str, Any]) -> dict[str, Any]:
+    merged = {**config, **changes}
+    return {key: value for key, value in merged.items() if value is not None}
+
+
+def apply_patch(state: GraphState, patch: GraphPatch) -> GraphState:
+    """Return ``state`` with ``patch`` applied; raises ``ValueError`` if the patch does not fit."""
+    compiled = state.compiled
+    nodes = dict(state.nodes)
+    edges = dict(state.edges)
+    type_counts = Counter(state.type_counts)
+    replicated_count = state.replicated_count
+    keep_edge = np.ones(compiled.edge_count, dtype=bool)
+    keep_node = np.ones(compiled.node_count, dtype=bool)
+
+    def forget(node: dict[str, Any]) -> None:
+        nonlocal replicated_count
+        type_counts[node["type"]] -= 1
+        replicated_count -= is_replicated_critical(node["type"], node["config"])
+
+    def remember(node: dict[str, Any]) -> None:
+        nonlocal replicated_count
+        type_counts[node["type"]] += 1
+        replicated_count += is_replicated_critical(node["type"], node["config"])
+
+    touched_edges: set[EdgeKey] = set()
+    touched_nodes: set[str] = set()
+
+    def drop_edge(key: EdgeKey) -> None:
+        touched_edges.add(key)
+        edges[key] -= 1
+        if edges[key] == 0:
+            del edges[key]
+
+    for edge in patch.remove_edges:
+        key = (edge.source, edge.target, edge.mode)
+        if key not in edges:
+            raise ValueError(f"Edge not found: {edge.source} -> {edge.target} ({edge.mode})")
+        drop_edge(key)
+        match = np.flatnonzero(
+            keep_edge
+            & (compiled.src == state.index[edge.source])
+            & (compiled.dst == state.index[edge.target])
+            & (compiled.sync == (edge.mode == "sync"))
+        )
+        keep_edge[match[0]] = False
+
+    for node_id in patch.remove_nodes:
+        node = nodes.pop(node_id, None)
+        if node is None:
+            raise ValueError(f"Node not found: {node_id}")
+        forget(node)
+        touched_nodes.add(node_id)
+        keep_node[state.index[node_id]] = False
+
+    if not keep_node.all():
+        removed = ~keep_node
+        incident = keep_edge & (removed[compiled.src] | removed[compiled.dst])
+        for position in np.flatnonzero(incident):
+            drop_edge(
+                (
+                    compiled.node_ids[compiled.src[position]],
+                    compiled.node_ids[compiled.dst[position]],
+                    "sync" if compiled.sync[position] else "async",
+                )
+            )
+        keep_edge &= ~incident
+
+    routing_changed = bool(patch.remove_edges or patch.remove_nodes or patch.add_nodes or patch.add_edges)
+    updated: dict[int, tuple[int, int, int, float]] = {}
+    for update in patch.update_nodes:
+        old = nodes.get(update.id)
+        if old is None:
+            raise ValueError(f"Node not found: {update.id}")
+        node = {
+            "id": update.id,
+            "type": update.type or old["type"],
+            "config": _merge_config(old["config"], update.config),
+        }
+        forget(old)
+        remember(node)
+        nodes[update.id] = node
+        touched_nodes.add(update.id)
+        position = state.index[update.id]
+        params = engine.node_params(node["type"], node["config"])
+        updated[position] = params
+        code, _, _, hit_ratio = params
+        if code != compiled.type_codes[position] or hit_ratio != compiled.cache_hit_ratio[position]:
+            routing_changed = True
+
+    added: list[tuple[str, int, int, int, float]] = []
+    for node in patch.add_nodes:
+        if node.id in nodes:
+            raise ValueError(f"Node already exists: {node.id}")
+        entry = {"id": node.id, "type": node.type, "config": node.config}
+        nodes[node.id] = entry
+        remember(entry)
+        touched_nodes.add(node.id)
+        added.append((node.id, *engine.node_params(node.type, node.config)))
+
+    if not nodes:
+        raise ValueError("Graph must include at least one node")
+    for edge in patch.add_edges:
+        if edge.source not in nodes or edge.target not in nodes:
+            raise ValueError(f"Edge references unknown node(s): {edge.source} -> {edge.target}")
+        key = (edge.source, edge.target, edge.mode)
+        edges[key] = edges.get(key, 0) + 1
+        touched_edges.add(key)
+
+    # Only the fragments of touched nodes and edges are re-serialized.
+    node_json = dict(state.node_json)
+    for node_id in touched_nodes:
+        if node_id in nodes:
+            node_json[node_id] = _node_json(nodes[node_id])
+        else:
+            node_json.pop(node_id, None)
+    edge_json = dict(state.edge_json)
+    for key in touched_edges:
+        if key in edges:
+            edge_json[key] = _edge_json(key, edges[key])
+        else:
+            edge_json.pop(key, None)
+    node_order = _reordered(
+        state.node_order,
+        (node_id for node_id in touched_nodes if node_id in state.nodes and node_id not in nodes),
+        (node_id for node_id in touched_nodes if node_id in nodes and node_id not in state.nodes),
+    )
+    edge_order = _reordered(
+        state.edge_order,
+        (key for key in touched_edges if key in state.edges and key not in edges),
+        (key for key in touched_edges if key in edges and key not in state.edges),
+    )
+    # Replica and config edits leave the edge list, the bulk of the JSON, as it was.
+    edges_text = _join(edge_json, edge_order) if touched_edges else state.edges_text
+    fragments = (node_json, node_order, edge_json, edge_order, edges_text)
+
+    if not routing_changed:
+        if updated:
+            positions = np.fromiter(updated, dtype=np.int64, count=len(updated))
+            params = np.array(list(updated.values()), dtype=np.int64)
+            compiled = engine.with_node_config(compiled, positions, params[:, 1], params[:, 2])
+        return GraphState(nodes, edges, state.index, compiled, type_counts, replicated_count, *fragments)
+
+    type_codes = compiled.type_codes.copy()
+    replicas = compiled.replicas.copy()
+    shards = compiled.shards.copy()
+    hit_ratio = compiled.cache_hit_ratio.copy()
+    for position, (code, node_replicas, node_shards, node_hit_ratio) in updated.items():
+        type_codes[position] = code
+        replicas[position] = node_replicas
+        shards[position] = node_shards
+        hit_ratio[position] = node_hit_ratio
+
+    if keep_node.all():
+        node_ids = compiled.node_ids
+        index = dict(state.index)
+        remap = np.arange(compiled.node_count)
+    else:
+        node_ids = tuple(node_id for node_id, keep in zip(compiled.node_ids, keep_node) if keep)
+        index = {node_id: position for position, node_id in enumerate(node_ids)}
+        remap = np.cumsum(keep_node) - 1
+    for node_id, *_ in added:
+        index[node_id] = len(index)
+
+    src = [remap[compiled.src[keep_edge]]]
+    dst = [remap[compiled.dst[keep_edge]]]
+    sync = [compiled.sync[keep_edge]]
+    if patch.add_edges:
+        src.append(np.array([index[edge.source] for edge in patch.add_edges], dtype=np.int64))
+        dst.append(np.array([index[edge.target] for edge in patch.add_edges], dtype=np.int64))
+        sync.append(np.array([edge.mode == "sync" for edge in patch.add_edges], dtype=bool))
+
+    added_ids = tuple(node[0] for node in added)
+    compiled = engine.build_compiled_graph(
+        node_ids=node_ids + added_ids,
+        type_codes=np.concatenate(
+            [type_codes[keep_node], np.array([node[1] for node in added], dtype=np.int64)]
+        ),
+        replicas=np.concatenate([replicas[keep_node], np.array([node[2] for node in added], dtype=np.int64)]),
+        shards=np.concatenate([shards[keep_node], np.array([node[3] for node in added], dtype=np.int64)]),
+        cache_hit_ratio=np.concatenate(
+            [hit_ratio[keep_node], np.array([node[4] for node in added], dtype=float)]
+        ),
+        src=np.concatenate(src).astype(np.int64),
+        dst=np.concatenate(dst).astype(np.int64),
+        sync=np.concatenate(sync).astype(bool),
+    )
+    return GraphState(nodes, edges, index, compiled, type_counts, replicated_count, *fragments)
+
+
+@dataclass(frozen=True)
+class RunState:
+    challenge_slug: str
+    seed: int
+    user_id: str
+    graph: GraphState
+
+
+class RunStateCache:
+    """Bounded LRU of recently evaluated runs' graph states, keyed by run id."""
+
+    def __init__(self, max_entries: int = MAX_CACHED_STATES) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[int, RunState] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, run_id: int) -> RunState | None:
+        with self._lock:
+            state = self._entries.get(run_id)
+            if state is not None:
+                self._entries.move_to_end(run_id)
+                return state
+
+        run = db.get_run(run_id)
+        if run is None:
+            return None
+        state = RunState(run["challenge_slug"], run["seed"], run["user_id"], GraphState.from_graph(run["graph"]))
+        self.put(run_id, state)
+        return state
+
+    def put(self, run_id: int, state: RunState) -> None:
+        with self._lock:
+            self._entries[run_id] = state
+            self._entries.move_to_end(run_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+run_states = RunStateCache()
@@ -1,24 +1,91 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from typing import Any
 
+import numpy as np
+
 from app.schemas import Graph, Metrics, ScoreBreakdown
 
 
 def _safe_positive_int(raw: Any, default: int = 1) -> int:
     try:
         parsed = int(raw)
-    except (TypeError, ValueError):
+    except (TypeError, ValueError, OverflowError):
         return default
     return parsed if parsed > 0 else default
 
 
-def score_run(challenge: dict[str, Any], graph: Graph, metrics: Metrics) -> ScoreBreakdown:
+CRITICAL_NODE_TYPES = frozenset({"api", "db"})
+
+
+def is_replicated_critical(node_type: str, config: dict[str, Any]) -> bool:
+    return node_type in CRITICAL_NODE_TYPES and _safe_positive_int(config.get("replicas"), default=1) >= 2
+
+
+@dataclass(frozen=True)
+class GraphStructure:
+    """The graph facts structure scoring reads; incremental callers maintain these directly."""
+
+    node_types: frozenset[str]
+    replicated_critical: bool
+
+    @classmethod
+    def from_graph(cls, graph: Graph) -> GraphStructure:
+        return cls(
+            node_types=frozenset(node.type for node in graph.nodes),
+            replicated_critical=any(is_replicated_critical(node.type, node.config) for node in graph.nodes),
+        )
+
+
+@dataclass(frozen=True)
+class ScoringInputs:
+    """The parts of a challenge that scoring reads, parsed once."""
+
+    required_node_types: tuple[str, ...]
+    required_set: frozenset[str]
+    reliability_features: tuple[str, ...]
+    reliability_set: frozenset[str]
+    target_throughput: int
+    target_latency_p95_ms: int
+    budget_monthly_usd: float
+
+    @classmethod
+    def from_challenge(cls, challenge: dict[str, Any]) -> ScoringInputs:
+        required = tuple(challenge.get("required_node_types", []))
+        reliability = tuple(challenge.get("reliability_features", []))
+        return cls(
+            required_node_types=required,
+            required_set=frozenset(required),
+            reliability_features=reliability,
+            reliability_set=frozenset(reliability),
+            target_throughput=int(challenge.get("target_throughput", 2000)),
+            target_latency_p95_ms=int(challenge.get("target_latency_p95_ms", 80)),
+            budget_monthly_usd=float(challenge.get("budget_monthly_usd", 1500.0)),
+        )
+
+
+def _scoring_inputs(challenge: dict[str, Any] | ScoringInputs) -> ScoringInputs:
+    if isinstance(challenge, ScoringInputs):
+        return challenge
+    return ScoringInputs.from_challenge(challenge)
+
+
+def _graph_structure(graph: Graph | GraphStructure) -> GraphStructure:
+    if isinstance(graph, GraphStructure):
+        return graph
+    return GraphStructure.from_graph(graph)
+
+
+def _structure_scores(inputs: ScoringInputs, structure: GraphStructure) -> tuple[float, float, list[str]]:
+    """Requirements and reliability scores, which depend only on the graph shape."""
     explanations: list[str] = []
-    node_types = {node.type for node in graph.nodes}
+    node_types = structure.node_types
 
-    required_node_types = challenge.get("required_node_types", [])
-    missing_required = [node_type for node_type in required_node_types if node_type not in node_types]
+    required_node_types = inputs.required_node_types
+    missing_required = []
+    if not inputs.required_set <= node_types:
+        missing_required = [node_type for node_type in required_node_types if node_type not in node_types]
     requirements_coverage = 1.0
     if required_node_types:
         requirements_coverage = (len(required_node_types) - len(missing_required)) / len(required_node_types)
@@ -27,18 +94,17 @@ def score_run(challenge: dict[str, Any], graph: Graph, metrics: Metrics) -> Scor
     if missing_required:
         explanations.append(f"Missing core components: {', '.join(missing_required)}.")
 
-    reliability_features = challenge.get("reliability_features", [])
-    missing_reliability = [feature for feature in reliability_features if feature not in node_types]
+    reliability_features = inputs.reliability_features
+    missing_reliability = []
+    if not inputs.reliability_set <= node_types:
+        missing_reliability = [feature for feature in reliability_features if feature not in node_types]
     reliability_feature_ratio = 1.0
     if reliability_features:
         reliability_feature_ratio = (len(reliability_features) - len(missing_reliability)) / len(
             reliability_features
         )
 
-    replicated_critical = any(
-        node.type in {"api", "db"} and _safe_positive_int(node.config.get("replicas"), default=1) >= 2
-        for node in graph.nodes
-    )
+    replicated_critical = structure.replicated_critical
     replication_ratio = 1.0 if replicated_critical else 0.0
     reliability_ratio = min(1.0, 0.75 * reliability_feature_ratio + 0.25 * replication_ratio)
     reliability_score = round(25 * reliability_ratio, 2)
@@ -48,8 +114,59 @@ def score_run(challenge: dict[str, Any], graph: Graph, metrics: Metrics) -> Scor
     if not replicated_critical:
         explanations.append("No replicated API/DB components detected; this creates single points of failure.")
 
-    target_throughput = int(challenge.get("target_throughput", 2000))
-    target_latency = int(challenge.get("target_latency_p95_ms", 80))
+    return requirements_score, reliability_score, explanations
+
+
+MAX_EXPLAINED_CUT_SETS = 3
+
+
+def _availability_explanations(metrics: Metrics) -> list[str]:
+    """Name the failures that take the design down, from the simulated cut sets."""
+    explanations: list[str] = []
+    singles = [cut[0] for cut in metrics.cut_sets if len(cut) == 1]
+    pairs = [cut for cut in metrics.cut_sets if len(cut) > 1][:MAX_EXPLAINED_CUT_SETS]
+    if singles:
+        explanations.append(f"Single points of failure on the request path: {', '.join(singles)}.")
+    if pairs:
+        joined = "; ".join(" + ".join(cut) for cut in pairs)
+        explanations.append(f"Outage if these fail together: {joined}.")
+    if metrics.availability_ci_pct is not None and (singles or pairs):
+        low, high = metrics.availability_ci_pct
+        explanations.append(f"Simulated availability {metrics.availability_pct:.2f}% (95% CI {low:.3f}-{high:.3f}%).")
+    return explanations
+
+
+MAX_EXPLAINED_BOTTLENECKS = 3
+
+
+def _path_explanations(metrics: Metrics, latency_missed: bool) -> list[str]:
+    """Point at overloaded nodes, the critical path and sync cycles from the path analysis."""
+    analysis = metrics.analysis
+    if analysis is None:
+        return []
+    explanations: list[str] = []
+    overloaded = [load for load in analysis.bottlenecks if load.utilization > 1.0][:MAX_EXPLAINED_BOTTLENECKS]
+    for load in overloaded:
+        where = " on the critical path" if load.on_critical_path else ""
+        explanations.append(f"{load.node_id} at {load.utilization:.0%} capacity{where}.")
+    if latency_missed and analysis.critical_path:
+        explanations.append(
+            f"Critical path: {' -> '.join(analysis.critical_path)} ({analysis.critical_path_latency_ms:.0f}ms p95)."
+        )
+    if analysis.cycle_edges:
+        joined = ", ".join(f"{edge.source} -> {edge.target}" for edge in analysis.cycle_edges)
+        explanations.append(f"Sync cycle closed by {joined}; the closing edges are ignored for latency.")
+    return explanations
+
+
+def score_run(
+    challenge: dict[str, Any] | ScoringInputs, graph: Graph | GraphStructure, metrics: Metrics
+) -> ScoreBreakdown:
+    inputs = _scoring_inputs(challenge)
+    requirements_score, reliability_score, explanations = _structure_scores(inputs, _graph_structure(graph))
+
+    target_throughput = inputs.target_throughput
+    target_latency = inputs.target_latency_p95_ms
 
     throughput_ratio = min(metrics.throughput_rps / max(target_throughput, 1), 1.0)
     latency_ratio = min(target_latency / max(metrics.latency_p95_ms, 1), 1.0)
@@ -65,7 +182,7 @@ def score_run(challenge: dict[str, Any], graph: Graph, metrics: Metrics) -> Scor
             f"Latency target missed ({metrics.latency_p95_ms}ms > {target_latency}ms p95)."
         )
 
-    budget = float(challenge.get("budget_monthly_usd", 1500.0))
+    budget = inputs.budget_monthly_usd
     if metrics.monthly_cost_usd <= budget:
         cost_ratio = 1.0
     else:
@@ -77,6 +194,8 @@ def score_run(challenge: dict[str, Any], graph: Graph, metrics: Metrics) -> Scor
             f"Budget exceeded (${metrics.monthly_cost_usd:.2f} > ${budget:.2f} monthly)."
         )
 
+    explanations.extend(_path_explanations(metrics, metrics.latency_p95_ms > target_latency))
+    explanations.extend(_availability_explanations(metrics))
     if not explanations:
         explanations.append("Design meets baseline challenge requirements.")
 
@@ -91,3 +210,32 @@ def score_run(challenge: dict[str, Any], graph: Graph, metrics: Metrics) -> Scor
         explanations=explanations,
     )
 
+
+def score_batch(
+    challenge: dict[str, Any] | ScoringInputs,
+    graph: Graph | GraphStructure,
+    throughput_rps: np.ndarray,
+    latency_p95_ms: np.ndarray,
+    monthly_cost_usd: np.ndarray,
+) -> np.ndarray:
+    """Vectorized ``score_run(...).total`` for many metric samples of the same graph."""
+    inputs = _scoring_inputs(challenge)
+    requirements_score, reliability_score, _ = _structure_scores(inputs, _graph_structure(graph))
+
+    target_throughput = inputs.target_throughput
+    target_latency = inputs.target_latency_p95_ms
+
+    throughput_ratio = np.minimum(throughput_rps / max(target_throughput, 1), 1.0)
+    latency_ratio = np.minimum(target_latency / np.maximum(latency_p95_ms, 1), 1.0)
+    performance_ratio = np.minimum(1.0, 0.6 * throughput_ratio + 0.4 * latency_ratio)
+    performance_score = np.round(25 * performance_ratio, 2)
+
+    budget = inputs.budget_monthly_usd
+    cost_ratio = np.where(
+        monthly_cost_usd <= budget,
+        1.0,
+        np.maximum(0.0, budget / np.maximum(monthly_cost_usd, 1.0)),
+    )
+    cost_score = np.round(15 * cost_ratio, 2)
+
+    return np.round(requirements_score + reliability_score + performance_score + cost_score, 2)
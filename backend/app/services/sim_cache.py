@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from app import db
+from app.schemas import Metrics
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("SDG_SIM_CACHE_SIZE", "1024"))
+DEFAULT_TTL_SECONDS = float(os.getenv("SDG_SIM_CACHE_TTL_S", "3600"))
+DEFAULT_MAX_ROWS = int(os.getenv("SDG_SIM_CACHE_ROWS", "100000"))
+
+
+class SimulationCache:
+    """Two-tier memo for simulation results: a bounded in-process LRU in front of the ``sim_cache`` table."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_rows: int = DEFAULT_MAX_ROWS,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self._persisted = 0
+        self._entries: OrderedDict[str, tuple[float, Metrics]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "rows_pruned": 0,
+        }
+
+    def get(self, key: str) -> Metrics | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, metrics = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return metrics
+                del self._entries[key]
+                self._counters["expirations"] += 1
+
+        stored = db.get_cached_metrics(key)
+        if stored is None:
+            with self._lock:
+                self._counters["misses"] += 1
+            return None
+
+        metrics = Metrics(**stored)
+        with self._lock:
+            self._counters["disk_hits"] += 1
+            self._remember(key, metrics, now)
+        return metrics
+
+    def put(self, key: str, metrics: Metrics, persist: bool = True) -> None:
+        """Remember ``metrics``; ``persist=False`` keeps it in the in-process tier only."""
+        due = False
+        if persist:
+            db.put_cached_metrics(key, metrics.model_dump())
+        with self._lock:
+            self._remember(key, metrics, time.monotonic())
+            if persist:
+                # Trim the table every tenth of its cap, so it overshoots by at most that.
+                self._persisted += 1
+                due = self._persisted >= max(1, self.max_rows // 10)
+                if due:
+                    self._persisted = 0
+        if due:
+            self.prune()
+
+    def prune(self, keep_prefix: str | None = None) -> int:
+        """Trim the ``sim_cache`` table to ``max_rows``, first dropping keys without ``keep_prefix``."""
+        deleted = db.prune_sim_cache(self.max_rows, keep_prefix)
+        with self._lock:
+            self._counters["rows_pruned"] += deleted
+        return deleted
+
+    def _remember(self, key: str, metrics: Metrics, now: float) -> None:
+        self._entries[key] = (now + self.ttl_seconds, metrics)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def clear(self) -> None:
+        """Drop the in-process tier only; the SQLite tier is left intact."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {**self._counters, "size": len(self._entries), "max_entries": self.max_entries}
+
+
+simulation_cache = SimulationCache()
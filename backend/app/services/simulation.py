@@ -1,14 +1,19 @@
 from __future__ import annotations
 
-import hashlib
-import json
+import math
 import sys
-from collections import Counter
-from dataclasses import asdict, is_dataclass
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Callable, Sequence
 
-from app.schemas import Graph, Metrics
+import numpy as np
+
+from app.schemas import BurstEvent, Metrics, ScoreBreakdown, StepEvent, TrafficEvent
+from app.services.sim_cache import simulation_cache
+from app.services.single_flight import SingleFlight
+
+if TYPE_CHECKING:
+    from app.services.graph_ir import GraphIR
 
 _REPO_ROOT = Path(__file__).resolve().parents[3]
 _SIM_ENGINE_SRC = _REPO_ROOT / "sim-engine" / "src"
@@ -17,129 +22,240 @@ if _SIM_ENGINE_SRC.exists():
     if sim_path not in sys.path:
         sys.path.append(sim_path)
 
-try:
-    from runner import run_simulation as _run_engine_simulation  # type: ignore
-except Exception:  # pragma: no cover - fallback handles local-only use
-    _run_engine_simulation = None
+import runner as engine  # type: ignore  # noqa: E402
 
+DEFAULT_OFFERED_RPS = engine.DEFAULT_OFFERED_RPS
+# A load ramp's knee is the first step whose p95 is this many times the lightest step's.
+KNEE_LATENCY_FACTOR = 2.0
 
-def _safe_positive_int(raw: Any, default: int = 1) -> int:
-    try:
-        parsed = int(raw)
-    except (TypeError, ValueError):
-        return default
-    return parsed if parsed > 0 else default
+# Simulations in progress, keyed like the cache; results are in canonical naming.
+simulation_flights: SingleFlight[Metrics] = SingleFlight()
+# Scored evaluations in progress, keyed by exact graph, seed, scoring and persistence.
+scored_flights: SingleFlight[tuple[Metrics, ScoreBreakdown]] = SingleFlight()
 
 
-def _stable_graph_payload(graph: Graph) -> str:
-    nodes = sorted(
-        [{"id": node.id, "type": node.type, "config": node.config} for node in graph.nodes],
-        key=lambda item: item["id"],
-    )
-    edges = sorted(
-        [{"source": edge.source, "target": edge.target, "mode": edge.mode} for edge in graph.edges],
-        key=lambda item: (item["source"], item["target"], item["mode"]),
+def _seed_offset(digest: str) -> int:
+    return int(digest[:8], 16) % 10000
+
+
+def simulation_cache_key(digest: str, seed: int, offered_rps: float) -> str:
+    return f"{engine.ENGINE_VERSION}:{digest}:{seed}:{float(offered_rps):g}"
+
+
+def prune_simulation_cache() -> int:
+    """Drop stored results from other engine versions and trim the table to its row cap."""
+    return simulation_cache.prune(keep_prefix=f"{engine.ENGINE_VERSION}:")
+
+
+@dataclass(frozen=True)
+class SimulationRequest:
+    """Everything needed to simulate a graph, in picklable values."""
+
+    cache_key: str
+    compiled: engine.CompiledGraph
+    offered_rps: float
+    seed: int
+
+
+def prepare_simulation(
+    ir: GraphIR, seed: int, offered_rps: float = DEFAULT_OFFERED_RPS
+) -> SimulationRequest:
+    return SimulationRequest(
+        cache_key=simulation_cache_key(ir.digest, seed, offered_rps),
+        compiled=ir.compiled,
+        offered_rps=float(offered_rps),
+        seed=seed + _seed_offset(ir.digest),
     )
-    return json.dumps({"nodes": nodes, "edges": edges}, separators=(",", ":"), sort_keys=True)
-
-
-def _run_engine(seed: int) -> dict[str, float]:
-    if _run_engine_simulation is None:
-        return {
-            "throughput_rps": float(1000 + seed % 250),
-            "latency_p95_ms": float(45 + seed % 12),
-            "availability_pct": 99.0,
-        }
-
-    result = _run_engine_simulation(seed=seed)
-    if is_dataclass(result):
-        payload = asdict(result)
-    elif isinstance(result, dict):
-        payload = result
-    elif hasattr(result, "__dict__"):
-        payload = vars(result)
-    else:
-        payload = {}
 
+
+def simulate_metrics(compiled: engine.CompiledGraph, offered_rps: float, seed: int) -> dict[str, Any]:
+    """Run the engine and return ``Metrics`` fields; safe to call in a worker process."""
+    return _metric_fields(engine.simulate(compiled, offered_rps=offered_rps, seed=seed))
+
+
+def _metric_fields(result: engine.SimulationResult) -> dict[str, Any]:
     return {
-        "throughput_rps": float(payload.get("throughput_rps", 1200)),
-        "latency_p95_ms": float(payload.get("latency_p95_ms", 48)),
-        "availability_pct": float(payload.get("availability_pct", 99.2)),
+        "throughput_rps": result.throughput_rps,
+        "latency_p95_ms": result.latency_p95_ms,
+        "availability_pct": result.availability_pct,
+        "monthly_cost_usd": result.monthly_cost_usd,
+        "availability_ci_pct": result.availability_ci_pct,
+        "cut_sets": [list(cut) for cut in result.cut_sets],
+        "analysis": _analysis_fields(result),
     }
 
 
-def run_simulation_for_graph(graph: Graph, seed: int) -> Metrics:
-    stable_payload = _stable_graph_payload(graph)
-    graph_hash = int(hashlib.sha256(stable_payload.encode("utf-8")).hexdigest()[:8], 16)
-    combined_seed = seed + (graph_hash % 10000)
-    base = _run_engine(combined_seed)
-
-    node_counts = Counter(node.type for node in graph.nodes)
-    node_count = len(graph.nodes)
-    edge_count = len(graph.edges)
-
-    replicated_critical = 0
-    single_points = 0
-    for node in graph.nodes:
-        replicas = _safe_positive_int(node.config.get("replicas"), default=1)
-        if node.type in {"api", "db"} and replicas >= 2:
-            replicated_critical += 1
-        if node.type in {"api", "db"} and replicas == 1:
-            single_points += 1
-
-    throughput = int(
-        base["throughput_rps"]
-        + node_counts["api"] * 140
-        + node_counts["cache"] * 90
-        + node_counts["queue"] * 60
-        + node_counts["cdn"] * 75
-        - node_counts["db"] * 25
-        - node_counts["object_store"] * 20
-    )
-    throughput = max(200, throughput)
-
-    latency = int(
-        max(
-            12.0,
-            base["latency_p95_ms"]
-            + node_counts["db"] * 5
-            - node_counts["cache"] * 7
-            - node_counts["cdn"] * 8
-            + max(0, node_count - 6) * 2
-            + edge_count,
-        )
-    )
-
-    availability = (
-        base["availability_pct"]
-        + node_counts["lb"] * 0.12
-        + replicated_critical * 0.08
-        - single_points * 0.15
-    )
-    availability = min(99.99, max(95.0, availability))
-
-    base_costs = {
-        "lb": 60,
-        "api": 120,
-        "db": 250,
-        "cache": 90,
-        "queue": 80,
-        "cdn": 110,
-        "object_store": 70,
+def _analysis_fields(result: engine.SimulationResult) -> dict[str, Any]:
+    analysis = result.analysis
+    node_ids = result.node_ids
+    on_path = set(analysis.critical_path.tolist())
+    return {
+        "critical_path": [node_ids[node] for node in analysis.critical_path.tolist()],
+        "critical_path_latency_ms": round(analysis.critical_path_latency_ms, 2),
+        "bottlenecks": [
+            {
+                "node_id": node_ids[node],
+                "utilization": round(float(analysis.demand_utilization[node]), 4),
+                "headroom": round(1.0 - float(analysis.demand_utilization[node]), 4),
+                "on_critical_path": node in on_path,
+            }
+            for node in analysis.bottlenecks.tolist()
+        ],
+        "cycle_edges": [
+            {"source": node_ids[source], "target": node_ids[target], "mode": "sync"}
+            for source, target in analysis.cycle_edges.tolist()
+        ],
     }
-    monthly_cost = 0.0
-    for node in graph.nodes:
-        replicas = _safe_positive_int(node.config.get("replicas"), default=1)
-        shards = _safe_positive_int(node.config.get("shards"), default=1)
-        multiplier = replicas * (shards if node.type == "db" else 1)
-        monthly_cost += base_costs.get(node.type, 100) * multiplier
-
-    monthly_cost += edge_count * 8
-
-    return Metrics(
-        throughput_rps=throughput,
-        latency_p95_ms=latency,
-        availability_pct=round(availability, 2),
-        monthly_cost_usd=round(monthly_cost, 2),
+
+
+def _rename_nodes(metrics: Metrics, rename: Callable[[str], str]) -> Metrics:
+    """Copy of ``metrics`` with every node reference passed through ``rename``."""
+    fields = metrics.model_dump()
+    fields["cut_sets"] = [[rename(node_id) for node_id in cut] for cut in fields["cut_sets"]]
+    analysis = fields["analysis"]
+    if analysis is not None:
+        analysis["critical_path"] = [rename(node_id) for node_id in analysis["critical_path"]]
+        for load in analysis["bottlenecks"]:
+            load["node_id"] = rename(load["node_id"])
+        for edge in analysis["cycle_edges"]:
+            edge["source"] = rename(edge["source"])
+            edge["target"] = rename(edge["target"])
+    return Metrics(**fields)
+
+
+def cached_metrics(
+    cache_key: str, compiled: engine.CompiledGraph, form: engine.CanonicalForm
+) -> Metrics | None:
+    """Cached metrics for ``cache_key``, with node references named as in ``compiled``."""
+    cached = simulation_cache.get(cache_key)
+    if cached is None:
+        return None
+    return _from_canonical(cached, compiled, form)
+
+
+def _from_canonical(canonical: Metrics, compiled: engine.CompiledGraph, form: engine.CanonicalForm) -> Metrics:
+    node_ids = compiled.node_ids
+    order = form.order.tolist()
+    return _rename_nodes(canonical, lambda name: node_ids[order[int(name[1:])]])
+
+
+def remember_metrics(
+    cache_key: str,
+    compiled: engine.CompiledGraph,
+    form: engine.CanonicalForm,
+    metrics: Metrics,
+    persist: bool = True,
+) -> Metrics:
+    """Cache ``metrics`` in canonical form and return that form; ``persist=False`` keeps it out of the database."""
+    rank = {compiled.node_ids[node]: position for position, node in enumerate(form.order.tolist())}
+    canonical = _rename_nodes(metrics, lambda node_id: f"#{rank[node_id]}")
+    simulation_cache.put(cache_key, canonical, persist=persist)
+    return canonical
+
+
+def run_simulation_for_graph(
+    ir: GraphIR, seed: int, offered_rps: float = DEFAULT_OFFERED_RPS, persist: bool = True
+) -> Metrics:
+    return run_simulation_for_compiled(ir.compiled, ir.form, seed, offered_rps, persist)
+
+
+def run_simulation_for_compiled(
+    compiled: engine.CompiledGraph,
+    form: engine.CanonicalForm,
+    seed: int,
+    offered_rps: float = DEFAULT_OFFERED_RPS,
+    persist: bool = True,
+) -> Metrics:
+    """Simulate ``compiled`` through the simulation cache, addressed and seeded by its canonical ``form``."""
+    cache_key = simulation_cache_key(form.digest, seed, offered_rps)
+    cached = cached_metrics(cache_key, compiled, form)
+    if cached is not None:
+        return cached
+
+    computed: list[Metrics] = []
+
+    def simulate() -> Metrics:
+        metrics = Metrics(**simulate_metrics(compiled, float(offered_rps), seed + _seed_offset(form.digest)))
+        computed.append(metrics)
+        return remember_metrics(cache_key, compiled, form, metrics, persist=persist)
+
+    # Waiters may be isomorphic designs with different node ids, so the shared
+    # result is canonical and each waiter names it for its own graph.
+    canonical = simulation_flights.do((cache_key, persist), simulate)
+    return computed[0] if computed else _from_canonical(canonical, compiled, form)
+
+
+def run_simulation_batch_for_graph(
+    ir: GraphIR, seeds: np.ndarray, offered_rps: float = DEFAULT_OFFERED_RPS
+) -> engine.BatchSimulationResult:
+    """Simulate every seed in ``seeds`` at once; entry ``i`` matches ``run_simulation_for_graph(ir, seeds[i])``."""
+    combined_seeds = np.asarray(seeds, dtype=np.int64) + _seed_offset(ir.digest)
+    return engine.simulate_batch(ir.compiled, combined_seeds, offered_rps=offered_rps)
+
+
+def simulation_seed(ir: GraphIR, seed: int) -> int:
+    """The engine seed ``run_simulation_for_graph(ir, seed)`` simulates with."""
+    return seed + _seed_offset(ir.digest)
+
+
+def simulate_configs_for_graph(
+    ir: GraphIR,
+    seed: int,
+    replicas: np.ndarray,
+    shards: np.ndarray,
+    offered_rps: float = DEFAULT_OFFERED_RPS,
+) -> engine.ConfigBatchResult:
+    """Simulate ``ir``'s topology under many replica/shard configs, seeded as a single run of ``ir`` would be."""
+    return engine.simulate_configs(
+        ir.compiled, replicas, shards, offered_rps=offered_rps, seed=simulation_seed(ir, seed)
     )
 
+
+def run_load_ramp_for_graph(ir: GraphIR, seed: int, offered_rps: np.ndarray) -> engine.LoadRampResult:
+    """Simulate ``ir`` across a ramp of offered loads."""
+    return engine.simulate_load_ramp(ir.compiled, offered_rps, seed=simulation_seed(ir, seed))
+
+
+def find_knee(ramp: engine.LoadRampResult) -> float | None:
+    """Offered load where p95 first reaches ``KNEE_LATENCY_FACTOR`` times the lightest step's, or ``None``."""
+    bent = ramp.latency_p95_ms >= KNEE_LATENCY_FACTOR * ramp.latency_p95_ms[0]
+    steps = np.flatnonzero(bent | ramp.saturated)
+    return float(ramp.offered_rps[steps[0]]) if steps.size else None
+
+
+def traffic_series(
+    base_rps: float, duration_s: float, tick_s: float, events: Sequence[TrafficEvent]
+) -> np.ndarray:
+    """Offered load at each tick of a profile: ``base_rps`` plus every event, floored at zero."""
+    ticks = max(1, math.ceil(duration_s / tick_s - 1e-9))
+    time_s = np.arange(ticks) * tick_s
+    load = np.full(ticks, float(base_rps))
+    for event in events:
+        if isinstance(event, BurstEvent):
+            load += np.where((time_s >= event.start_s) & (time_s < event.start_s + event.duration_s), event.rps, 0.0)
+        elif isinstance(event, StepEvent):
+            load += np.where(time_s >= event.start_s, event.rps, 0.0)
+        else:
+            period = event.period_s or duration_s
+            load += event.amplitude_rps * np.sin(2 * np.pi * (time_s - event.phase_s) / period)
+    return np.maximum(load, 0.0)
+
+
+def busiest_nodes(ir: GraphIR, seed: int, offered_rps: float, limit: int) -> np.ndarray:
+    """Up to ``limit`` node indexes with the highest demand over capacity at ``offered_rps``, busiest first."""
+    demand = engine.demand_utilization(ir.compiled, offered_rps, simulation_seed(ir, seed))
+    return np.argsort(-demand, kind="stable")[:limit]
+
+
+def run_profile_for_graph(
+    ir: GraphIR,
+    seed: int,
+    offered_rps: np.ndarray,
+    tick_s: float,
+    points: int,
+    tracked: np.ndarray,
+) -> engine.ProfileResult:
+    """Step ``ir`` through a traffic profile, seeded as a single run of ``ir`` would be."""
+    return engine.simulate_profile(
+        ir.compiled, offered_rps, tick_s, seed=simulation_seed(ir, seed), points=points, tracked=tracked
+    )
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from typing import Callable, Generic, Hashable, TypeVar
+
+V = TypeVar("V")
+
+
+class SingleFlight(Generic[V]):
+    """Coalesces identical concurrent computations onto one in-flight call."""
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, Future[V]] = {}
+        self._lock = threading.Lock()
+        self._counters = {"computed": 0, "coalesced": 0}
+
+    def do(self, key: Hashable, compute: Callable[[], V]) -> V:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self._counters["computed"] += 1
+            else:
+                self._counters["coalesced"] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = compute()
+        except BaseException as exc:
+            self._finish(key)
+            future.set_exception(exc)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    def _finish(self, key: Hashable) -> None:
+        with self._lock:
+            del self._calls[key]
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {**self._counters, "in_flight": len(self._calls)}
@@ -0,0 +1,414 @@
+"""Capacity auto-tuning: search replica/shard assignments of a fixed topology against a challenge's targets."""
+
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from app.schemas import Graph, Metrics
+from app.services.graph_ir import GraphIR, compile_graph
+from app.services.scoring import ScoringInputs
+from app.services.simulation import engine, simulate_configs_for_graph, simulate_metrics, simulation_seed
+
+# Upper bound on ``candidates x nodes`` cells simulated per search round.
+BATCH_CELL_LIMIT = int(os.getenv("SDG_TUNER_BATCH_CELLS", "2000000"))
+# Cells simulated between deadline checks within a round.
+DEADLINE_CHECK_CELLS = 250_000
+# Share of the time budget kept for re-simulating reported designs exactly.
+VERIFY_BUDGET_SHARE = 0.25
+# Cheapest search hits re-simulated exactly before one is reported as the best design.
+VERIFIED_CANDIDATES = 16
+PARETO_CHUNK = 256
+COST_EPSILON = 0.005
+
+
+@dataclass(frozen=True)
+class TuningTargets:
+    throughput_rps: int
+    latency_p95_ms: int
+    budget_monthly_usd: float
+    min_availability_pct: float | None = None
+
+    @classmethod
+    def from_scoring(cls, scoring: ScoringInputs, min_availability_pct: float | None = None) -> TuningTargets:
+        return cls(
+            throughput_rps=scoring.target_throughput,
+            latency_p95_ms=scoring.target_latency_p95_ms,
+            budget_monthly_usd=scoring.budget_monthly_usd,
+            min_availability_pct=min_availability_pct,
+        )
+
+    def met(self, throughput: Any, latency: Any, availability: Any, cost: Any) -> Any:
+        """Whether metrics meet every target; works elementwise on arrays."""
+        met = (
+            (np.asarray(throughput) >= self.throughput_rps)
+            & (np.asarray(latency) <= self.latency_p95_ms)
+            & (np.asarray(cost) <= self.budget_monthly_usd + COST_EPSILON)
+        )
+        if self.min_availability_pct is not None:
+            met &= np.asarray(availability) >= self.min_availability_pct
+        return met
+
+    def shortfall(self, result: engine.ConfigBatchResult) -> np.ndarray:
+        """Relative distance of each config from meeting the performance targets (0 when met)."""
+        gap = np.maximum(0.0, 1.0 - result.throughput_rps / max(self.throughput_rps, 1))
+        gap += np.maximum(0.0, result.latency_p95_ms / max(self.latency_p95_ms, 1) - 1.0)
+        if self.min_availability_pct is not None:
+            headroom = max(100.0 - self.min_availability_pct, 0.01)
+            gap += np.maximum(0.0, (self.min_availability_pct - result.availability_pct) / headroom)
+        return gap
+
+
+@dataclass(frozen=True)
+class TunedDesign:
+    """One replica/shard assignment with metrics from an exact single run of the resulting graph."""
+
+    node_ids: tuple[str, ...]
+    replicas: np.ndarray
+    shards: np.ndarray
+    is_db: np.ndarray
+    graph: Graph
+    metrics: Metrics
+    meets_targets: bool
+
+
+@dataclass
+class TuningResult:
+    best: TunedDesign | None
+    frontier: list[TunedDesign]
+    evaluated: int
+    pruned: int
+    complete: bool
+
+
+def _pareto_mask(points: np.ndarray) -> np.ndarray:
+    """Rows of ``points`` (every column minimized) that no other row dominates; rows must be unique."""
+    keep = np.ones(len(points), dtype=bool)
+    for start in range(0, len(points), PARETO_CHUNK):
+        block = points[start : start + PARETO_CHUNK]
+        no_worse = (points[None, :, :] <= block[:, None, :]).all(axis=2)
+        better = (points[None, :, :] < block[:, None, :]).any(axis=2)
+        keep[start : start + len(block)] = ~(no_worse & better).any(axis=1)
+    return keep
+
+
+def apply_sizing(graph: Graph, replicas: np.ndarray, shards: np.ndarray, is_db: np.ndarray) -> Graph:
+    """``graph`` with each node's ``replicas`` (and ``shards`` for databases) replaced, in node order."""
+    nodes = []
+    for node, node_replicas, node_shards, db_node in zip(graph.nodes, replicas.tolist(), shards.tolist(), is_db):
+        config = {**node.config, "replicas": node_replicas}
+        if db_node:
+            config["shards"] = node_shards
+        nodes.append(node.model_copy(update={"config": config}))
+    return Graph(nodes=nodes, edges=graph.edges)
+
+
+class _Search:
+    """Best-first beam search with cost-bound pruning over one topology's sizing space."""
+
+    def __init__(
+        self, ir: GraphIR, targets: TuningTargets, seed: int, max_replicas: int, max_shards: int
+    ) -> None:
+        compiled = ir.compiled
+        self.ir = ir
+        self.targets = targets
+        self.seed = seed
+        self.max_replicas = max_replicas
+        self.max_shards = max_shards
+        self.is_db = compiled.type_codes == engine.TYPE_CODES["db"]
+        self.unit_cost = engine.REPLICA_MONTHLY_COST_USD[compiled.type_codes]
+        self.fixed_cost = compiled.edge_count * engine.EDGE_MONTHLY_COST_USD
+
+        # Nodes that carry no load and sit off the request path cannot move any
+        # metric except cost, so they stay at one replica.
+        tunable = np.flatnonzero((compiled.visits > 0) | compiled.on_request_path)
+        shardable = tunable[self.is_db[tunable]]
+        self.move_node = np.concatenate([tunable, shardable])
+        self.move_is_shard = np.concatenate([np.zeros(tunable.size, dtype=bool), np.ones(shardable.size, dtype=bool)])
+        node_count = max(compiled.node_count, 1)
+        self.beam_width = max(1, BATCH_CELL_LIMIT // (node_count * max(self.move_node.size, 1)))
+        self.max_children = max(1, BATCH_CELL_LIMIT // node_count)
+        self.chunk_rows = max(1, DEADLINE_CHECK_CELLS // node_count)
+
+        self.seen: set[bytes] = set()
+        self.evaluated = 0
+        self.pruned = 0
+        self.best_cost = float("inf")
+        self.pool_replicas = np.empty((0, compiled.node_count), dtype=np.int64)
+        self.pool_shards = np.empty((0, compiled.node_count), dtype=np.int64)
+        self.pool_order = np.empty((0, 2))
+        self.frontier_points = np.empty((0, 3))
+        self.frontier_replicas = np.empty((0, compiled.node_count), dtype=np.int64)
+        self.frontier_shards = np.empty((0, compiled.node_count), dtype=np.int64)
+        self.frontier_expanded = np.empty(0, dtype=bool)
+
+    def cost(self, replicas: np.ndarray, shards: np.ndarray) -> np.ndarray:
+        servers = engine.server_counts(self.ir.compiled.type_codes, replicas, shards)
+        return (self.unit_cost * servers).sum(axis=1) + self.fixed_cost
+
+    def initial_config(self) -> tuple[np.ndarray, np.ndarray] | None:
+        """Cheapest sizing that sustains the target throughput, or ``None`` if the limits cannot."""
+        needed = engine.min_servers_for_throughput(
+            self.ir.compiled, self.targets.throughput_rps, simulation_seed(self.ir, self.seed)
+        )
+        replicas = np.where(self.is_db, np.minimum(needed, self.max_replicas), needed)
+        shards = np.where(self.is_db, -(-needed // replicas), 1)
+        if (replicas > self.max_replicas).any() or (shards > self.max_shards).any():
+            return None
+        return replicas[None, :], shards[None, :]
+
+    def latency_reachable(self) -> bool:
+        """Latency only falls as servers are added, so the largest sizing bounds it from below."""
+        node_count = self.ir.compiled.node_count
+        replicas = np.full((1, node_count), self.max_replicas, dtype=np.int64)
+        shards = np.where(self.is_db, self.max_shards, 1)[None, :]
+        result = self.simulate(replicas, shards, remember=False)
+        return bool(result.latency_p95_ms[0] <= self.targets.latency_p95_ms)
+
+    def simulate(
+        self, replicas: np.ndarray, shards: np.ndarray, remember: bool = True
+    ) -> engine.ConfigBatchResult:
+        result = simulate_configs_for_graph(
+            self.ir, self.seed, replicas, shards, offered_rps=self.targets.throughput_rps
+        )
+        if remember:
+            self.evaluated += len(replicas)
+            self.record(replicas, shards, result)
+        return result
+
+    def simulate_until(
+        self, replicas: np.ndarray, shards: np.ndarray, deadline: float
+    ) -> tuple[np.ndarray, np.ndarray, engine.ConfigBatchResult]:
+        """``simulate`` in chunks, stopping at ``deadline``; returns the rows it got through."""
+        results = []
+        done = 0
+        while done < len(replicas) and (done == 0 or time.perf_counter() < deadline):
+            end = done + self.chunk_rows
+            results.append(self.simulate(replicas[done:end], shards[done:end]))
+            done = min(end, len(replicas))
+        result = engine.ConfigBatchResult(
+            *(np.concatenate([getattr(part, name) for part in results]) for name in _RESULT_FIELDS)
+        )
+        return replicas[:done], shards[:done], result
+
+    def expand(
+        self, replicas: np.ndarray, shards: np.ndarray, ceiling: float
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Up to ``max_children`` unseen one-step children whose cost stays within ``ceiling``."""
+        nodes = self.move_node
+        is_shard = self.move_is_shard
+        parent_replicas = replicas[:, nodes]
+        parent_shards = shards[:, nodes]
+        allowed = np.where(is_shard, parent_shards < self.max_shards, parent_replicas < self.max_replicas)
+        delta = self.unit_cost[nodes] * np.where(
+            is_shard, parent_replicas, np.where(self.is_db[nodes], parent_shards, 1)
+        )
+        child_cost = self.cost(replicas, shards)[:, None] + delta
+        within = allowed & (child_cost <= ceiling + COST_EPSILON)
+        self.pruned += int(allowed.sum() - within.sum())
+
+        parent, move = np.nonzero(within)
+        order = np.lexsort((child_cost[parent, move], parent))
+        parent, move = parent[order], move[order]
+
+        # Children are materialized a cap's worth at a time, so a wide graph
+        # never builds its full ``rows x moves x nodes`` child matrix.
+        kept_replicas: list[np.ndarray] = []
+        kept_shards: list[np.ndarray] = []
+        kept = 0
+        for start in range(0, parent.size, self.max_children):
+            block_parent = parent[start : start + self.max_children]
+            block_move = move[start : start + self.max_children]
+            child_replicas = replicas[block_parent]
+            child_shards = shards[block_parent]
+            rows = np.arange(block_parent.size)
+            shard_move = is_shard[block_move]
+            child_replicas[rows[~shard_move], nodes[block_move[~shard_move]]] += 1
+            child_shards[rows[shard_move], nodes[block_move[shard_move]]] += 1
+
+            fresh = []
+            for position, key in enumerate(np.concatenate([child_replicas, child_shards], axis=1)):
+                if kept + len(fresh) == self.max_children:
+                    break
+                key_bytes = key.tobytes()
+                if key_bytes not in self.seen:
+                    self.seen.add(key_bytes)
+                    fresh.append(position)
+            kept_replicas.append(child_replicas[fresh])
+            kept_shards.append(child_shards[fresh])
+            kept += len(fresh)
+            if kept == self.max_children:
+                break
+        if not kept_replicas:
+            return replicas[:0], shards[:0]
+        return np.concatenate(kept_replicas), np.concatenate(kept_shards)
+
+    def record(self, replicas: np.ndarray, shards: np.ndarray, result: engine.ConfigBatchResult) -> None:
+        targets = self.targets
+        cost = result.monthly_cost_usd
+        met = targets.met(result.throughput_rps, result.latency_p95_ms, result.availability_pct, cost)
+        if met.any():
+            self.best_cost = min(self.best_cost, float(cost[met].min()))
+            order = np.concatenate([self.pool_order, np.column_stack([cost[met], result.latency_p95_ms[met]])])
+            pool_replicas = np.concatenate([self.pool_replicas, replicas[met]])
+            pool_shards = np.concatenate([self.pool_shards, shards[met]])
+            keep = np.lexsort((order[:, 1], order[:, 0]))[:VERIFIED_CANDIDATES]
+            self.pool_order, self.pool_replicas, self.pool_shards = order[keep], pool_replicas[keep], pool_shards[keep]
+
+        # The frontier trades cost against latency and availability among
+        # designs that carry the target load within budget.
+        candidate = (result.throughput_rps >= targets.throughput_rps) & (cost <= targets.budget_monthly_usd + COST_EPSILON)
+        if not candidate.any():
+            return
+        points = np.concatenate(
+            [
+                self.frontier_points,
+                np.column_stack([cost[candidate], result.latency_p95_ms[candidate], -result.availability_pct[candidate]]),
+            ]
+        )
+        all_replicas = np.concatenate([self.frontier_replicas, replicas[candidate]])
+        all_shards = np.concatenate([self.frontier_shards, shards[candidate]])
+        expanded = np.concatenate([self.frontier_expanded, np.zeros(int(candidate.sum()), dtype=bool)])
+        # Identical metric triples are interchangeable; keep the earliest (already expanded ones first).
+        _, unique = np.unique(points, axis=0, return_index=True)
+        unique = np.sort(unique)
+        keep = unique[_pareto_mask(points[unique])]
+        self.frontier_points = points[keep]
+        self.frontier_replicas = all_replicas[keep]
+        self.frontier_shards = all_shards[keep]
+        self.frontier_expanded = expanded[keep]
+
+    def next_beam(
+        self, replicas: np.ndarray, shards: np.ndarray, result: engine.ConfigBatchResult
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Infeasible children closest to the targets (cheapest first on ties); feasible ones need no growth."""
+        targets = self.targets
+        open_rows = ~targets.met(
+            result.throughput_rps, result.latency_p95_ms, result.availability_pct, result.monthly_cost_usd
+        )
+        candidates = np.flatnonzero(open_rows)
+        order = np.lexsort((result.monthly_cost_usd[candidates], targets.shortfall(result)[candidates]))
+        chosen = candidates[order[: self.beam_width]]
+        return replicas[chosen], shards[chosen]
+
+    def next_frontier_batch(self) -> tuple[np.ndarray, np.ndarray]:
+        pending = np.flatnonzero(~self.frontier_expanded)
+        chosen = pending[np.argsort(self.frontier_points[pending, 0], kind="stable")[: self.beam_width]]
+        self.frontier_expanded[chosen] = True
+        return self.frontier_replicas[chosen], self.frontier_shards[chosen]
+
+
+_RESULT_FIELDS = ("throughput_rps", "latency_p95_ms", "availability_pct", "monthly_cost_usd")
+
+
+def _design(
+    graph: Graph, search: _Search, targets: TuningTargets, seed: int, replicas: np.ndarray, shards: np.ndarray
+) -> TunedDesign:
+    # The simulation seed depends on the graph's content hash, so search-time
+    # metrics (seeded as the submitted graph) are re-checked on the tuned graph.
+    # This bypasses the simulation cache: most frontier designs are never submitted.
+    tuned = apply_sizing(graph, replicas, shards, search.is_db)
+    tuned_ir = compile_graph(tuned)
+    metrics = Metrics(
+        **simulate_metrics(tuned_ir.compiled, float(targets.throughput_rps), simulation_seed(tuned_ir, seed))
+    )
+    return TunedDesign(
+        node_ids=search.ir.compiled.node_ids,
+        replicas=replicas,
+        shards=shards,
+        is_db=search.is_db,
+        graph=tuned,
+        metrics=metrics,
+        meets_targets=bool(
+            targets.met(metrics.throughput_rps, metrics.latency_p95_ms, metrics.availability_pct, metrics.monthly_cost_usd)
+        ),
+    )
+
+
+def optimize(
+    ir: GraphIR,
+    graph: Graph,
+    targets: TuningTargets,
+    seed: int = 42,
+    max_replicas: int = 16,
+    max_shards: int = 8,
+    time_budget_s: float = 1.0,
+    frontier_limit: int = 50,
+) -> TuningResult:
+    """Cheapest sizing of ``graph`` that meets ``targets``, plus the cost/latency/availability frontier."""
+    started = time.perf_counter()
+    search_deadline = started + time_budget_s * (1.0 - VERIFY_BUDGET_SHARE)
+    deadline = started + time_budget_s
+    search = _Search(ir, targets, seed, max_replicas, max_shards)
+    start = search.initial_config()
+    if start is None:
+        return TuningResult(best=None, frontier=[], evaluated=0, pruned=0, complete=True)
+
+    replicas, shards = start
+    search.seen.add(np.concatenate([replicas[0], shards[0]]).tobytes())
+    result = search.simulate(replicas, shards)
+    beam = search.next_beam(replicas, shards, result) if search.latency_reachable() else None
+    complete = False
+    while time.perf_counter() < search_deadline:
+        if beam is not None and len(beam[0]):
+            ceiling = min(targets.budget_monthly_usd, search.best_cost - 0.01)
+            replicas, shards = search.expand(*beam, ceiling)
+            if not len(replicas):
+                beam = None
+                continue
+            beam = search.next_beam(*search.simulate_until(replicas, shards, search_deadline))
+            continue
+
+        parents = search.next_frontier_batch()
+        if not len(parents[0]):
+            complete = True
+            break
+        replicas, shards = search.expand(*parents, targets.budget_monthly_usd)
+        if len(replicas):
+            search.simulate_until(replicas, shards, search_deadline)
+
+    verified = []
+    for attempt, (replicas, shards) in enumerate(zip(search.pool_replicas, search.pool_shards)):
+        # The cheapest hit is always checked, so a found design is reported; later ones need time left.
+        if attempt and time.perf_counter() >= deadline:
+            complete = False
+            break
+        design = _design(graph, search, targets, seed, replicas, shards)
+        if design.meets_targets:
+            verified.append(design)
+            break
+
+    frontier_rows = np.argsort(search.frontier_points[:, 0], kind="stable")
+    if frontier_rows.size > frontier_limit:
+        frontier_rows = frontier_rows[np.linspace(0, frontier_rows.size - 1, frontier_limit).round().astype(int)]
+    frontier = []
+    for row in frontier_rows:
+        if time.perf_counter() >= deadline:
+            complete = False
+            break
+        frontier.append(
+            _design(graph, search, targets, seed, search.frontier_replicas[row], search.frontier_shards[row])
+        )
+    if frontier:
+        points = np.array(
+            [[d.metrics.monthly_cost_usd, d.metrics.latency_p95_ms, -d.metrics.availability_pct] for d in frontier]
+        )
+        _, unique = np.unique(points, axis=0, return_index=True)
+        unique = np.sort(unique)
+        frontier = [frontier[row] for row in unique[_pareto_mask(points[unique])]]
+
+    # Jitter differs per tuned graph, so a frontier design can meet the targets
+    # exactly where the search's estimate said it would not.
+    verified.extend(design for design in frontier if design.meets_targets)
+    best = min(
+        verified,
+        key=lambda design: (design.metrics.monthly_cost_usd, design.metrics.latency_p95_ms),
+        default=None,
+    )
+    return TuningResult(
+        best=best, frontier=frontier, evaluated=search.evaluated, pruned=search.pruned, complete=complete
+    )
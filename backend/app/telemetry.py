@@ -0,0 +1,246 @@
+"""Low-overhead stage timers, histograms and counters for the request hot path."""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import os
+import threading
+from collections import deque
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Callable, Iterable, TypeVar
+
+ENABLED = os.getenv("SDG_TELEMETRY", "1") != "0"
+METRIC_PREFIX = "sdg"
+DURATION_BUCKETS_SECONDS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUANTILES = (0.5, 0.95, 0.99)
+FOLD_BATCH = 256
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; quantiles interpolate within a bucket."""
+
+    __slots__ = ("bounds", "counts", "total", "count", "_pending", "_lock")
+
+    def __init__(self, bounds: tuple[float, ...] = DURATION_BUCKETS_SECONDS) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._pending: deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        self._pending.append(seconds)
+        if len(self._pending) >= FOLD_BATCH:
+            self._fold()
+
+    def _fold(self) -> None:
+        with self._lock:
+            pending = self._pending
+            while pending:
+                seconds = pending.popleft()
+                self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+                self.total += seconds
+                self.count += 1
+
+    def snapshot(self) -> tuple[list[int], float, int]:
+        self._fold()
+        with self._lock:
+            return list(self.counts), self.total, self.count
+
+    def quantile(self, q: float) -> float:
+        counts, _, count = self.snapshot()
+        if count == 0:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for position, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.bounds[position - 1] if position > 0 else 0.0
+                upper = self.bounds[position] if position < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.bounds[-1]
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._histograms: dict[str, Histogram] = {}
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram())
+        return histogram
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def histograms(self) -> dict[str, Histogram]:
+        with self._lock:
+            return dict(self._histograms)
+
+    def counters(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+registry = Registry()
+
+
+class RequestTimings:
+    """Stages timed during one request, in completion order."""
+
+    __slots__ = ("entries", "depth")
+
+    def __init__(self) -> None:
+        self.entries: list[tuple[str, float, bool]] = []
+        self.depth = 0
+
+    def server_timing(self, total: float) -> str:
+        # Top-level stages partition the endpoint; whatever is left of the
+        # request went to the framework (body parsing, validation, serialization).
+        top_level = sum(elapsed for _, elapsed, outermost in self.entries if outermost)
+        parts = [f"{name};dur={elapsed * 1000:.3f}" for name, elapsed, _ in self.entries]
+        parts.append(f"framework;dur={max(0.0, total - top_level) * 1000:.3f}")
+        parts.append(f"total;dur={total * 1000:.3f}")
+        return ", ".join(parts)
+
+
+_request_timings: ContextVar[RequestTimings | None] = ContextVar("sdg_request_timings", default=None)
+
+
+def _record(name: str, elapsed: float, timings: RequestTimings | None) -> None:
+    registry.histogram(name).observe(elapsed)
+    if timings is not None:
+        timings.depth -= 1
+        timings.entries.append((name, elapsed, timings.depth == 0))
+
+
+class _Stage:
+    __slots__ = ("name", "started", "timings")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.timings = timings = _request_timings.get()
+        if timings is not None:
+            timings.depth += 1
+        self.started = perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        _record(self.name, perf_counter() - self.started, self.timings)
+
+
+class _NoopStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NOOP_STAGE = _NoopStage()
+
+
+def stage(name: str) -> _Stage | _NoopStage:
+    return _Stage(name) if ENABLED else _NOOP_STAGE
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator form of ``stage`` for whole functions."""
+
+    def decorate(fn: F) -> F:
+        if not ENABLED:
+            return fn
+
+        # Inlined rather than ``with _Stage(name)``: decorated functions are
+        # the hottest timers, and this skips the context-manager protocol.
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            timings = _request_timings.get()
+            if timings is not None:
+                timings.depth += 1
+            started = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record(name, perf_counter() - started, timings)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def increment(name: str, amount: int = 1) -> None:
+    if ENABLED and amount:
+        registry.increment(name, amount)
+
+
+def begin_request() -> tuple[RequestTimings, Any]:
+    timings = RequestTimings()
+    return timings, _request_timings.set(timings)
+
+
+def end_request(token: Any) -> None:
+    _request_timings.reset(token)
+
+
+def _labels(**labels: str) -> str:
+    return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+
+def render(gauges: Iterable[tuple[str, str, float]] = ()) -> str:
+    """Prometheus text exposition of every histogram and counter, plus caller-supplied gauges."""
+    lines: list[str] = []
+    histograms = registry.histograms()
+    if histograms:
+        name = f"{METRIC_PREFIX}_stage_duration_seconds"
+        lines.append(f"# HELP {name} Time spent in each instrumented stage.")
+        lines.append(f"# TYPE {name} histogram")
+        for stage_name, histogram in sorted(histograms.items()):
+            counts, total, count = histogram.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.bounds, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{{{_labels(stage=stage_name, le=f'{bound:g}')}}} {cumulative}")
+            lines.append(f"{name}_bucket{{{_labels(stage=stage_name, le='+Inf')}}} {count}")
+            lines.append(f"{name}_sum{{{_labels(stage=stage_name)}}} {total:.9f}")
+            lines.append(f"{name}_count{{{_labels(stage=stage_name)}}} {count}")
+
+        name = f"{METRIC_PREFIX}_stage_duration_quantile_seconds"
+        lines.append(f"# HELP {name} Estimated p50/p95/p99 stage duration from the histogram buckets.")
+        lines.append(f"# TYPE {name} gauge")
+        for stage_name, histogram in sorted(histograms.items()):
+            for q in QUANTILES:
+                value = histogram.quantile(q)
+                lines.append(f"{name}{{{_labels(stage=stage_name, quantile=f'{q:g}')}}} {value:.9f}")
+
+    for counter_name, value in sorted(registry.counters().items()):
+        name = f"{METRIC_PREFIX}_{counter_name}"
+        lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name} {value}")
+
+    for gauge_name, metric_type, value in gauges:
+        name = f"{METRIC_PREFIX}_{gauge_name}"
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.append(f"{name} {value:g}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1 @@
+"""Stage-by-stage benchmarks for the evaluate pipeline, with JSON baselines and regression gates."""
@@ -0,0 +1,60 @@
+"""Command-line entry point: ``python -m benchmarks`` from ``backend/``."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+
+def _csv(cast):
+    return lambda raw: [cast(item) for item in raw.split(",") if item]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=_csv(int), default=[10, 1000, 10000, 50000])
+    parser.add_argument("--mixes", type=_csv(str), default=["web", "edge", "storage"])
+    parser.add_argument("--densities", type=_csv(float), default=[1.5])
+    parser.add_argument("--stages", type=_csv(str), default=None, help="only time these stages")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="write results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed median growth, as a fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="ignore regressions smaller than this")
+    args = parser.parse_args(argv)
+
+    scratch = tempfile.TemporaryDirectory()
+    os.environ.setdefault("SDG_DB_PATH", str(Path(scratch.name) / "benchmark.db"))
+    from benchmarks.harness import Case, run_suite
+    from benchmarks.regression import compare
+
+    cases = [Case(size, mix, density) for mix in args.mixes for density in args.densities for size in args.sizes]
+    report = run_suite(cases, repeats=args.repeats, warmup=args.warmup, stages=args.stages)
+
+    for case_key, timings in report["results"].items():
+        print(case_key)
+        for stage, timing in timings.items():
+            print(f"  {stage:<26} median {timing['median_ms']:>10.3f} ms   min {timing['min_ms']:>10.3f} ms")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(baseline, report, threshold=args.threshold, min_delta_ms=args.min_delta_ms)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Synthetic design graphs for benchmarking."""
+
+from __future__ import annotations
+
+import random
+from typing import Any
+
+# Relative weights of each node type, listed in request-flow order; edges
+# only point from earlier to later layers.
+TYPE_MIXES: dict[str, dict[str, int]] = {
+    "web": {"lb": 1, "api": 4, "cache": 2, "queue": 1, "db": 2},
+    "edge": {"cdn": 2, "lb": 1, "api": 3, "cache": 1, "object_store": 3},
+    "storage": {"lb": 1, "api": 2, "cache": 1, "queue": 2, "db": 4, "object_store": 2},
+}
+
+
+def synthetic_graph(
+    node_count: int,
+    mix: str = "web",
+    edge_density: float = 1.5,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """A layered graph with ``node_count`` nodes and about ``edge_density * node_count`` edges."""
+    rng = random.Random(seed)
+    weights = TYPE_MIXES[mix]
+    total_weight = sum(weights.values())
+    layers: list[list[str]] = []
+    nodes: list[dict[str, Any]] = []
+    for node_type, weight in weights.items():
+        count = max(1, round(node_count * weight / total_weight))
+        layer = []
+        for _ in range(count):
+            if len(nodes) == node_count:
+                break
+            node_id = f"{node_type}-{len(nodes)}"
+            config: dict[str, Any] = {"replicas": rng.randint(1, 4)}
+            if node_type == "db":
+                config["shards"] = rng.randint(1, 4)
+            if node_type == "cache":
+                config["hit_ratio"] = round(rng.uniform(0.5, 0.95), 2)
+            nodes.append({"id": node_id, "type": node_type, "config": config})
+            layer.append(node_id)
+        if layer:
+            layers.append(layer)
+
+    edges: list[dict[str, Any]] = []
+    seen: set[tuple[str, str]] = set()
+
+    def connect(source: str, target: str) -> None:
+        if (source, target) not in seen:
+            seen.add((source, target))
+            mode = "async" if target.startswith("queue") or rng.random() < 0.1 else "sync"
+            edges.append({"source": source, "target": target, "mode": mode})
+
+    for depth in range(1, len(layers)):
+        for target in layers[depth]:
+            connect(rng.choice(layers[depth - 1]), target)
+
+    target_edges = int(edge_density * len(nodes))
+    attempts = 0
+    while len(edges) < target_edges and len(layers) > 1 and attempts < target_edges * 4:
+        attempts += 1
+        depth = rng.randrange(len(layers) - 1)
+        connect(rng.choice(layers[depth]), rng.choice(layers[rng.randrange(depth + 1, len(layers))]))
+
+    return {"nodes": nodes, "edges": edges}
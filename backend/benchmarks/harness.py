@@ -0,0 +1,174 @@
+"""Times each stage of the evaluate pipeline on synthetic graphs."""
+
+from __future__ import annotations
+
+import itertools
+import platform
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app import db, graph_codec
+from app.api import runs as runs_api
+from app.main import app
+from app.schemas import Graph
+from app.services.catalog import challenge_catalog
+from app.services.graph_ir import compile_graph
+from app.services.scoring import score_run
+from app.services.simulation import engine, run_simulation_for_graph, simulate_metrics, simulation_cache_key
+from benchmarks.graphs import synthetic_graph
+
+BENCHMARK_CHALLENGE = "url-shortener"
+BENCHMARK_USER = "benchmark"
+RUN_PAGE_SIZE = 20
+BURST_WRITERS = 16
+BURST_RUNS = 256
+
+
+@dataclass(frozen=True)
+class Case:
+    size: int
+    mix: str
+    edge_density: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.mix}/n={self.size}/d={self.edge_density:g}"
+
+
+def _time(fn: Callable[[], Any], repeats: int, warmup: int) -> dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return {
+        "median_ms": round(statistics.median(samples), 4),
+        "min_ms": round(min(samples), 4),
+        "repeats": repeats,
+    }
+
+
+def _stages(case: Case, client: TestClient) -> dict[str, Callable[[], Any]]:
+    """Zero-argument callables for each stage of one case."""
+    raw_graph = synthetic_graph(case.size, case.mix, case.edge_density)
+    graph = Graph.model_validate(raw_graph)
+    ir = compile_graph(graph)
+    challenge = challenge_catalog.get(BENCHMARK_CHALLENGE)
+    offered_rps = challenge.scoring.target_throughput
+    seeds = itertools.count(int(time.time() * 1000))
+    metrics = run_simulation_for_graph(ir, next(seeds), offered_rps)
+    score = score_run(challenge.scoring, ir.structure, metrics)
+    # A full page of this case's runs, newest first, for the listing stages.
+    for seed in range(RUN_PAGE_SIZE):
+        run_id, _ = db.record_run(
+            BENCHMARK_CHALLENGE, ir.canonical_json, seed, metrics.model_dump(), score.model_dump(), user_id=BENCHMARK_USER
+        )
+    cache_key = simulation_cache_key(ir.digest, 0, offered_rps)
+    db.put_cached_metrics(cache_key, metrics.model_dump())
+    nodes = raw_graph["nodes"]
+    edges = raw_graph["edges"]
+
+    def evaluate() -> None:
+        response = client.post(
+            "/runs/evaluate",
+            json={"challenge_slug": BENCHMARK_CHALLENGE, "graph": raw_graph, "seed": next(seeds)},
+        )
+        response.raise_for_status()
+
+    def list_runs(fast_json: bool) -> Callable[[], None]:
+        def fetch() -> None:
+            runs_api.FAST_JSON, previous = fast_json, runs_api.FAST_JSON
+            try:
+                response = client.get("/runs", params={"challenge_slug": BENCHMARK_CHALLENGE, "limit": RUN_PAGE_SIZE})
+            finally:
+                runs_api.FAST_JSON = previous
+            response.raise_for_status()
+
+        return fetch
+
+    def record_burst(batching: bool) -> Callable[[], None]:
+        # BURST_RUNS concurrent record_run calls, as when a whole class submits at once.
+        def record(seed: int) -> None:
+            db.record_run(
+                BENCHMARK_CHALLENGE, ir.canonical_json, seed, metrics_json, score_json, user_id=BENCHMARK_USER
+            )
+
+        def burst() -> None:
+            db.WRITE_BATCHING, previous = batching, db.WRITE_BATCHING
+            try:
+                with ThreadPoolExecutor(max_workers=BURST_WRITERS) as pool:
+                    list(pool.map(record, itertools.islice(seeds, BURST_RUNS)))
+            finally:
+                db.WRITE_BATCHING = previous
+
+        return burst
+
+    metrics_json = metrics.model_dump_json()
+    score_json = score.model_dump_json()
+
+    return {
+        "parse_graph": lambda: Graph.model_validate(raw_graph),
+        "compile_graph": lambda: compile_graph(graph),
+        "canonical_json": lambda: graph_codec.stable_graph_json(nodes, edges),
+        "graph_digest": lambda: graph_codec.graph_digest(ir.canonical_json),
+        "canonical_form": lambda: engine.canonical_form(ir.compiled),
+        "simulate": lambda: simulate_metrics(ir.compiled, offered_rps, next(seeds)),
+        "run_simulation_for_graph": lambda: run_simulation_for_graph(ir, next(seeds), offered_rps),
+        "score_run": lambda: score_run(challenge.scoring, ir.structure, metrics),
+        "db.record_run": lambda: db.record_run(
+            BENCHMARK_CHALLENGE,
+            ir.canonical_json,
+            next(seeds),
+            metrics.model_dump(),
+            score.model_dump(),
+            user_id=BENCHMARK_USER,
+        ),
+        "db.record_run burst": record_burst(batching=True),
+        "db.record_run burst unbatched": record_burst(batching=False),
+        "db.get_run": lambda: db.get_run(run_id),
+        "db.list_runs": lambda: db.list_runs(BENCHMARK_CHALLENGE, limit=20, include_graph=False),
+        "db.get_cached_metrics": lambda: db.get_cached_metrics(cache_key),
+        "db.put_cached_metrics": lambda: db.put_cached_metrics(f"bench:{next(seeds)}", metrics.model_dump()),
+        "db.list_leaderboard": lambda: db.list_leaderboard(BENCHMARK_CHALLENGE, 50),
+        "POST /runs/evaluate": evaluate,
+        "GET /runs": list_runs(fast_json=False),
+        "GET /runs fast_json": list_runs(fast_json=True),
+    }
+
+
+def run_suite(
+    cases: Iterable[Case],
+    repeats: int = 5,
+    warmup: int = 1,
+    stages: Iterable[str] | None = None,
+) -> dict[str, Any]:
+    """Time every selected stage for every case and return a baseline document."""
+    selected = set(stages) if stages is not None else None
+    results: dict[str, dict[str, dict[str, float]]] = {}
+    with TestClient(app) as client:
+        for case in cases:
+            timings = {}
+            for name, fn in _stages(case, client).items():
+                if selected is None or name in selected:
+                    timings[name] = _time(fn, repeats, warmup)
+            results[case.key] = timings
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "engine_version": engine.ENGINE_VERSION,
+            "repeats": repeats,
+        },
+        "results": results,
+    }
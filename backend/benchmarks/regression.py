@@ -0,0 +1,27 @@
+"""Baseline comparison for benchmark reports; kept free of app imports."""
+
+from __future__ import annotations
+
+from typing import Any
+
+
+def compare(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    threshold: float = 0.25,
+    min_delta_ms: float = 0.5,
+) -> list[str]:
+    """Describe every stage whose median grew by more than ``threshold`` (a fraction) over ``baseline``."""
+    regressions = []
+    for case_key, timings in current["results"].items():
+        reference = baseline["results"].get(case_key, {})
+        for stage, timing in timings.items():
+            if stage not in reference:
+                continue
+            before = reference[stage]["median_ms"]
+            after = timing["median_ms"]
+            if after > before * (1.0 + threshold) and after - before > min_delta_ms:
+                regressions.append(
+                    f"{case_key} {stage}: {before:.3f}ms -> {after:.3f}ms (+{(after / before - 1.0) * 100:.0f}%)"
+                )
+    return regressions
@@ -1,14 +1,33 @@
+import json
+import math
 import os
+import sqlite3
 import tempfile
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from unittest import mock
 
 from fastapi.testclient import TestClient
 
 TEMP_DIR = tempfile.TemporaryDirectory()
 os.environ["SDG_DB_PATH"] = str(Path(TEMP_DIR.name) / "test_system_design_game.db")
 
+from app import db, graph_codec  # noqa: E402
+from app.api import runs as runs_api  # noqa: E402
 from app.main import app  # noqa: E402
+from app.services.catalog import challenge_catalog  # noqa: E402
+from app.schemas import Graph, GraphPatch  # noqa: E402
+from app.services import simulation as simulation_service  # noqa: E402
+from app.services.graph_ir import compile_graph  # noqa: E402
+from app.services.jobs import JobManager, JobQueueFull  # noqa: E402
+from app.services.leaderboard import Leaderboards, ScoreIndex  # noqa: E402
+from app.services.rerun import GraphState, apply_patch  # noqa: E402
+from app.services.sim_cache import SimulationCache, simulation_cache  # noqa: E402
+from app.services.single_flight import SingleFlight  # noqa: E402
+from app.services.simulation import engine  # noqa: E402
 
 
 def sample_graph() -> dict:
@@ -29,6 +48,11 @@ def sample_graph() -> dict:
     }
 
 
+def engine_result(compiled, seed: int) -> tuple:
+    result = engine.simulate(compiled, offered_rps=2000.0, seed=seed)
+    return (result.throughput_rps, result.latency_p95_ms, result.availability_pct, result.monthly_cost_usd)
+
+
 class ApiTests(unittest.TestCase):
     @classmethod
     def setUpClass(cls) -> None:
@@ -53,6 +77,69 @@ class ApiTests(unittest.TestCase):
         slugs = {challenge["slug"] for challenge in data}
         self.assertSetEqual(slugs, {"url-shortener", "realtime-chat", "video-streaming"})
 
+    def test_conditional_gets_answer_304_until_the_version_moves(self) -> None:
+        catalog = self.client.get("/challenges")
+        etag = catalog.headers["etag"]
+        self.assertEqual(catalog.headers["cache-control"], "no-cache")
+        unchanged = self.client.get("/challenges", headers={"If-None-Match": f'"stale", {etag}'})
+        self.assertEqual(unchanged.status_code, 304)
+        self.assertEqual(unchanged.content, b"")
+        self.assertEqual(unchanged.headers["etag"], etag)
+
+        payload = {"challenge_slug": "url-shortener", "graph": sample_graph(), "seed": 42}
+        run = self.client.post("/runs/evaluate", json=payload).json()
+        stored = self.client.get(f"/runs/{run['run_id']}")
+        self.assertEqual(stored.status_code, 200)
+        self.assertIn("immutable", stored.headers["cache-control"])
+        self.assertEqual(stored.json()["metrics"], run["metrics"])
+        revalidated = self.client.get(f"/runs/{run['run_id']}", headers={"If-None-Match": stored.headers["etag"]})
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(self.client.get("/runs/999999").status_code, 404)
+        self.assertEqual(self.client.get("/runs/999999", headers={"If-None-Match": "*"}).status_code, 404)
+        self.assertEqual(self.client.get(f"/runs/{run['run_id']}", headers={"If-None-Match": "*"}).status_code, 304)
+
+        scores = self.client.get("/best-scores")
+        self.assertEqual(
+            self.client.get("/best-scores", headers={"If-None-Match": scores.headers["etag"]}).status_code, 304
+        )
+        self.client.post("/runs/evaluate", json=payload)
+        self.assertEqual(
+            self.client.get("/best-scores", headers={"If-None-Match": scores.headers["etag"]}).status_code, 304
+        )
+        db.upsert_best_score("url-shortener", 100.0, run["run_id"])
+        moved = self.client.get("/best-scores", headers={"If-None-Match": scores.headers["etag"]})
+        self.assertEqual(moved.status_code, 200)
+        self.assertNotEqual(moved.headers["etag"], scores.headers["etag"])
+        self.assertIn(100.0, {score["total"] for score in moved.json()})
+
+    def test_best_scores_etag_sees_other_processes_writes(self) -> None:
+        etag = self.client.get("/best-scores").headers["etag"]
+        other = sqlite3.connect(db.DB_PATH)
+        other.execute("UPDATE best_scores_version SET version = version + 1 WHERE id = 1")
+        other.commit()
+        other.close()
+        with mock.patch.object(db, "BEST_SCORES_REFRESH_SECONDS", 0.0):
+            moved = self.client.get("/best-scores", headers={"If-None-Match": etag})
+        self.assertEqual(moved.status_code, 200)
+        self.assertNotEqual(moved.headers["etag"], etag)
+
+    def test_fast_json_serves_the_same_documents(self) -> None:
+        payload = {"challenge_slug": "url-shortener", "graph": sample_graph(), "seed": 7, "user_id": "fast-json"}
+        slow = self.client.post("/runs/evaluate", json=payload).json()
+        with mock.patch.object(runs_api, "FAST_JSON", True):
+            fast = self.client.post("/runs/evaluate", json=payload).json()
+            fast_page = self.client.get("/runs", params={"limit": 2})
+            fast_record = self.client.get(f"/runs/{fast['run_id']}").json()
+        slow_page = self.client.get("/runs", params={"limit": 2})
+
+        for key in ("run_id", "created_at"):
+            fast.pop(key)
+            slow.pop(key)
+        self.assertEqual(fast, slow)
+        self.assertEqual(fast_page.json(), slow_page.json())
+        self.assertEqual(fast_page.headers["x-next-cursor"], slow_page.headers["x-next-cursor"])
+        self.assertEqual(fast_record, slow_page.json()[0])
+
     def test_evaluate_is_deterministic_for_same_seed_and_graph(self) -> None:
         payload = {"challenge_slug": "url-shortener", "graph": sample_graph(), "seed": 42}
 
@@ -69,6 +156,170 @@ class ApiTests(unittest.TestCase):
         self.assertEqual(first_json["metrics"], second_json["metrics"])
         self.assertEqual(first_json["score"], second_json["score"])
 
+    def test_huge_replica_counts_are_clamped_instead_of_overflowing(self) -> None:
+        def evaluate(units: object) -> dict:
+            graph = sample_graph()
+            graph["nodes"][1]["config"] = {"replicas": units, "shards": units}
+            response = self.client.post(
+                "/runs/preview", json={"challenge_slug": "url-shortener", "graph": graph, "seed": 42}
+            )
+            self.assertEqual(response.status_code, 200, units)
+            return response.json()
+
+        huge = evaluate(10**20)
+        self.assertEqual(huge["metrics"], evaluate(engine.MAX_NODE_UNITS)["metrics"])
+        self.assertTrue(math.isfinite(huge["metrics"]["monthly_cost_usd"]))
+        self.assertEqual(evaluate(float("inf"))["metrics"], evaluate(1)["metrics"])
+
+    def test_preview_scores_without_writing(self) -> None:
+        payload = {"challenge_slug": "url-shortener", "graph": sample_graph(), "seed": 4242}
+
+        def row_counts() -> tuple[int, ...]:
+            with sqlite3.connect(os.environ["SDG_DB_PATH"]) as conn:
+                return tuple(
+                    conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                    for table in ("runs", "user_best_scores", "sim_cache", "graphs")
+                )
+
+        before = row_counts()
+        preview = self.client.post("/runs/preview", json=payload)
+        self.assertEqual(preview.status_code, 200)
+        hits = simulation_cache.stats()["memory_hits"]
+        self.assertEqual(self.client.post("/runs/preview", json=payload).json(), preview.json())
+        self.assertEqual(simulation_cache.stats()["memory_hits"], hits + 1)
+        self.assertEqual(row_counts(), before)
+
+        evaluated = self.client.post("/runs/evaluate", json=payload).json()
+        self.assertEqual(preview.json()["metrics"], evaluated["metrics"])
+        self.assertEqual(preview.json()["score"], evaluated["score"])
+
+        missing = self.client.post("/runs/preview", json={**payload, "challenge_slug": "nope"})
+        self.assertEqual(missing.status_code, 404)
+
+    def test_renamed_design_hits_the_cache_under_its_own_names(self) -> None:
+        names = {"lb-1": "edge", "api-1": "web", "db-1": "primary", "cache-1": "redis", "queue-1": "jobs"}
+        graph = sample_graph()
+        graph["nodes"][1]["config"] = {"replicas": 1}
+        renamed = {
+            "nodes": [{**node, "id": names[node["id"]]} for node in graph["nodes"]],
+            "edges": [
+                {**edge, "source": names[edge["source"]], "target": names[edge["target"]]} for edge in graph["edges"]
+            ],
+        }
+        first = self.client.post("/runs/evaluate", json={"challenge_slug": "url-shortener", "graph": graph, "seed": 77})
+        hits = simulation_cache.stats()["memory_hits"]
+        second = self.client.post(
+            "/runs/evaluate", json={"challenge_slug": "url-shortener", "graph": renamed, "seed": 77}
+        )
+        self.assertEqual(simulation_cache.stats()["memory_hits"], hits + 1)
+
+        original, relabelled = first.json()["metrics"], second.json()["metrics"]
+        self.assertEqual(relabelled["analysis"]["critical_path"], ["edge", "web", "primary"])
+        self.assertEqual(relabelled["analysis"]["bottlenecks"][0]["node_id"], "web")
+        self.assertEqual(relabelled["cut_sets"], [[names[node] for node in cut] for cut in original["cut_sets"]])
+        self.assertEqual(second.json()["score"]["total"], first.json()["score"]["total"])
+
+    def test_concurrent_identical_simulations_share_one_computation(self) -> None:
+        names = {"lb-1": "edge", "api-1": "web", "db-1": "primary", "cache-1": "redis", "queue-1": "jobs"}
+        graph = sample_graph()
+        renamed = {
+            "nodes": [{**node, "id": names[node["id"]]} for node in graph["nodes"]],
+            "edges": [
+                {**edge, "source": names[edge["source"]], "target": names[edge["target"]]} for edge in graph["edges"]
+            ],
+        }
+        designs = [compile_graph(Graph(**graph))] * 3 + [compile_graph(Graph(**renamed))]
+        flights = simulation_service.simulation_flights
+        coalesced = flights.stats()["coalesced"]
+        simulate_metrics = simulation_service.simulate_metrics
+        calls = []
+
+        def held_simulation(*args):
+            # Hold the first caller until every duplicate is waiting on it.
+            calls.append(args)
+            deadline = time.monotonic() + 5.0
+            while flights.stats()["coalesced"] < coalesced + 3 and time.monotonic() < deadline:
+                time.sleep(0.005)
+            return simulate_metrics(*args)
+
+        seed = int(time.time() * 1000)
+        with mock.patch.object(simulation_service, "simulate_metrics", held_simulation), ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(lambda ir: simulation_service.run_simulation_for_graph(ir, seed, 2000.0), designs))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flights.stats()["coalesced"], coalesced + 3)
+        self.assertEqual(flights.stats()["in_flight"], 0)
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[3].analysis.critical_path, [names[node] for node in results[0].analysis.critical_path])
+
+    def test_concurrent_identical_previews_share_one_scored_result(self) -> None:
+        payload = {"challenge_slug": "url-shortener", "graph": sample_graph(), "seed": int(time.time() * 1000)}
+        flights = simulation_service.scored_flights
+        coalesced = flights.stats()["coalesced"]
+        score_run = runs_api.score_run
+        calls = []
+
+        def held_score(*args):
+            calls.append(args)
+            deadline = time.monotonic() + 5.0
+            while flights.stats()["coalesced"] < coalesced + 2 and time.monotonic() < deadline:
+                time.sleep(0.005)
+            return score_run(*args)
+
+        with mock.patch.object(runs_api, "score_run", held_score), ThreadPoolExecutor(3) as pool:
+            responses = list(pool.map(lambda _: self.client.post("/runs/preview", json=payload), range(3)))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([response.status_code for response in responses], [200] * 3)
+        self.assertEqual(responses[0].json(), responses[2].json())
+        self.assertEqual(flights.stats()["in_flight"], 0)
+
+    def test_single_flight_hands_the_exception_to_every_waiter(self) -> None:
+        flight: SingleFlight[int] = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def failing() -> int:
+            started.set()
+            release.wait(5.0)
+            raise ValueError("boom")
+
+        with ThreadPoolExecutor(2) as pool:
+            leader = pool.submit(flight.do, "key", failing)
+            started.wait(5.0)
+            follower = pool.submit(flight.do, "key", lambda: 1)
+            while flight.stats()["coalesced"] < 1:
+                time.sleep(0.005)
+            release.set()
+            for future in (leader, follower):
+                with self.assertRaisesRegex(ValueError, "boom"):
+                    future.result(timeout=5.0)
+        self.assertEqual(flight.stats(), {"computed": 1, "coalesced": 1, "in_flight": 0})
+        self.assertEqual(flight.do("key", lambda: 2), 2)
+
+    def test_evaluate_explains_overloaded_nodes_on_the_critical_path(self) -> None:
+        graph = sample_graph()
+        graph["nodes"][1]["config"] = {"replicas": 1}
+        payload = {"challenge_slug": "url-shortener", "graph": graph, "seed": 7}
+        response = self.client.post("/runs/evaluate", json=payload)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+
+        analysis = body["metrics"]["analysis"]
+        self.assertEqual(analysis["critical_path"], ["lb-1", "api-1", "db-1"])
+        bottleneck = analysis["bottlenecks"][0]
+        self.assertEqual(bottleneck["node_id"], "api-1")
+        self.assertTrue(bottleneck["on_critical_path"])
+        self.assertIn(
+            f"api-1 at {bottleneck['utilization']:.0%} capacity on the critical path.", body["score"]["explanations"]
+        )
+
+    def test_design_is_not_called_fine_next_to_failure_explanations(self) -> None:
+        payload = {"challenge_slug": "realtime-chat", "graph": sample_graph(), "seed": 7}
+        explanations = self.client.post("/runs/preview", json=payload).json()["score"]["explanations"]
+        self.assertEqual(explanations[0], "Single points of failure on the request path: lb-1, db-1, api-1.")
+        self.assertNotIn("Design meets baseline challenge requirements.", explanations)
+
     def test_history_and_best_scores(self) -> None:
         payload = {"challenge_slug": "url-shortener", "graph": sample_graph(), "seed": 99}
         run_response = self.client.post("/runs/evaluate", json=payload)
@@ -85,6 +336,551 @@ class ApiTests(unittest.TestCase):
         best_data = best_scores.json()
         self.assertTrue(any(item["challenge_slug"] == "url-shortener" for item in best_data))
 
+    def test_batch_evaluate_matches_single_runs(self) -> None:
+        single = self.client.post(
+            "/runs/evaluate",
+            json={"challenge_slug": "url-shortener", "graph": sample_graph(), "seed": 7},
+        )
+        batch = self.client.post(
+            "/runs/evaluate-batch",
+            json={"challenge_slug": "url-shortener", "graph": sample_graph(), "seeds": [7]},
+        )
+        self.assertEqual(batch.status_code, 200)
+        batch_json = batch.json()
+        self.assertEqual(batch_json["seed_count"], 1)
+        self.assertEqual(batch_json["throughput_rps"]["p50"], single.json()["metrics"]["throughput_rps"])
+        self.assertEqual(batch_json["latency_p95_ms"]["p50"], single.json()["metrics"]["latency_p95_ms"])
+        self.assertEqual(batch_json["total_score"]["p50"], single.json()["score"]["total"])
+        saved = db.get_run_batch(batch_json["batch_id"])
+        self.assertEqual(saved["graph"], db.get_run(single.json()["run_id"])["graph"])
+
+    def test_batch_evaluate_seed_range(self) -> None:
+        payload = {
+            "challenge_slug": "url-shortener",
+            "graph": sample_graph(),
+            "seed_start": 0,
+            "seed_count": 10000,
+        }
+        response = self.client.post("/runs/evaluate-batch", json=payload)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["seed_count"], 10000)
+        for band in ("throughput_rps", "latency_p95_ms", "availability_pct", "total_score"):
+            self.assertLessEqual(data[band]["p5"], data[band]["p50"])
+            self.assertLessEqual(data[band]["p50"], data[band]["p95"])
+
+        both = self.client.post("/runs/evaluate-batch", json={**payload, "seeds": [1, 2]})
+        self.assertEqual(both.status_code, 400)
+
+    def test_resubmissions_are_served_from_simulation_cache(self) -> None:
+        payload = {"challenge_slug": "realtime-chat", "graph": sample_graph(), "seed": 1234}
+        first = self.client.post("/runs/evaluate", json=payload)
+        before = simulation_cache.stats()
+
+        second = self.client.post("/runs/evaluate", json=payload)
+        after_memory = simulation_cache.stats()
+        self.assertEqual(after_memory["memory_hits"], before["memory_hits"] + 1)
+        self.assertEqual(after_memory["misses"], before["misses"])
+
+        simulation_cache.clear()
+        third = self.client.post("/runs/evaluate", json=payload)
+        after_disk = simulation_cache.stats()
+        self.assertEqual(after_disk["disk_hits"], before["disk_hits"] + 1)
+
+        self.assertEqual(first.json()["metrics"], second.json()["metrics"])
+        self.assertEqual(first.json()["metrics"], third.json()["metrics"])
+
+    def test_stored_simulation_cache_drops_stale_versions_and_keeps_newest_rows(self) -> None:
+        metrics = {"throughput_rps": 1.0}
+        db.put_cached_metrics("0:stale:1:2000", metrics)
+        for seed in range(3):
+            db.put_cached_metrics(f"{engine.ENGINE_VERSION}:pruned:{seed}:2000", metrics)
+        cache = SimulationCache(max_rows=2)
+
+        pruned = cache.prune(keep_prefix=f"{engine.ENGINE_VERSION}:")
+        self.assertGreaterEqual(pruned, 2)
+        self.assertEqual(cache.stats()["rows_pruned"], pruned)
+        self.assertIsNone(db.get_cached_metrics("0:stale:1:2000"))
+        self.assertIsNone(db.get_cached_metrics(f"{engine.ENGINE_VERSION}:pruned:0:2000"))
+        self.assertEqual(db.get_cached_metrics(f"{engine.ENGINE_VERSION}:pruned:2:2000"), metrics)
+
+    def test_connections_are_pooled_in_wal_mode(self) -> None:
+        before = db.pool_stats()
+        payload = {"challenge_slug": "url-shortener", "graph": sample_graph(), "seed": 5}
+        for _ in range(3):
+            self.assertEqual(self.client.post("/runs/evaluate", json=payload).status_code, 200)
+        after = db.pool_stats()
+
+        self.assertGreater(after["checkouts"], before["checkouts"])
+        self.assertLessEqual(after["opened"], after["size"])
+        self.assertEqual(after["in_use"], 0)
+        with db._connection() as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+
+    def test_record_run_keeps_only_the_best_total(self) -> None:
+        def record(total: float) -> int:
+            run_id, created_at = db.record_run(
+                challenge_slug="video-streaming",
+                graph=sample_graph(),
+                seed=1,
+                metrics={},
+                score={"total": total},
+            )
+            self.assertTrue(created_at)
+            return run_id
+
+        first = record(50.0)
+        record(40.0)
+        best = {item["challenge_slug"]: item for item in db.list_best_scores()}["video-streaming"]
+        self.assertEqual((best["total"], best["run_id"]), (50.0, first))
+
+        third = record(60.0)
+        best = {item["challenge_slug"]: item for item in db.list_best_scores()}["video-streaming"]
+        self.assertEqual((best["total"], best["run_id"]), (60.0, third))
+
+    def test_run_writer_commits_concurrent_runs_together(self) -> None:
+        writer = db.RunWriter(max_batch=4, window_seconds=5.0)
+
+        def record(slug: str | None) -> int:
+            run_id, _ = db.record_run(
+                challenge_slug=slug, graph=sample_graph(), seed=2, metrics={}, score={"total": 0.0}
+            )
+            return run_id
+
+        with mock.patch.object(db, "_run_writer", writer), ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(record, slug) for slug in ("url-shortener", "url-shortener", None, "url-shortener")]
+            outcomes = [future.exception(timeout=5.0) or future.result() for future in futures]
+        writer.close()
+
+        self.assertEqual((writer.batches, writer.records), (1, 4))
+        self.assertIsInstance(outcomes[2], sqlite3.IntegrityError)
+        run_ids = [outcomes[0], outcomes[1], outcomes[3]]
+        self.assertEqual(len(set(run_ids)), 3)
+        for run_id in run_ids:
+            self.assertEqual(db.get_run(run_id)["challenge_slug"], "url-shortener")
+
+    def test_catalog_reads_skip_sqlite_until_version_changes(self) -> None:
+        self.client.get("/challenges")
+        refresh_interval = challenge_catalog.refresh_interval
+        challenge_catalog.refresh_interval = 3600.0
+        try:
+            before = db.pool_stats()["checkouts"]
+            for _ in range(5):
+                self.assertEqual(self.client.get("/challenges/url-shortener").status_code, 200)
+            self.assertEqual(db.pool_stats()["checkouts"], before)
+
+            version = challenge_catalog.snapshot().version
+            original = self.client.get("/challenges/video-streaming").json()
+            db.upsert_challenge({**original, "title": "Catalog Probe"})
+            self.assertEqual(self.client.get("/challenges/video-streaming").json()["title"], original["title"])
+
+            challenge_catalog.invalidate()
+            probe = self.client.get("/challenges/video-streaming")
+            self.assertEqual(probe.json()["title"], "Catalog Probe")
+            self.assertGreater(challenge_catalog.snapshot().version, version)
+            db.upsert_challenge(original)
+        finally:
+            challenge_catalog.refresh_interval = refresh_interval
+            challenge_catalog.invalidate()
+
+    def test_run_history_keyset_pagination_and_export(self) -> None:
+        payload = {"challenge_slug": "realtime-chat", "graph": sample_graph(), "seed": 3}
+        for _ in range(5):
+            self.client.post("/runs/evaluate", json=payload)
+
+        seen: list[int] = []
+        cursor = None
+        while True:
+            params = {"challenge_slug": "realtime-chat", "limit": 2, "include_graph": "false"}
+            if cursor:
+                params["cursor"] = cursor
+            page = self.client.get("/runs", params=params)
+            self.assertEqual(page.status_code, 200)
+            for run in page.json():
+                self.assertNotIn("graph", run)
+                seen.append(run["run_id"])
+            cursor = page.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertGreaterEqual(len(seen), 5)
+
+        export = self.client.get("/runs/export", params={"challenge_slug": "realtime-chat"})
+        self.assertEqual(export.status_code, 200)
+        self.assertTrue(export.headers["content-type"].startswith("application/x-ndjson"))
+        exported = [json.loads(line) for line in export.text.splitlines()]
+        self.assertEqual([run["run_id"] for run in exported], seen)
+        self.assertIn("throughput_rps", exported[0]["metrics"])
+
+        self.assertEqual(self.client.get("/runs", params={"cursor": "not-a-cursor"}).status_code, 400)
+
+    def test_runs_share_deduplicated_graph_rows(self) -> None:
+        graph = sample_graph()
+        shuffled = {"nodes": list(reversed(graph["nodes"])), "edges": list(reversed(graph["edges"]))}
+        first = self.client.post(
+            "/runs/evaluate", json={"challenge_slug": "url-shortener", "graph": graph, "seed": 11}
+        ).json()
+        second = self.client.post(
+            "/runs/evaluate", json={"challenge_slug": "url-shortener", "graph": shuffled, "seed": 12}
+        ).json()
+
+        with db._connection() as conn:
+            hashes = {
+                row["graph_hash"]
+                for row in conn.execute(
+                    "SELECT graph_hash FROM runs WHERE id IN (?, ?)", (first["run_id"], second["run_id"])
+                )
+            }
+        self.assertEqual(len(hashes), 1)
+
+        stored = self.client.get(f"/runs/{second['run_id']}").json()["graph"]
+        self.assertEqual(sorted(node["id"] for node in stored["nodes"]), sorted(n["id"] for n in graph["nodes"]))
+
+    def test_inline_graph_migration(self) -> None:
+        for version in (sqlite3.sqlite_version_info, (3, 34, 1)):
+            with self.subTest(sqlite_version=version), mock.patch.object(db.sqlite3, "sqlite_version_info", version):
+                self._check_inline_graph_migration()
+
+    def _check_inline_graph_migration(self) -> None:
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        conn.executescript(
+            """
+            CREATE TABLE graphs (
+                hash TEXT PRIMARY KEY,
+                encoding TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at TEXT NOT NULL DEFAULT ''
+            );
+            CREATE TABLE runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                challenge_slug TEXT NOT NULL,
+                graph_json TEXT NOT NULL,
+                seed INTEGER NOT NULL
+            );
+            CREATE INDEX idx_runs_seed ON runs(seed);
+            CREATE TABLE run_batches (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                challenge_slug TEXT NOT NULL,
+                graph_json TEXT NOT NULL,
+                seeds_json TEXT NOT NULL
+            );
+            """
+        )
+        big_graph = {
+            "nodes": [{"id": f"api-{index}", "type": "api", "config": {}} for index in range(100)],
+            "edges": [],
+        }
+        for graph in (sample_graph(), sample_graph(), big_graph):
+            conn.execute(
+                "INSERT INTO runs (challenge_slug, graph_json, seed) VALUES (?, ?, ?)",
+                ("url-shortener", json.dumps(graph), 1),
+            )
+        conn.execute(
+            "INSERT INTO run_batches (challenge_slug, graph_json, seeds_json) VALUES (?, ?, ?)",
+            ("url-shortener", json.dumps(sample_graph()), "{}"),
+        )
+
+        db._migrate_inline_graphs(conn)
+
+        for table in ("runs", "run_batches"):
+            columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            self.assertNotIn("graph_json", columns)
+            self.assertEqual(conn.execute(f"SELECT COUNT(*) FROM {table} WHERE graph_hash IS NULL").fetchone()[0], 0)
+        encodings = sorted(row["encoding"] for row in conn.execute("SELECT encoding FROM graphs"))
+        self.assertEqual(encodings, ["json", "zlib"])
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0], 3)
+        indexes = {row["name"] for row in conn.execute("PRAGMA index_list(runs)")}
+        self.assertIn("idx_runs_seed", indexes)
+        conn.close()
+
+    def test_rerun_applies_patch_as_child_run(self) -> None:
+        parent = self.client.post(
+            "/runs/evaluate", json={"challenge_slug": "url-shortener", "graph": sample_graph(), "seed": 4242}
+        ).json()
+        patch = {
+            "update_nodes": [{"id": "api-1", "config": {"replicas": 4}}],
+            "add_nodes": [{"id": "cdn-1", "type": "cdn", "config": {}}],
+            "add_edges": [{"source": "cdn-1", "target": "lb-1", "mode": "sync"}],
+            "remove_edges": [{"source": "api-1", "target": "queue-1", "mode": "async"}],
+        }
+        response = self.client.post(f"/runs/{parent['run_id']}/rerun", json={"patch": patch})
+        self.assertEqual(response.status_code, 200, response.text)
+        child = response.json()
+        self.assertEqual(child["parent_run_id"], parent["run_id"])
+        self.assertEqual(child["seed"], 4242)
+
+        expected = sample_graph()
+        expected["nodes"][1]["config"] = {"replicas": 4}
+        expected["nodes"].append({"id": "cdn-1", "type": "cdn", "config": {}})
+        expected["edges"] = expected["edges"][:3] + [{"source": "cdn-1", "target": "lb-1", "mode": "sync"}]
+        stored = self.client.get(f"/runs/{child['run_id']}").json()
+        self.assertEqual(stored["parent_run_id"], parent["run_id"])
+        self.assertEqual(
+            sorted(node["id"] for node in stored["graph"]["nodes"]), sorted(node["id"] for node in expected["nodes"])
+        )
+        fresh = self.client.post(
+            "/runs/evaluate", json={"challenge_slug": "url-shortener", "graph": expected, "seed": 4242}
+        ).json()
+        self.assertEqual(child["metrics"], fresh["metrics"])
+        self.assertEqual(child["score"], fresh["score"])
+
+        for bad_patch in (
+            {"remove_nodes": ["missing"]},
+            {"add_nodes": [{"id": "lb-1", "type": "lb"}]},
+            {"add_edges": [{"source": "lb-1", "target": "missing"}]},
+            {"remove_edges": [{"source": "lb-1", "target": "db-1"}]},
+        ):
+            rejected = self.client.post(f"/runs/{child['run_id']}/rerun", json={"patch": bad_patch})
+            self.assertEqual(rejected.status_code, 400, bad_patch)
+        self.assertEqual(self.client.post("/runs/999999/rerun", json={"patch": {}}).status_code, 404)
+
+    def test_patched_state_simulates_like_a_fresh_compile(self) -> None:
+        state = GraphState.from_graph(sample_graph())
+        patches = [
+            {"update_nodes": [{"id": "db-1", "config": {"shards": 4}}]},
+            {"remove_nodes": ["cache-1"], "update_nodes": [{"id": "queue-1", "type": "cache"}]},
+            {
+                "add_nodes": [{"id": "api-2", "type": "api", "config": {"replicas": 3}}],
+                "add_edges": [
+                    {"source": "lb-1", "target": "api-2"},
+                    {"source": "api-2", "target": "db-1"},
+                    {"source": "api-2", "target": "db-1"},
+                ],
+            },
+            {"remove_edges": [{"source": "api-2", "target": "db-1"}]},
+        ]
+        for patch in patches:
+            state = apply_patch(state, GraphPatch(**patch))
+            fresh = GraphState.from_graph(state.graph())
+            graph = state.graph()
+            self.assertEqual(state.canonical_json(), graph_codec.stable_graph_json(graph["nodes"], graph["edges"]))
+            incremental = state.compiled
+            for seed in (1, 99):
+                self.assertEqual(
+                    engine_result(incremental, seed), engine_result(fresh.compiled, seed), patch
+                )
+            self.assertEqual(state.structure, fresh.structure)
+
+    def test_leaderboard_ranks_users_by_best_total(self) -> None:
+        strong = sample_graph()
+        weak = {"nodes": [{"id": "api-1", "type": "api", "config": {}}], "edges": []}
+        for user_id, graph in (("ada", strong), ("bob", weak), ("cy", strong), ("bob", strong), ("dee", weak)):
+            response = self.client.post(
+                "/runs/evaluate",
+                json={"challenge_slug": "realtime-chat", "graph": graph, "seed": 5, "user_id": user_id},
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["user_id"], user_id)
+
+        board = self.client.get("/leaderboards/realtime-chat", params={"limit": 10}).json()
+        self.assertEqual(board["players"], 4)
+        self.assertEqual([entry["user_id"] for entry in board["entries"]], ["ada", "cy", "bob", "dee"])
+        self.assertEqual([entry["rank"] for entry in board["entries"]], [1, 1, 1, 4])
+
+        standing = self.client.get("/leaderboards/realtime-chat/users/dee", params={"neighbors": 1}).json()
+        self.assertEqual(standing["rank"], 4)
+        self.assertEqual([entry["user_id"] for entry in standing["entries"]], ["bob", "dee"])
+        self.assertEqual(self.client.get("/leaderboards/realtime-chat/users/zed").status_code, 404)
+        self.assertEqual(self.client.get("/leaderboards/missing").status_code, 404)
+
+    def test_leaderboard_reloads_after_another_processes_write(self) -> None:
+        run = self.client.post(
+            "/runs/evaluate", json={"challenge_slug": "url-shortener", "graph": sample_graph(), "seed": 3}
+        ).json()
+        board = Leaderboards(refresh_interval=0.0)
+        players, _ = board.top("url-shortener", 1)
+
+        other = sqlite3.connect(db.DB_PATH)
+        other.execute(
+            "INSERT INTO user_best_scores (challenge_slug, user_id, total, run_id) VALUES (?, ?, ?, ?)",
+            ("url-shortener", "other-process", 1.0, run["run_id"]),
+        )
+        other.execute(
+            "UPDATE leaderboard_versions SET version = version + 1 WHERE challenge_slug = ?", ("url-shortener",)
+        )
+        other.commit()
+        other.close()
+
+        self.assertEqual(board.top("url-shortener", 1)[0], players + 1)
+        self.assertEqual(board.standing("url-shortener", "other-process", 0)[0], players + 1)
+
+    def test_score_index_ranks_match_a_sorted_scan(self) -> None:
+        totals = {f"user-{index}": round((index * 37) % 10001 / 100, 2) for index in range(2000)}
+        index = ScoreIndex(totals)
+        self.assertTrue(index.record("user-1", 99.5))
+        self.assertFalse(index.record("user-1", 10.0))
+        self.assertTrue(index.record("new-user", 42.0))
+        totals["user-1"] = max(totals["user-1"], 99.5)
+        totals["new-user"] = 42.0
+        self.assertEqual(len(index), len(totals))
+        for probe in (0.0, 12.34, 42.0, 99.5, 100.0):
+            expected = 1 + sum(total > probe for total in totals.values())
+            self.assertEqual(index.rank(probe), expected, probe)
+
+    def test_server_timing_header_and_metrics_endpoint(self) -> None:
+        payload = {"challenge_slug": "url-shortener", "graph": sample_graph(), "seed": 314}
+        response = self.client.post("/runs/evaluate", json=payload)
+        self.assertEqual(response.status_code, 200)
+        timing = {part.split(";")[0] for part in response.headers["server-timing"].split(", ")}
+        self.assertTrue({"compile", "simulate", "score", "persist", "framework", "total"} <= timing)
+
+        metrics = self.client.get("/metrics")
+        self.assertEqual(metrics.status_code, 200)
+        self.assertIn('sdg_stage_duration_seconds_count{stage="simulate"}', metrics.text)
+        self.assertIn('sdg_stage_duration_quantile_seconds{stage="persist",quantile="0.99"}', metrics.text)
+        self.assertIn("sdg_db_rows_written_total", metrics.text)
+        self.assertIn("sdg_sim_cache_misses_total", metrics.text)
+
+    def test_load_sweep_matches_single_evaluations(self) -> None:
+        graph = sample_graph()
+        payload = {"challenge_slug": "url-shortener", "graph": graph, "seed": 8}
+        response = self.client.post("/runs/sweep", json={**payload, "start_rps": 900, "stop_rps": 9000, "steps": 10})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data["points"]), 10)
+        self.assertEqual(data["saturation_node"], "api-1")
+
+        latencies = [point["latency_p95_ms"] for point in data["points"]]
+        self.assertEqual(latencies, sorted(latencies))
+        self.assertIsNotNone(data["knee_rps"])
+        self.assertLessEqual(data["knee_rps"], min(p["offered_rps"] for p in data["points"] if p["saturated"]))
+
+        # The step at the challenge's target load is what /runs/evaluate reports.
+        at_target = self.client.post(
+            "/runs/sweep", json={**payload, "start_rps": 1, "stop_rps": 1800, "steps": 2}
+        ).json()["points"][-1]
+        evaluated = self.client.post("/runs/evaluate", json=payload).json()["metrics"]
+        self.assertEqual(at_target["latency_p95_ms"], evaluated["latency_p95_ms"])
+        self.assertEqual(data["saturation_rps"], evaluated["throughput_rps"])
+
+        invalid = self.client.post("/runs/sweep", json={**payload, "start_rps": 50, "stop_rps": 10})
+        self.assertEqual(invalid.status_code, 400)
+
+    def test_traffic_profile_reports_series_for_busiest_nodes(self) -> None:
+        payload = {"challenge_slug": "url-shortener", "graph": sample_graph(), "seed": 8}
+        response = self.client.post(
+            "/runs/profile",
+            json={
+                **payload,
+                "duration_s": 60,
+                "points": 30,
+                "events": [
+                    {"kind": "burst", "start_s": 20, "duration_s": 10, "rps": 20_000},
+                    {"kind": "diurnal", "amplitude_rps": 300},
+                ],
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data["time_s"]), 30)
+        self.assertEqual(data["bucket_s"], 2.0)
+        fine = self.client.post("/runs/profile", json={**payload, "duration_s": 60, "points": 200}).json()
+        self.assertEqual(fine["bucket_s"], 0.3)
+        self.assertGreater(data["dropped_requests"], 0)
+        self.assertEqual(data["nodes"][0]["node_id"], "api-1")
+        self.assertEqual(len(data["nodes"]), len(sample_graph()["nodes"]))
+        self.assertTrue(all(len(node["backlog"]) == 30 for node in data["nodes"]))
+        self.assertEqual(max(data["drop_rate"][:10]), 0.0)
+        self.assertGreater(max(data["drop_rate"][10:15]), 0.0)
+
+        # A flat profile at the target load matches /runs/evaluate.
+        flat = self.client.post("/runs/profile", json={**payload, "duration_s": 10, "node_ids": ["api-1"]}).json()
+        evaluated = self.client.post("/runs/evaluate", json=payload).json()["metrics"]
+        self.assertEqual([node["node_id"] for node in flat["nodes"]], ["api-1"])
+        self.assertEqual(math.ceil(flat["peak_latency_p95_ms"] - 1e-6), evaluated["latency_p95_ms"])
+
+        unknown = self.client.post("/runs/profile", json={**payload, "node_ids": ["nope"]})
+        self.assertEqual(unknown.status_code, 400)
+        too_long = self.client.post("/runs/profile", json={**payload, "duration_s": 86_400, "tick_ms": 10})
+        self.assertEqual(too_long.status_code, 400)
+
+    def test_optimize_returns_cheapest_design_and_frontier(self) -> None:
+        response = self.client.post(
+            "/challenges/url-shortener/optimize",
+            json={"graph": sample_graph(), "seed": 5, "time_budget_ms": 2000, "max_replicas": 6, "max_shards": 3},
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data["feasible"])
+        self.assertTrue(data["search_complete"])
+        self.assertTrue(data["best"]["meets_targets"])
+
+        evaluated = self.client.post(
+            "/runs/evaluate", json={"challenge_slug": "url-shortener", "graph": data["best_graph"], "seed": 5}
+        ).json()
+        self.assertEqual(evaluated["metrics"], data["best"]["metrics"])
+
+        points = [
+            (item["metrics"]["monthly_cost_usd"], item["metrics"]["latency_p95_ms"], -item["metrics"]["availability_pct"])
+            for item in data["frontier"]
+        ]
+        self.assertTrue(points)
+        for point in points:
+            self.assertFalse(
+                any(other != point and all(a <= b for a, b in zip(other, point)) for other in points), point
+            )
+        cheapest_meeting = min(
+            item["metrics"]["monthly_cost_usd"] for item in data["frontier"] if item["meets_targets"]
+        )
+        self.assertLessEqual(data["best"]["metrics"]["monthly_cost_usd"], cheapest_meeting)
+
+        missing = self.client.post("/challenges/nope/optimize", json={"graph": sample_graph()})
+        self.assertEqual(missing.status_code, 404)
+
+    def test_simulation_jobs_run_in_worker_processes(self) -> None:
+        payload = {"challenge_slug": "url-shortener", "graph": sample_graph(), "seed": 8675309}
+        submitted = self.client.post("/runs/jobs", json=payload)
+        self.assertEqual(submitted.status_code, 202)
+        job_id = submitted.json()["job_id"]
+
+        with self.client.stream("GET", f"/runs/jobs/{job_id}/events") as stream:
+            body = "".join(stream.iter_text())
+        self.assertIn("event: result", body)
+
+        status = self.client.get(f"/runs/jobs/{job_id}").json()
+        self.assertEqual(status["state"], "succeeded", status)
+        self.assertEqual(status["progress"], 1.0)
+        run = self.client.get(f"/runs/{status['result']['run_id']}")
+        self.assertEqual(run.status_code, 200)
+
+        cached = self.client.post("/runs/jobs", json=payload).json()
+        self.assertEqual(cached["state"], "succeeded")
+        self.assertEqual(cached["result"]["metrics"], status["result"]["metrics"])
+
+        self.assertEqual(self.client.get("/runs/jobs/missing").status_code, 404)
+
+    def test_job_manager_bounds_cancels_and_times_out(self) -> None:
+        manager = JobManager(max_workers=1, max_pending=2)
+        try:
+            slow = manager.submit(time.sleep, (1,), finish=lambda _: None, timeout=60)
+            expiring = manager.submit(time.sleep, (1,), finish=lambda _: None, timeout=0.2)
+            with self.assertRaises(JobQueueFull):
+                manager.submit(time.sleep, (0,), finish=lambda _: None, timeout=60)
+
+            # Workers announce each start, so waiters hear of it without polling.
+            started = manager.wait_for_events(slow.id, 1, timeout=10)
+            self.assertEqual([event["state"] for event in started], ["running"])
+            deadline = time.monotonic() + 10
+            self.assertEqual(manager.cancel(slow.id).state, "cancelled")
+            while not manager.get(expiring.id).done and time.monotonic() < deadline:
+                time.sleep(0.05)
+            self.assertEqual(manager.get(expiring.id).state, "timed_out")
+            # The cancelled job's worker is still sleeping, so it keeps its slot until it returns.
+            self.assertGreaterEqual(manager.stats()["pending"], 1)
+            while manager.stats()["pending"] and time.monotonic() < deadline:
+                time.sleep(0.05)
+            self.assertEqual(manager.stats()["pending"], 0)
+
+            finishing = manager.submit(time.sleep, (0,), finish=lambda _: threading.current_thread().name, timeout=60)
+            while not manager.get(finishing.id).done and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertTrue(manager.get(finishing.id).result.startswith("sdg-job-finish"))
+        finally:
+            manager.shutdown()
+
 
 if __name__ == "__main__":
     unittest.main()
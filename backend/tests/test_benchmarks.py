@@ -0,0 +1,32 @@
+import unittest
+
+from benchmarks.graphs import TYPE_MIXES, synthetic_graph
+from benchmarks.regression import compare
+
+
+def report(median_ms: float) -> dict:
+    return {"results": {"web/n=10/d=1.5": {"simulate": {"median_ms": median_ms, "min_ms": median_ms}}}}
+
+
+class BenchmarkTests(unittest.TestCase):
+    def test_synthetic_graphs_are_connected_and_sized(self) -> None:
+        for mix in TYPE_MIXES:
+            graph = synthetic_graph(500, mix, edge_density=2.0, seed=1)
+            node_ids = {node["id"] for node in graph["nodes"]}
+            self.assertEqual(len(node_ids), 500)
+            self.assertGreaterEqual(len(graph["edges"]), 499)
+            self.assertTrue(all(edge["source"] in node_ids and edge["target"] in node_ids for edge in graph["edges"]))
+            entry_type = next(iter(TYPE_MIXES[mix]))
+            targets = {edge["target"] for edge in graph["edges"]}
+            self.assertTrue(all(node["id"] in targets for node in graph["nodes"] if node["type"] != entry_type))
+        self.assertEqual(synthetic_graph(50, seed=3), synthetic_graph(50, seed=3))
+
+    def test_compare_flags_only_regressions_past_threshold(self) -> None:
+        self.assertEqual(compare(report(10.0), report(12.0), threshold=0.25), [])
+        self.assertEqual(len(compare(report(10.0), report(13.0), threshold=0.25)), 1)
+        self.assertEqual(compare(report(0.1), report(0.3), threshold=0.25, min_delta_ms=0.5), [])
+        self.assertEqual(compare({"results": {}}, report(50.0)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
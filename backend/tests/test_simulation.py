@@ -0,0 +1,337 @@
+import itertools
+import math
+import time
+import unittest
+
+import numpy as np
+
+from app import graph_codec
+from app.schemas import Graph
+from app.services.graph_ir import GraphValidationError, compile_graph
+from app.services.scoring import GraphStructure
+from app.services.tuner import TuningTargets, optimize
+from app.services.simulation import engine
+
+
+def sample_nodes(api_replicas: int = 2) -> list[dict]:
+    return [
+        {"id": "lb-1", "type": "lb", "config": {}},
+        {"id": "api-1", "type": "api", "config": {"replicas": api_replicas}},
+        {"id": "db-1", "type": "db", "config": {"replicas": 2, "shards": 2}},
+        {"id": "cache-1", "type": "cache", "config": {}},
+        {"id": "queue-1", "type": "queue", "config": {}},
+    ]
+
+
+def sample_edges(queue_mode: str = "async") -> list[dict]:
+    return [
+        {"source": "lb-1", "target": "api-1", "mode": "sync"},
+        {"source": "api-1", "target": "cache-1", "mode": "sync"},
+        {"source": "api-1", "target": "db-1", "mode": "sync"},
+        {"source": "api-1", "target": "queue-1", "mode": queue_mode},
+    ]
+
+
+def layered_graph(node_count: int) -> tuple[list[dict], list[dict]]:
+    layer_types = ["lb", "api", "cache", "db"]
+    width = node_count // len(layer_types)
+    nodes = []
+    edges = []
+    for layer, node_type in enumerate(layer_types):
+        for index in range(width):
+            nodes.append({"id": f"{node_type}-{index}", "type": node_type, "config": {"replicas": 2}})
+            if layer:
+                parent = f"{layer_types[layer - 1]}-{index}"
+                edges.append({"source": parent, "target": f"{node_type}-{index}", "mode": "sync"})
+                if node_type == "db":
+                    edges.append({"source": f"api-{index}", "target": f"db-{index}", "mode": "sync"})
+    return nodes, edges
+
+
+class EngineTests(unittest.TestCase):
+    def test_per_node_outputs_follow_routing(self) -> None:
+        result = engine.run_simulation(sample_nodes(), sample_edges(), offered_rps=1800, seed=7)
+        throughput = dict(zip(result.node_ids, result.node_throughput_rps))
+
+        self.assertAlmostEqual(throughput["api-1"], 1800.0)
+        self.assertAlmostEqual(throughput["queue-1"], 1800.0)
+        self.assertAlmostEqual(throughput["db-1"], 1800.0 * (1 - engine.DEFAULT_CACHE_HIT_RATIO))
+        self.assertEqual(result.node_utilization.shape, (5,))
+        self.assertTrue((result.node_latency_p95_ms > 0).all())
+        self.assertFalse(result.saturated)
+
+    def test_replicas_raise_capacity(self) -> None:
+        small = engine.run_simulation(sample_nodes(api_replicas=1), sample_edges(), seed=7)
+        large = engine.run_simulation(sample_nodes(api_replicas=4), sample_edges(), seed=7)
+        self.assertGreater(large.throughput_rps, small.throughput_rps)
+        self.assertGreater(large.monthly_cost_usd, small.monthly_cost_usd)
+
+    def test_async_edges_are_off_the_request_path(self) -> None:
+        async_edges = [sample_edges("async")[index] for index in (0, 3)]
+        sync_edges = [sample_edges("sync")[index] for index in (0, 3)]
+        async_result = engine.run_simulation(sample_nodes(), async_edges, seed=7)
+        sync_result = engine.run_simulation(sample_nodes(), sync_edges, seed=7)
+        self.assertLess(async_result.latency_p95_ms, sync_result.latency_p95_ms)
+
+    def test_cycles_are_broken_instead_of_looping(self) -> None:
+        edges = sample_edges() + [{"source": "db-1", "target": "api-1", "mode": "sync"}]
+        result = engine.run_simulation(sample_nodes(), edges, seed=7)
+        throughput = dict(zip(result.node_ids, result.node_throughput_rps))
+        self.assertGreater(throughput["db-1"], 0.0)
+
+    def test_only_edges_on_a_cycle_are_dropped(self) -> None:
+        nodes = [
+            {"id": "lb-1", "type": "lb", "config": {}},
+            {"id": "api-1", "type": "api", "config": {}},
+            {"id": "api-2", "type": "api", "config": {}},
+            {"id": "db-1", "type": "db", "config": {}},
+        ]
+        pairs = [("lb-1", "api-1"), ("api-1", "api-2"), ("api-2", "api-1"), ("lb-1", "db-1"), ("api-2", "db-1")]
+        edges = [{"source": source, "target": target, "mode": "sync"} for source, target in pairs]
+        result = engine.run_simulation(nodes, edges, offered_rps=100, seed=7)
+
+        self.assertEqual(
+            [(result.node_ids[source], result.node_ids[target]) for source, target in result.analysis.cycle_edges],
+            [("api-2", "api-1")],
+        )
+        throughput = dict(zip(result.node_ids, result.node_throughput_rps))
+        self.assertAlmostEqual(throughput["db-1"], 200.0)
+
+    def test_critical_path_and_headroom_analysis(self) -> None:
+        edges = sample_edges() + [{"source": "db-1", "target": "api-1", "mode": "sync"}]
+        result = engine.run_simulation(sample_nodes(api_replicas=1), edges, seed=7)
+        analysis = result.analysis
+        path = [result.node_ids[node] for node in analysis.critical_path]
+        latency = dict(zip(result.node_ids, result.node_latency_p95_ms))
+
+        self.assertEqual(path, ["lb-1", "api-1", "db-1"])
+        self.assertAlmostEqual(analysis.critical_path_latency_ms, sum(latency[node] for node in path))
+        self.assertEqual(result.latency_p95_ms, math.ceil(analysis.critical_path_latency_ms))
+        self.assertEqual(result.node_ids[analysis.bottlenecks[0]], "api-1")
+        self.assertGreater(analysis.demand_utilization[analysis.bottlenecks[0]], 1.0)
+        self.assertEqual(
+            [(result.node_ids[source], result.node_ids[target]) for source, target in analysis.cycle_edges],
+            [("db-1", "api-1")],
+        )
+
+    def test_constant_profile_reproduces_steady_state(self) -> None:
+        compiled = engine.compile_graph(sample_nodes(), sample_edges())
+        steady = engine.simulate(compiled, 1800.0, seed=7)
+        profile = engine.simulate_profile(compiled, np.full(50, 1800.0), tick_s=0.1, seed=7, points=10)
+
+        self.assertEqual(profile.time_s.size, 10)
+        np.testing.assert_allclose(profile.served_rps, 1800.0)
+        self.assertEqual(profile.dropped_requests, 0.0)
+        np.testing.assert_allclose(profile.node_latency_p95_ms[:, 0], steady.node_latency_p95_ms)
+        self.assertAlmostEqual(math.ceil(profile.latency_p95_ms[0]), steady.latency_p95_ms)
+
+    def test_queue_absorbs_a_burst_that_a_sync_consumer_drops(self) -> None:
+        nodes = [
+            {"id": "lb-1", "type": "lb", "config": {}},
+            {"id": "api-1", "type": "api", "config": {"replicas": 8}},
+            {"id": "queue-1", "type": "queue", "config": {}},
+            {"id": "worker-1", "type": "api", "config": {}},
+        ]
+        queued = [
+            {"source": "lb-1", "target": "api-1", "mode": "sync"},
+            {"source": "api-1", "target": "queue-1", "mode": "sync"},
+            {"source": "queue-1", "target": "worker-1", "mode": "async"},
+        ]
+        direct = [queued[0], {"source": "api-1", "target": "worker-1", "mode": "sync"}]
+        load = np.full(600, 800.0)
+        load[100:150] = 3000.0
+
+        buffered = engine.simulate_profile(engine.compile_graph(nodes, queued), load, tick_s=0.1, seed=7, points=60)
+        backlog = buffered.backlog[2]
+        self.assertAlmostEqual(buffered.dropped_requests, 0.0, places=6)
+        self.assertGreater(backlog.max(), 0.0)
+        self.assertEqual(backlog[-1], 0.0)
+        self.assertEqual(int(np.argmax(backlog)), 14)
+
+        shedding = engine.simulate_profile(engine.compile_graph(nodes, direct), load, tick_s=0.1, seed=7, points=60)
+        # What the queue buffers, the sync consumer drops (up to each graph's capacity jitter).
+        self.assertAlmostEqual(shedding.dropped_requests / buffered.peak_backlog[2], 1.0, delta=engine.CAPACITY_JITTER)
+        self.assertGreater(shedding.drop_rate.max(), 0.4)
+
+    def test_large_graph_is_vectorized(self) -> None:
+        nodes, edges = layered_graph(5000)
+        started = time.perf_counter()
+        result = engine.run_simulation(nodes, edges, seed=7)
+        elapsed = time.perf_counter() - started
+        self.assertEqual(len(result.node_ids), 5000)
+        self.assertLess(elapsed, 1.0)
+
+    def test_batch_rows_match_single_runs_when_nodes_are_pruned(self) -> None:
+        nodes, edges = layered_graph(400)
+        for index, node in enumerate(nodes):
+            node["config"] = {"replicas": 1 + index % 4}
+        compiled = engine.compile_graph(nodes, edges)
+        self.assertLess(engine._batch_view(compiled, 1e5).node_count, compiled.node_count)
+        seeds = np.array([3, 17, 4242])
+        batch = engine.simulate_batch(compiled, seeds, offered_rps=1e5)
+        for row, seed in enumerate(seeds.tolist()):
+            single = engine.simulate(compiled, offered_rps=1e5, seed=seed)
+            self.assertEqual(batch.throughput_rps[row], single.throughput_rps)
+            self.assertEqual(batch.latency_p95_ms[row], single.latency_p95_ms)
+
+    def test_ten_thousand_seeds_of_a_thousand_node_graph_take_under_a_second(self) -> None:
+        # The documented bound: no node can be pruned from this graph, so every seed covers all of it.
+        nodes, edges = layered_graph(1000)
+        compiled = engine.compile_graph(nodes, edges)
+        started = time.perf_counter()
+        batch = engine.simulate_batch(compiled, np.arange(10_000))
+        elapsed = time.perf_counter() - started
+        self.assertEqual(batch.throughput_rps.size, 10_000)
+        self.assertLess(elapsed, 1.0)
+
+
+class TunerTests(unittest.TestCase):
+    def test_search_on_a_wide_graph_stays_near_the_time_budget(self) -> None:
+        nodes, edges = layered_graph(2000)
+        graph = Graph(nodes=nodes, edges=edges)
+        ir = compile_graph(graph)
+        started = time.perf_counter()
+        result = optimize(ir, graph, TuningTargets(2000, 200, 1e9), time_budget_s=0.1)
+        elapsed = time.perf_counter() - started
+        self.assertFalse(result.complete)
+        self.assertLess(elapsed, 0.5)
+
+
+def redundant_api_graph() -> tuple[list[dict], list[dict]]:
+    nodes = sample_nodes(api_replicas=1) + [{"id": "api-2", "type": "api", "config": {}}]
+    edges = sample_edges() + [
+        {"source": "lb-1", "target": "api-2", "mode": "sync"},
+        {"source": "api-2", "target": "db-1", "mode": "sync"},
+    ]
+    return nodes, edges
+
+
+class AvailabilityTests(unittest.TestCase):
+    def exact_availability(self, compiled: engine.CompiledGraph) -> float:
+        """Enumerate every up/down state of the nodes; only viable for tiny graphs."""
+        failure = 1.0 - engine.node_availability(compiled)
+        total = 0.0
+        for state in itertools.product((False, True), repeat=compiled.node_count):
+            up = np.array(state)
+            bits = np.where(up, np.uint64(0xFFFFFFFFFFFFFFFF), np.uint64(0))[:, None]
+            if engine._served_trials(compiled, bits)[0]:
+                total += float(np.prod(np.where(up, 1.0 - failure, failure)))
+        return total * 100.0
+
+    def test_estimate_interval_covers_exact_availability(self) -> None:
+        nodes, edges = redundant_api_graph()
+        compiled = engine.compile_graph(nodes, edges)
+        estimate = engine.estimate_availability(compiled)
+        exact = self.exact_availability(compiled)
+        self.assertLessEqual(estimate.ci_low_pct, exact)
+        self.assertGreaterEqual(estimate.ci_high_pct, exact)
+        self.assertEqual(estimate, engine.estimate_availability(compiled))
+
+        cut_sets = {tuple(compiled.node_ids[node] for node in cut) for cut in estimate.cut_sets}
+        # The cache is off the data path and the two APIs back each other up.
+        self.assertIn(("lb-1",), cut_sets)
+        self.assertIn(("db-1",), cut_sets)
+        self.assertIn(("api-1", "api-2"), cut_sets)
+        self.assertNotIn(("cache-1",), cut_sets)
+
+    def test_parallel_paths_beat_the_series_bound(self) -> None:
+        nodes, edges = redundant_api_graph()
+        result = engine.run_simulation(nodes, edges, seed=7)
+        compiled = engine.compile_graph(nodes, edges)
+        series = float(engine.node_availability(compiled)[compiled.on_request_path].prod()) * 100.0
+        self.assertGreater(result.availability_pct, series)
+        self.assertEqual(result.cut_sets[:2], (("lb-1",), ("db-1",)))
+
+
+class GraphIRTests(unittest.TestCase):
+    def test_ir_matches_engine_compile_and_canonical_hash(self) -> None:
+        graph = Graph(nodes=sample_nodes(), edges=sample_edges())
+        ir = compile_graph(graph)
+        compiled = engine.compile_graph(sample_nodes(), sample_edges())
+
+        self.assertEqual(ir.canonical_json, graph_codec.canonical_graph_json(graph.model_dump()))
+        self.assertEqual(ir.digest, engine.canonical_form(compiled).digest)
+        self.assertEqual(ir.structure, GraphStructure.from_graph(graph))
+        self.assertEqual(ir.compiled.indptr.tolist(), compiled.indptr.tolist())
+        from_ir = engine.simulate(ir.compiled, seed=3)
+        direct = engine.simulate(compiled, seed=3)
+        self.assertEqual(from_ir.throughput_rps, direct.throughput_rps)
+        self.assertEqual(from_ir.latency_p95_ms, direct.latency_p95_ms)
+        self.assertEqual(from_ir.monthly_cost_usd, direct.monthly_cost_usd)
+
+    def test_isomorphic_graphs_share_digest_and_metrics(self) -> None:
+        names = {"lb-1": "edge", "api-1": "web", "db-1": "primary", "cache-1": "redis", "queue-1": "jobs"}
+        renamed_nodes = [{**node, "id": names[node["id"]]} for node in reversed(sample_nodes())]
+        renamed_edges = [
+            {**edge, "source": names[edge["source"]], "target": names[edge["target"]]}
+            for edge in reversed(sample_edges())
+        ]
+        original = compile_graph(Graph(nodes=sample_nodes(), edges=sample_edges()))
+        renamed = compile_graph(Graph(nodes=renamed_nodes, edges=renamed_edges))
+
+        self.assertNotEqual(original.canonical_json, renamed.canonical_json)
+        self.assertEqual(original.digest, renamed.digest)
+        first = engine.simulate(original.compiled, seed=3)
+        second = engine.simulate(renamed.compiled, seed=3)
+        self.assertEqual(
+            (first.throughput_rps, first.latency_p95_ms, first.availability_pct, first.availability_ci_pct),
+            (second.throughput_rps, second.latency_p95_ms, second.availability_pct, second.availability_ci_pct),
+        )
+        self.assertEqual(
+            [[names[node] for node in cut] for cut in first.cut_sets], [list(cut) for cut in second.cut_sets]
+        )
+
+        for nodes, edges in (
+            (sample_nodes(api_replicas=3), sample_edges()),
+            (sample_nodes(), sample_edges("sync")),
+            (sample_nodes(), sample_edges() + [{"source": "db-1", "target": "api-1", "mode": "sync"}]),
+        ):
+            self.assertNotEqual(compile_graph(Graph(nodes=nodes, edges=edges)).digest, original.digest)
+
+    def test_digest_separates_graphs_refinement_cannot(self) -> None:
+        # An 8-cycle and two 4-cycles between api and db nodes: every node has
+        # the same neighbourhood colors, so only the edges tell them apart.
+        nodes = [{"id": f"{node_type}-{i}", "type": node_type} for node_type in ("api", "db") for i in range(4)]
+
+        def digest(pairs: list[tuple[int, int]]) -> str:
+            edges = [{"source": f"api-{a}", "target": f"db-{b}"} for a, b in pairs]
+            return compile_graph(Graph(nodes=nodes, edges=edges)).digest
+
+        ring = [(i, i) for i in range(4)] + [(i, (i + 1) % 4) for i in range(4)]
+        squares = [(0, 0), (0, 1), (1, 0), (1, 1), (2, 2), (2, 3), (3, 2), (3, 3)]
+        self.assertNotEqual(digest(ring), digest(squares))
+        self.assertEqual(digest(ring), digest([(i, i) for i in range(4)] + [(i, (i + 3) % 4) for i in range(4)]))
+
+    def test_renamed_symmetric_designs_share_a_digest(self) -> None:
+        nodes, edges = layered_graph(400)
+        names = {node["id"]: f"node-{(index * 7919) % len(nodes)}" for index, node in enumerate(nodes)}
+        renamed_nodes = [{**node, "id": names[node["id"]]} for node in reversed(nodes)]
+        renamed_edges = [
+            {**edge, "source": names[edge["source"]], "target": names[edge["target"]]} for edge in reversed(edges)
+        ]
+        original = compile_graph(Graph(nodes=nodes, edges=edges))
+        renamed = compile_graph(Graph(nodes=renamed_nodes, edges=renamed_edges))
+        self.assertEqual(original.digest, renamed.digest)
+
+    def test_oversized_counts_compile_at_the_documented_maximum(self) -> None:
+        nodes = sample_nodes()
+        nodes[2]["config"] = {"replicas": 10**20, "shards": 10**20}
+        ir = compile_graph(Graph(nodes=nodes, edges=sample_edges()))
+
+        self.assertEqual(ir.compiled.replicas[2], engine.MAX_NODE_UNITS)
+        self.assertEqual(ir.compiled.shards[2], engine.MAX_NODE_UNITS)
+        self.assertTrue(ir.structure.replicated_critical)
+
+    def test_invalid_graphs_are_rejected_during_compile(self) -> None:
+        node = {"id": "api-1", "type": "api"}
+        for graph in (
+            Graph(),
+            Graph(nodes=[node, node]),
+            Graph(nodes=[node], edges=[{"source": "api-1", "target": "db-1"}]),
+        ):
+            with self.assertRaises(GraphValidationError):
+                compile_graph(graph)
+
+
+if __name__ == "__main__":
+    unittest.main()
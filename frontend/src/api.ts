@@ -1,6 +1,23 @@
-import type { BestScore, Challenge, RunRecord, RunRequest, RunResult } from "./types";
+import type {
+  BestScore,
+  Challenge,
+  Leaderboard,
+  LeaderboardStanding,
+  OptimizeRequest,
+  OptimizeResult,
+  PreviewRequest,
+  PreviewResult,
+  ProfileRequest,
+  ProfileResult,
+  RunRecord,
+  RunRequest,
+  RunResult,
+  SweepRequest,
+  SweepResult,
+} from "./types";
 
 const API_BASE = "http://127.0.0.1:8000";
+const PREVIEW_DEBOUNCE_MS = 150;
 
 async function request<T>(path: string, init?: RequestInit): Promise<T> {
   const response = await fetch(`${API_BASE}${path}`, {
@@ -42,6 +59,85 @@ export function evaluateRun(payload: RunRequest): Promise<RunResult> {
   });
 }
 
+export function previewRun(payload: PreviewRequest, signal?: AbortSignal): Promise<PreviewResult> {
+  return request<PreviewResult>("/runs/preview", {
+    method: "POST",
+    body: JSON.stringify(payload),
+    signal,
+  });
+}
+
+export interface PreviewScheduler {
+  schedule(payload: PreviewRequest): void;
+  cancel(): void;
+}
+
+/**
+ * Debounced ``previewRun`` for live editing: each ``schedule`` restarts the
+ * timer and aborts the request in flight, so only the latest graph is ever
+ * evaluated and superseded responses never reach the callbacks.
+ */
+export function createPreviewScheduler(
+  onResult: (result: PreviewResult) => void,
+  onError: (error: unknown) => void,
+  delayMs: number = PREVIEW_DEBOUNCE_MS,
+): PreviewScheduler {
+  let timer: ReturnType<typeof setTimeout> | undefined;
+  let inFlight: AbortController | undefined;
+
+  function cancel(): void {
+    clearTimeout(timer);
+    timer = undefined;
+    inFlight?.abort();
+    inFlight = undefined;
+  }
+
+  function schedule(payload: PreviewRequest): void {
+    cancel();
+    timer = setTimeout(() => {
+      const controller = new AbortController();
+      inFlight = controller;
+      previewRun(payload, controller.signal).then(
+        (result) => {
+          if (!controller.signal.aborted) {
+            inFlight = undefined;
+            onResult(result);
+          }
+        },
+        (error: unknown) => {
+          if (!controller.signal.aborted) {
+            inFlight = undefined;
+            onError(error);
+          }
+        },
+      );
+    }, delayMs);
+  }
+
+  return { schedule, cancel };
+}
+
+export function optimizeDesign(challengeSlug: string, payload: OptimizeRequest): Promise<OptimizeResult> {
+  return request<OptimizeResult>(`/challenges/${encodeURIComponent(challengeSlug)}/optimize`, {
+    method: "POST",
+    body: JSON.stringify(payload),
+  });
+}
+
+export function sweepLoad(payload: SweepRequest): Promise<SweepResult> {
+  return request<SweepResult>("/runs/sweep", {
+    method: "POST",
+    body: JSON.stringify(payload),
+  });
+}
+
+export function profileLoad(payload: ProfileRequest): Promise<ProfileResult> {
+  return request<ProfileResult>("/runs/profile", {
+    method: "POST",
+    body: JSON.stringify(payload),
+  });
+}
+
 export function getRuns(challengeSlug?: string): Promise<RunRecord[]> {
   if (!challengeSlug) {
     return request<RunRecord[]>("/runs");
@@ -53,3 +149,16 @@ export function getBestScores(): Promise<BestScore[]> {
   return request<BestScore[]>("/best-scores");
 }
 
+export function getLeaderboard(challengeSlug: string, limit = 50): Promise<Leaderboard> {
+  return request<Leaderboard>(`/leaderboards/${encodeURIComponent(challengeSlug)}?limit=${limit}`);
+}
+
+export function getLeaderboardStanding(
+  challengeSlug: string,
+  userId: string,
+  neighbors = 5
+): Promise<LeaderboardStanding> {
+  return request<LeaderboardStanding>(
+    `/leaderboards/${encodeURIComponent(challengeSlug)}/users/${encodeURIComponent(userId)}?neighbors=${neighbors}`
+  );
+}
@@ -1,10 +1,19 @@
-import React, { FormEvent, useEffect, useMemo, useState } from "react";
+import React, { FormEvent, useEffect, useMemo, useRef, useState } from "react";
 import { createRoot } from "react-dom/client";
 
-import { evaluateRun, getBestScores, getChallenges, getRuns } from "./api";
+import { createPreviewScheduler, evaluateRun, getBestScores, getChallenges, getRuns } from "./api";
 import "./main.css";
 import { loadDraftGraph, loadLastSeed, saveDraftGraph, saveLastSeed } from "./storage";
-import type { BestScore, Challenge, EdgeMode, Graph, NodeType, RunRecord, RunResult } from "./types";
+import type {
+  BestScore,
+  Challenge,
+  EdgeMode,
+  Graph,
+  NodeType,
+  PreviewResult,
+  RunRecord,
+  RunResult,
+} from "./types";
 
 const NODE_TYPES: NodeType[] = ["lb", "api", "db", "cache", "queue", "cdn", "object_store"];
 const EDGE_MODES: EdgeMode[] = ["sync", "async"];
@@ -48,6 +57,10 @@ function App() {
   const [compareDelta, setCompareDelta] = useState<CompareDelta | null>(null);
   const [loadedRunId, setLoadedRunId] = useState<number | null>(null);
   const [historyScope, setHistoryScope] = useState<"selected" | "all">("selected");
+  const [preview, setPreview] = useState<PreviewResult | null>(null);
+  const previewScheduler = useRef(
+    createPreviewScheduler(setPreview, () => setPreview(null))
+  );
 
   const [nodeDraft, setNodeDraft] = useState({
     id: "",
@@ -134,6 +147,18 @@ function App() {
     saveLastSeed(selectedSlug, seed);
   }, [selectedSlug, seed]);
 
+  useEffect(() => {
+    const scheduler = previewScheduler.current;
+    if (!selectedSlug || graph.nodes.length === 0) {
+      scheduler.cancel();
+      setPreview(null);
+      return;
+    }
+    scheduler.schedule({ challenge_slug: selectedSlug, graph, seed });
+  }, [selectedSlug, graph, seed]);
+
+  useEffect(() => () => previewScheduler.current.cancel(), []);
+
   function resetDraftsWithNode(nodeId: string): void {
     setNodeDraft((prev) => ({ ...prev, id: "" }));
     setEdgeDraft((prev) => ({
@@ -519,6 +544,12 @@ function App() {
 
         <section className="panel">
           <h2>Run Results</h2>
+          {preview && (
+            <p className="muted">
+              Live preview: {preview.metrics.throughput_rps} rps, {preview.metrics.latency_p95_ms} ms p95,{" "}
+              {preview.metrics.availability_pct}% available, score {preview.score.total}
+            </p>
+          )}
           {!result ? (
             <p className="muted">Run a simulation to see metrics and score.</p>
           ) : (
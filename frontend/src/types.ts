@@ -41,6 +41,13 @@ export interface RunRequest {
   challenge_slug: string;
   graph: Graph;
   seed: number;
+  user_id?: string;
+}
+
+export interface PreviewRequest {
+  challenge_slug: string;
+  graph: Graph;
+  seed?: number;
 }
 
 export interface Metrics {
@@ -48,6 +55,23 @@ export interface Metrics {
   latency_p95_ms: number;
   availability_pct: number;
   monthly_cost_usd: number;
+  availability_ci_pct?: [number, number] | null;
+  cut_sets?: string[][];
+  analysis?: PathAnalysis | null;
+}
+
+export interface NodeLoad {
+  node_id: string;
+  utilization: number;
+  headroom: number;
+  on_critical_path: boolean;
+}
+
+export interface PathAnalysis {
+  critical_path: string[];
+  critical_path_latency_ms: number;
+  bottlenecks: NodeLoad[];
+  cycle_edges: Edge[];
 }
 
 export interface ScoreBreakdown {
@@ -66,6 +90,15 @@ export interface RunResult {
   metrics: Metrics;
   score: ScoreBreakdown;
   created_at: string;
+  parent_run_id: number | null;
+  user_id: string;
+}
+
+export interface PreviewResult {
+  challenge_slug: string;
+  seed: number;
+  metrics: Metrics;
+  score: ScoreBreakdown;
 }
 
 export interface RunRecord extends RunResult {
@@ -79,3 +112,122 @@ export interface BestScore {
   updated_at: string;
 }
 
+export interface LeaderboardEntry {
+  rank: number;
+  user_id: string;
+  total: number;
+  run_id: number;
+  updated_at: string;
+}
+
+export interface Leaderboard {
+  challenge_slug: string;
+  players: number;
+  entries: LeaderboardEntry[];
+}
+
+export interface LeaderboardStanding extends Leaderboard {
+  user_id: string;
+  rank: number;
+}
+
+export interface OptimizeRequest {
+  graph: Graph;
+  seed?: number;
+  time_budget_ms?: number;
+  max_replicas?: number;
+  max_shards?: number;
+  min_availability_pct?: number | null;
+  frontier_limit?: number;
+}
+
+export interface NodeSizing {
+  id: string;
+  replicas: number;
+  shards: number | null;
+}
+
+export interface DesignCandidate {
+  nodes: NodeSizing[];
+  metrics: Metrics;
+  meets_targets: boolean;
+}
+
+export interface OptimizeResult {
+  challenge_slug: string;
+  feasible: boolean;
+  best: DesignCandidate | null;
+  best_graph: Graph | null;
+  frontier: DesignCandidate[];
+  candidates_evaluated: number;
+  candidates_pruned: number;
+  search_complete: boolean;
+  elapsed_ms: number;
+}
+
+export interface SweepRequest {
+  challenge_slug: string;
+  graph: Graph;
+  seed?: number;
+  start_rps?: number;
+  stop_rps?: number;
+  steps?: number;
+}
+
+export interface SweepPoint {
+  offered_rps: number;
+  throughput_rps: number;
+  latency_p95_ms: number;
+  saturated: boolean;
+  bottleneck_node: string;
+  bottleneck_utilization: number;
+}
+
+export interface SweepResult {
+  challenge_slug: string;
+  target_throughput: number;
+  saturation_rps: number;
+  saturation_node: string;
+  knee_rps: number | null;
+  points: SweepPoint[];
+}
+
+export type TrafficEvent =
+  | { kind: "burst"; start_s: number; duration_s: number; rps: number }
+  | { kind: "step"; start_s: number; rps: number }
+  | { kind: "diurnal"; amplitude_rps: number; period_s?: number | null; phase_s?: number };
+
+export interface ProfileRequest {
+  challenge_slug: string;
+  graph: Graph;
+  seed?: number;
+  base_rps?: number;
+  duration_s?: number;
+  tick_ms?: number;
+  events?: TrafficEvent[];
+  points?: number;
+  node_ids?: string[];
+}
+
+export interface NodeSeries {
+  node_id: string;
+  backlog: number[];
+  drop_rate: number[];
+  latency_p95_ms: number[];
+  peak_backlog: number;
+  dropped_requests: number;
+}
+
+export interface ProfileResult {
+  challenge_slug: string;
+  tick_ms: number;
+  bucket_s: number;
+  time_s: number[];
+  offered_rps: number[];
+  served_rps: number[];
+  drop_rate: number[];
+  latency_p95_ms: number[];
+  dropped_requests: number;
+  peak_latency_p95_ms: number;
+  nodes: NodeSeries[];
+}
@@ -1,6 +1,146 @@
-"""Deterministic simulation runner stub for MVP."""
+"""Graph-aware queueing-network simulation engine."""
 
-from dataclasses import dataclass
+from __future__ import annotations
+
+import hashlib
+import math
+from dataclasses import dataclass, replace
+from typing import Any, Iterable, Mapping
+
+import numpy as np
+
+# Bump whenever model parameters or math change; cached results are keyed on it.
+ENGINE_VERSION = "6"
+
+NODE_TYPES = ("lb", "api", "db", "cache", "queue", "cdn", "object_store")
+TYPE_CODES = {node_type: code for code, node_type in enumerate(NODE_TYPES)}
+
+# Per-type station parameters, indexed by type code.
+REPLICA_CAPACITY_RPS = np.array([20000.0, 1500.0, 600.0, 8000.0, 5000.0, 20000.0, 1500.0])
+SERVICE_TIME_MS = np.array([0.5, 6.0, 4.0, 0.5, 1.0, 2.0, 15.0])
+REPLICA_AVAILABILITY = np.array([0.9995, 0.995, 0.995, 0.998, 0.999, 0.9999, 0.9999])
+REPLICA_MONTHLY_COST_USD = np.array([60.0, 120.0, 250.0, 90.0, 80.0, 110.0, 70.0])
+EDGE_MONTHLY_COST_USD = 8.0
+
+ENTRY_TYPES = frozenset({"lb", "api", "cdn"})
+STORAGE_TYPES = frozenset({"db", "object_store"})
+DEFAULT_CACHE_HIT_RATIO = 0.8
+CDN_HIT_RATIO = 0.9
+DEFAULT_OFFERED_RPS = 2000.0
+
+CAPACITY_JITTER = 0.1
+MAX_UTILIZATION = 0.99
+P95_FACTOR = math.log(20.0)
+MAX_AVAILABILITY_PCT = 99.99
+BATCH_CELL_LIMIT = 2_000_000
+# Relative widening of the per-node bounds ``_batch_view`` prunes with, far
+# above the rounding error of the float64 model.
+_BOUND_SLACK = 1e-9
+# Replicas and shards above this are clamped so every count fits ``int64`` arithmetic.
+MAX_NODE_UNITS = 1_000_000
+
+AVAILABILITY_TRIALS = 1 << 16
+MIN_AVAILABILITY_TRIALS = 1 << 10
+# Every design is sampled with the same stream (common random numbers), so
+# availability is a function of the design alone and comparisons between
+# designs are not swamped by sampling noise.
+AVAILABILITY_SEED = 0x5EED
+CONFIDENCE_Z = 1.959964
+MAX_CUT_SET_PAIRS = 1 << 12
+# Upper bound on ``nodes x words`` for availability bitmasks; large graphs get fewer trials.
+AVAILABILITY_CELL_LIMIT = 1 << 17
+MAX_REPORTED_CUT_SETS = 10
+MAX_REPORTED_BOTTLENECKS = 5
+# Salts that keep edge labels and incoming-neighbour sums apart from node colors.
+_WL_EDGE_SALT = 0x5851F42D4C957F2D
+_WL_INCOMING_SALT = 0x2545F4914F6CDD1D
+_WL_INDIVIDUAL_SALT = 0x61C8864680B583EB
+_WL_COMPONENT_SALT = 0x1B873593CC9E2D51
+# Upper bound on ``rounds x (nodes + edges)`` spent splitting ties left by refinement;
+# ties still left after it keep node order, which only costs cache hits.
+INDIVIDUALIZATION_CELL_LIMIT = 1 << 19
+# Edges into the same target beyond this rank are summed with ``reduceat`` in the fluid model.
+FLOW_RANK_LIMIT = 8
+_ALL_TRIALS = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+_CDN_CODE = TYPE_CODES["cdn"]
+_CACHE_CODE = TYPE_CODES["cache"]
+_DB_CODE = TYPE_CODES["db"]
+_QUEUE_CODE = TYPE_CODES["queue"]
+_ENTRY_CODES = np.array(sorted(TYPE_CODES[node_type] for node_type in ENTRY_TYPES))
+_STORAGE_CODES = np.array(sorted(TYPE_CODES[node_type] for node_type in STORAGE_TYPES))
+
+
+def _safe_positive_int(raw: Any, default: int = 1) -> int:
+    try:
+        parsed = int(raw)
+    except (TypeError, ValueError, OverflowError):
+        return default
+    return min(parsed, MAX_NODE_UNITS) if parsed > 0 else default
+
+
+def _safe_ratio(raw: Any, default: float) -> float:
+    try:
+        parsed = float(raw)
+    except (TypeError, ValueError):
+        return default
+    return parsed if 0.0 <= parsed < 1.0 else default
+
+
+@dataclass(frozen=True)
+class CompiledGraph:
+    """Array form of a graph plus everything about it that does not depend on load or seed."""
+
+    node_ids: tuple[str, ...]
+    node_keys: np.ndarray
+    type_codes: np.ndarray
+    replicas: np.ndarray
+    shards: np.ndarray
+    cache_hit_ratio: np.ndarray
+    servers: np.ndarray
+    src: np.ndarray
+    dst: np.ndarray
+    sync: np.ndarray
+    indptr: np.ndarray
+    level: np.ndarray
+    forward: np.ndarray
+    entries: np.ndarray
+    visits: np.ndarray
+    edge_weight: np.ndarray
+    on_request_path: np.ndarray
+    latency_levels: tuple[tuple[np.ndarray, np.ndarray, np.ndarray], ...]
+    reach_levels: tuple[tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray], ...]
+    availability_targets: np.ndarray
+
+    @property
+    def node_count(self) -> int:
+        return int(self.type_codes.size)
+
+    @property
+    def edge_count(self) -> int:
+        return int(self.src.size)
+
+
+@dataclass(frozen=True)
+class AvailabilityEstimate:
+    """Monte Carlo availability with a 95% Wilson interval."""
+
+    availability_pct: float
+    ci_low_pct: float
+    ci_high_pct: float
+    trials: int
+    cut_sets: tuple[tuple[int, ...], ...]
+
+
+@dataclass(frozen=True)
+class PathAnalysis:
+    """Where one simulated design spends its latency and capacity; nodes and edges are indices."""
+
+    critical_path: np.ndarray
+    critical_path_latency_ms: float
+    demand_utilization: np.ndarray
+    bottlenecks: np.ndarray
+    cycle_edges: np.ndarray
 
 
 @dataclass
@@ -8,8 +148,1194 @@ class SimulationResult:
     throughput_rps: int
     latency_p95_ms: int
     availability_pct: float
+    monthly_cost_usd: float
+    offered_rps: float
+    saturated: bool
+    node_ids: tuple[str, ...]
+    node_utilization: np.ndarray
+    node_throughput_rps: np.ndarray
+    node_latency_p95_ms: np.ndarray
+    availability_ci_pct: tuple[float, float]
+    cut_sets: tuple[tuple[str, ...], ...]
+    analysis: PathAnalysis
+
+
+@dataclass
+class ConfigBatchResult:
+    """Metrics for many replica/shard assignments of one graph; row ``i`` is config ``i``."""
+
+    throughput_rps: np.ndarray
+    latency_p95_ms: np.ndarray
+    availability_pct: np.ndarray
+    monthly_cost_usd: np.ndarray
+
+
+@dataclass
+class LoadRampResult:
+    """One graph and seed under a ramp of offered loads; arrays are indexed by ramp step."""
+
+    offered_rps: np.ndarray
+    throughput_rps: np.ndarray
+    latency_p95_ms: np.ndarray
+    saturated: np.ndarray
+    bottleneck: np.ndarray
+    bottleneck_utilization: np.ndarray
+    saturation_rps: int
+    saturation_node: int
+
+
+@dataclass
+class ProfileResult:
+    """Fluid simulation of one graph under a time-varying load."""
+
+    tick_s: float
+    ticks_per_point: int
+    time_s: np.ndarray
+    offered_rps: np.ndarray
+    served_rps: np.ndarray
+    drop_rate: np.ndarray
+    latency_p95_ms: np.ndarray
+    dropped_requests: float
+    tracked: np.ndarray
+    backlog: np.ndarray
+    node_drop_rate: np.ndarray
+    node_latency_p95_ms: np.ndarray
+    peak_backlog: np.ndarray
+    dropped: np.ndarray
+    peak_latency_p95_ms: np.ndarray
+
+
+@dataclass
+class BatchSimulationResult:
+    seeds: np.ndarray
+    throughput_rps: np.ndarray
+    latency_p95_ms: np.ndarray
+    availability_pct: np.ndarray
+    monthly_cost_usd: np.ndarray
+
+
+def _out_edges(indptr: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+    """Indices of all CSR edges leaving ``nodes``, without a Python loop."""
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    exclusive = np.cumsum(counts) - counts
+    return np.repeat(starts - exclusive, counts) + np.arange(total)
+
+
+def _topological_levels(
+    node_count: int, src: np.ndarray, dst: np.ndarray, indptr: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Kahn-style level assignment that breaks cycles instead of failing, dropping only edges on a cycle."""
+    indegree = np.bincount(dst, minlength=node_count)
+    level = np.full(node_count, -1, dtype=np.int64)
+    forward = np.ones(src.size, dtype=bool)
+    reached = np.zeros(node_count, dtype=bool)
+    frontier = np.flatnonzero(indegree == 0)
+    component: np.ndarray | None = None
+    remaining = node_count
+    depth = 0
+
+    while remaining:
+        if frontier.size == 0:
+            if component is None:
+                component = _strong_components(indptr, dst, level < 0)
+            frontier = _cycle_entries(level, reached, component, src, dst)
+        level[frontier] = depth
+        remaining -= frontier.size
+
+        edge_idx = _out_edges(indptr, frontier)
+        targets = dst[edge_idx]
+        closing = level[targets] >= 0
+        forward[edge_idx[closing]] = False
+        targets = targets[~closing]
+        reached[targets] = True
+        np.subtract.at(indegree, targets, 1)
+        candidates = np.unique(targets)
+        frontier = candidates[indegree[candidates] == 0]
+        depth += 1
+
+    return level, forward
+
+
+def _strong_components(indptr: np.ndarray, dst: np.ndarray, active: np.ndarray) -> np.ndarray:
+    """Tarjan's strongly connected components of the subgraph on ``active`` nodes; ``-1`` elsewhere."""
+    starts, targets, is_active = indptr.tolist(), dst.tolist(), active.tolist()
+    component = [-1] * active.size
+    index = [-1] * active.size
+    low = [0] * active.size
+    on_stack = [False] * active.size
+    stack: list[int] = []
+    counter = components = 0
+    for root in np.flatnonzero(active).tolist():
+        if index[root] >= 0:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, starts[root])]
+        while work:
+            node, edge = work[-1]
+            end = starts[node + 1]
+            while edge < end and not is_active[targets[edge]]:
+                edge += 1
+            if edge < end:
+                work[-1] = (node, edge + 1)
+                child = targets[edge]
+                if index[child] < 0:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack[child] = True
+                    work.append((child, starts[child]))
+                elif on_stack[child]:
+                    low[node] = min(low[node], index[child])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component[member] = components
+                    if member == node:
+                        break
+                components += 1
+    return np.array(component, dtype=np.int64)
+
+
+def _cycle_entries(
+    level: np.ndarray, reached: np.ndarray, component: np.ndarray, src: np.ndarray, dst: np.ndarray
+) -> np.ndarray:
+    """Nodes to release when Kahn's frontier runs dry: the reached nodes of cycles no other open cycle feeds."""
+    open_nodes = level < 0
+    crossing = open_nodes[src] & open_nodes[dst] & (component[src] != component[dst])
+    source = open_nodes & ~np.isin(component, component[dst[crossing]])
+    pending = np.flatnonzero(source & reached)
+    return pending if pending.size else np.flatnonzero(source)[:1]
+
+
+def _level_slices(edge_idx: np.ndarray, edge_level: np.ndarray) -> list[np.ndarray]:
+    if edge_idx.size == 0:
+        return []
+    order = np.argsort(edge_level, kind="stable")
+    ordered = edge_idx[order]
+    bounds = np.flatnonzero(np.diff(edge_level[order])) + 1
+    return np.split(ordered, bounds)
+
+
+def server_counts(type_codes: np.ndarray, replicas: np.ndarray, shards: np.ndarray) -> np.ndarray:
+    """Servers per node: replicas, times shards for databases.  Broadcasts over leading axes."""
+    return replicas * np.where(type_codes == _DB_CODE, shards, 1)
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer: a bijective scramble of ``uint64`` arrays (array arithmetic wraps silently)."""
+    mixed = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    mixed = (mixed ^ (mixed >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return mixed ^ (mixed >> np.uint64(31))
+
+
+def _edge_labels(sync: np.ndarray, forward: np.ndarray) -> np.ndarray:
+    return _mix64(sync.astype(np.uint64) * np.uint64(2) + forward.astype(np.uint64) + np.uint64(_WL_EDGE_SALT))
+
+
+def _distinct(values: np.ndarray) -> int:
+    # Sorting beats ``np.unique``, which hashes 64-bit integers slowly.
+    ordered = np.sort(values)
+    return int(np.count_nonzero(ordered[1:] != ordered[:-1])) + min(ordered.size, 1)
+
+
+def _refine_colors(colors: np.ndarray, src: np.ndarray, dst: np.ndarray, edge_labels: np.ndarray) -> np.ndarray:
+    """Weisfeiler-Lehman refinement of ``uint64`` node colors until the partition stops splitting."""
+    classes = _distinct(colors)
+    while True:
+        outgoing = np.zeros_like(colors)
+        incoming = np.zeros_like(colors)
+        np.add.at(outgoing, src, _mix64(colors[dst] ^ edge_labels))
+        np.add.at(incoming, dst, _mix64((colors[src] ^ edge_labels) + np.uint64(_WL_INCOMING_SALT)))
+        refined = _mix64(colors * np.uint64(0x9E3779B97F4A7C15) + _mix64(outgoing) + _mix64(~incoming))
+        refined_classes = _distinct(refined)
+        # The confirming round is kept even when it splits nothing: its
+        # colors are what carry the neighbourhoods into the result.
+        if refined_classes == classes:
+            return refined
+        colors, classes = refined, refined_classes
+
+
+def _topology_colors(
+    type_codes: np.ndarray,
+    cache_hit_ratio: np.ndarray,
+    level: np.ndarray,
+    src: np.ndarray,
+    dst: np.ndarray,
+    sync: np.ndarray,
+    forward: np.ndarray,
+) -> np.ndarray:
+    labels = _mix64(
+        type_codes.astype(np.uint64) * np.uint64(0x100000001B3)
+        + level.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        + _mix64(cache_hit_ratio.astype(np.float64).view(np.uint64))
+    )
+    return _refine_colors(labels, src, dst, _edge_labels(sync, forward))
+
+
+def _components(node_count: int, src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """Weakly connected component of every node, named by its smallest node index."""
+    parent = np.arange(node_count)
+    while True:
+        low = np.minimum(parent[src], parent[dst])
+        hooked = parent.copy()
+        np.minimum.at(hooked, parent[src], low)
+        np.minimum.at(hooked, parent[dst], low)
+        while not np.array_equal(jumped := hooked[hooked], hooked):
+            hooked = jumped
+        if np.array_equal(hooked, parent):
+            return parent
+        parent = hooked
+
+
+def _rank_components(colors: np.ndarray, src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """Mix into ``colors`` each node's component rank; identical components get consecutive ranks."""
+    component = _components(colors.size, src, dst)
+    component_colors = np.zeros_like(colors)
+    np.add.at(component_colors, component, _mix64(colors))
+    roots = np.flatnonzero(component == np.arange(colors.size))
+    rank = np.empty(colors.size, dtype=np.uint64)
+    rank[roots[np.lexsort((roots, component_colors[roots]))]] = np.arange(roots.size, dtype=np.uint64)
+    return _mix64(colors ^ _mix64(rank[component] + np.uint64(_WL_COMPONENT_SALT)))
+
+
+def _individualize(colors: np.ndarray, src: np.ndarray, dst: np.ndarray, edge_labels: np.ndarray) -> np.ndarray:
+    """Split ties in refined colors: first between components, then by individualization-refinement."""
+    # Tied nodes with the same neighbours (twins) stay tied: swapping them maps the graph onto itself.
+    nodes = np.arange(colors.size, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    outgoing = np.zeros_like(colors)
+    incoming = np.zeros_like(colors)
+    np.add.at(outgoing, src, _mix64(nodes[dst] ^ edge_labels))
+    np.add.at(incoming, dst, _mix64((nodes[src] ^ edge_labels) + np.uint64(_WL_INCOMING_SALT)))
+    neighbours = _mix64(outgoing + _mix64(~incoming))
+
+    def first_tie() -> np.ndarray:
+        """The first node of the lowest color class whose nodes have different neighbours."""
+        order = np.argsort(colors)
+        ranked = colors[order]
+        starts = np.flatnonzero(np.concatenate(([True], ranked[1:] != ranked[:-1])))
+        if starts.size == colors.size:
+            return order[:0]
+        keys = neighbours[order]
+        split = np.minimum.reduceat(keys, starts) != np.maximum.reduceat(keys, starts)
+        return order[starts[np.argmax(split)] :][:1] if split.any() else order[:0]
+
+    if not first_tie().size:
+        return colors
+    colors = _rank_components(colors, src, dst)
+    for _ in range(max(1, INDIVIDUALIZATION_CELL_LIMIT // (colors.size + src.size + 1))):
+        chosen = first_tie()
+        if not chosen.size:
+            break
+        colors = colors.copy()
+        colors[chosen] = _mix64(colors[chosen] + np.uint64(_WL_INDIVIDUAL_SALT))
+        colors = _refine_colors(colors, src, dst, edge_labels)
+    return colors
+
+
+@dataclass(frozen=True)
+class CanonicalForm:
+    """Naming-independent identity of a compiled graph."""
+
+    digest: str
+    order: np.ndarray
+
+
+def canonical_form(compiled: CompiledGraph) -> CanonicalForm:
+    """Refine ``compiled.node_keys`` with each node's sizing, then hash the graph in the refined order."""
+    labels = _mix64(
+        compiled.node_keys
+        + _mix64(compiled.replicas.astype(np.uint64) * np.uint64(0x100000001B3) + compiled.shards.astype(np.uint64))
+    )
+    edge_labels = _edge_labels(compiled.sync, compiled.forward)
+    colors = _refine_colors(labels, compiled.src, compiled.dst, edge_labels)
+    colors = _individualize(colors, compiled.src, compiled.dst, edge_labels)
+    order = np.argsort(colors, kind="stable")
+    rank = np.empty(compiled.node_count, dtype=np.uint64)
+    rank[order] = np.arange(compiled.node_count, dtype=np.uint64)
+    # One sortable key per edge: (source rank, target rank, sync, forward).
+    edges = np.sort(
+        (rank[compiled.src] * np.uint64(compiled.node_count) + rank[compiled.dst]) * np.uint64(4)
+        + compiled.sync.astype(np.uint64) * np.uint64(2)
+        + compiled.forward.astype(np.uint64)
+    )
+    header = np.array([compiled.node_count, compiled.edge_count], dtype=np.uint64)
+    digest = hashlib.sha256(header.tobytes() + labels[order].tobytes() + edges.tobytes()).hexdigest()
+    return CanonicalForm(digest=digest, order=order)
+
+
+def build_compiled_graph(
+    node_ids: tuple[str, ...],
+    type_codes: np.ndarray,
+    replicas: np.ndarray,
+    shards: np.ndarray,
+    cache_hit_ratio: np.ndarray,
+    src: np.ndarray,
+    dst: np.ndarray,
+    sync: np.ndarray,
+) -> CompiledGraph:
+    """Derive routing, visit ratios and level schedules from raw node/edge arrays."""
+    node_count = int(type_codes.size)
+    order = np.argsort(src, kind="stable")
+    src, dst, sync = src[order], dst[order], sync[order]
+    indptr = np.zeros(node_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=node_count), out=indptr[1:])
+
+    level, forward = _topological_levels(node_count, src, dst, indptr)
+    servers = server_counts(type_codes, replicas, shards)
+
+    # Routing: a node splits its output evenly across targets of the same type
+    # and fans out to each distinct target type.  Caches and CDNs absorb part of
+    # the traffic that would otherwise reach storage.
+    dst_types = type_codes[dst]
+    group_key = src * len(NODE_TYPES) + dst_types
+    _, group_inverse, group_sizes = np.unique(group_key, return_inverse=True, return_counts=True)
+    weight = 1.0 / group_sizes[group_inverse]
+
+    source_hit = np.zeros(node_count)
+    cache_edges = sync & (dst_types == _CACHE_CODE)
+    np.maximum.at(source_hit, src[cache_edges], cache_hit_ratio[dst[cache_edges]])
+    weight = weight * np.where(np.isin(dst_types, _STORAGE_CODES), 1.0 - source_hit[src], 1.0)
+    weight = weight * np.where(type_codes[src] == _CDN_CODE, 1.0 - CDN_HIT_RATIO, 1.0)
+
+    indegree = np.bincount(dst, minlength=node_count)
+    entries = np.flatnonzero((indegree == 0) & np.isin(type_codes, _ENTRY_CODES))
+    if entries.size == 0:
+        entries = np.flatnonzero(indegree == 0)
+    if entries.size == 0 and node_count:
+        entries = np.array([0])
+
+    visits = np.zeros(node_count)
+    visits[entries] = 1.0 / entries.size if entries.size else 0.0
+    on_request_path = np.zeros(node_count, dtype=bool)
+    on_request_path[entries] = True
+
+    forward_idx = np.flatnonzero(forward)
+    for edges in _level_slices(forward_idx, level[src[forward_idx]]):
+        np.add.at(visits, dst[edges], visits[src[edges]] * weight[edges])
+        sync_edges = edges[sync[edges]]
+        on_request_path[dst[sync_edges[on_request_path[src[sync_edges]]]]] = True
+
+    sync_forward = forward_idx[sync[forward_idx]]
+    sync_slices = _level_slices(sync_forward, level[src[sync_forward]])
+    latency_levels = []
+    for edges in reversed(sync_slices):
+        sources, starts = np.unique(src[edges], return_index=True)
+        latency_levels.append((sources, starts, dst[edges]))
+
+    # Availability walks the request path forwards, level by level: first the
+    # level's nodes are settled, then their sync edges feed the next levels.
+    path_level = np.where(on_request_path, level, -1)
+    slice_by_level = {int(level[src[edges[0]]]): edges for edges in sync_slices}
+    reach_levels = []
+    for depth in range(int(path_level.max()) + 1 if node_count else 0):
+        nodes = np.flatnonzero(path_level == depth)
+        edges = slice_by_level.get(depth, np.empty(0, dtype=np.int64))
+        edges = edges[on_request_path[src[edges]]]
+        edges = edges[np.argsort(dst[edges], kind="stable")]
+        targets, starts = np.unique(dst[edges], return_index=True)
+        reach_levels.append((nodes, src[edges], targets, starts))
+
+    # A request succeeds if it reaches any data store; paths without one
+    # succeed at their last hop.
+    path_nodes = np.flatnonzero(on_request_path)
+    availability_targets = path_nodes[np.isin(type_codes[path_nodes], _STORAGE_CODES)]
+    if availability_targets.size == 0:
+        has_sync_out = np.zeros(node_count, dtype=bool)
+        has_sync_out[src[sync]] = True
+        availability_targets = path_nodes[~has_sync_out[path_nodes]]
+
+    return CompiledGraph(
+        node_ids=node_ids,
+        node_keys=_topology_colors(type_codes, cache_hit_ratio, level, src, dst, sync, forward),
+        type_codes=type_codes,
+        replicas=replicas,
+        shards=shards,
+        cache_hit_ratio=cache_hit_ratio,
+        servers=servers,
+        src=src,
+        dst=dst,
+        sync=sync,
+        indptr=indptr,
+        level=level,
+        forward=forward,
+        entries=entries,
+        visits=visits,
+        edge_weight=weight,
+        on_request_path=on_request_path,
+        latency_levels=tuple(latency_levels),
+        reach_levels=tuple(reach_levels),
+        availability_targets=availability_targets,
+    )
+
+
+def node_params(node_type: str, config: Mapping[str, Any] | None) -> tuple[int, int, int, float]:
+    """Parse one node into ``(type_code, replicas, shards, cache_hit_ratio)``."""
+    config = config or {}
+    hit_ratio = DEFAULT_CACHE_HIT_RATIO
+    if node_type == "cache":
+        hit_ratio = _safe_ratio(config.get("hit_ratio"), DEFAULT_CACHE_HIT_RATIO)
+    return (
+        TYPE_CODES[node_type],
+        _safe_positive_int(config.get("replicas")),
+        _safe_positive_int(config.get("shards")),
+        hit_ratio,
+    )
+
+
+def compile_graph(
+    nodes: Iterable[Mapping[str, Any]], edges: Iterable[Mapping[str, Any]]
+) -> CompiledGraph:
+    """Parse normalized ``{"id", "type", "config"}`` nodes and ``{"source", "target", "mode"}`` edges."""
+    node_ids: list[str] = []
+    codes: list[int] = []
+    replicas: list[int] = []
+    shards: list[int] = []
+    hit_ratio: list[float] = []
+    for node in nodes:
+        code, node_replicas, node_shards, node_hit_ratio = node_params(node["type"], node.get("config"))
+        node_ids.append(node["id"])
+        codes.append(code)
+        replicas.append(node_replicas)
+        shards.append(node_shards)
+        hit_ratio.append(node_hit_ratio)
+
+    index = {node_id: position for position, node_id in enumerate(node_ids)}
+    src: list[int] = []
+    dst: list[int] = []
+    sync: list[bool] = []
+    for edge in edges:
+        source = index.get(edge["source"])
+        target = index.get(edge["target"])
+        if source is None or target is None:
+            continue
+        src.append(source)
+        dst.append(target)
+        sync.append(edge.get("mode", "sync") == "sync")
+
+    return build_compiled_graph(
+        node_ids=tuple(node_ids),
+        type_codes=np.array(codes, dtype=np.int64),
+        replicas=np.array(replicas, dtype=np.int64),
+        shards=np.array(shards, dtype=np.int64),
+        cache_hit_ratio=np.array(hit_ratio, dtype=float),
+        src=np.array(src, dtype=np.int64),
+        dst=np.array(dst, dtype=np.int64),
+        sync=np.array(sync, dtype=bool),
+    )
+
+
+def with_node_config(
+    compiled: CompiledGraph, indices: np.ndarray, replicas: np.ndarray, shards: np.ndarray
+) -> CompiledGraph:
+    """Copy of ``compiled`` with the replicas/shards of ``indices`` replaced."""
+    replicas_array = compiled.replicas.copy()
+    shards_array = compiled.shards.copy()
+    servers = compiled.servers.copy()
+    replicas_array[indices] = replicas
+    shards_array[indices] = shards
+    servers[indices] = server_counts(compiled.type_codes[indices], replicas_array[indices], shards_array[indices])
+    return replace(compiled, replicas=replicas_array, shards=shards_array, servers=servers)
+
+
+def seeded_uniform(seeds: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Counter-based uniforms in [0, 1) of shape ``seeds.shape + keys.shape`` (SplitMix64)."""
+    seeds = np.asarray(seeds, dtype=np.int64).astype(np.uint64)
+    keys = np.asarray(keys, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        state = seeds[..., None] * np.uint64(0x9E3779B97F4A7C15) + (keys + np.uint64(1)) * np.uint64(
+            0xBF58476D1CE4E5B9
+        )
+        state ^= state >> np.uint64(30)
+        state *= np.uint64(0xBF58476D1CE4E5B9)
+        state ^= state >> np.uint64(27)
+        state *= np.uint64(0x94D049BB133111EB)
+        state ^= state >> np.uint64(31)
+    return (state >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def node_availability(
+    compiled: CompiledGraph, replicas: np.ndarray | None = None, shards: np.ndarray | None = None
+) -> np.ndarray:
+    """Probability that each node has at least one live replica in every shard."""
+    replicas = compiled.replicas if replicas is None else replicas
+    shards = compiled.shards if shards is None else shards
+    down = 1.0 - REPLICA_AVAILABILITY[compiled.type_codes]
+    up = 1.0 - down ** replicas
+    return up ** np.where(compiled.type_codes == _DB_CODE, shards, 1)
+
+
+def monthly_cost(compiled: CompiledGraph) -> float:
+    node_cost = REPLICA_MONTHLY_COST_USD[compiled.type_codes] * compiled.servers
+    return float(node_cost.sum() + compiled.edge_count * EDGE_MONTHLY_COST_USD)
+
+
+def capacity_scale(compiled: CompiledGraph, seed: int) -> np.ndarray:
+    """Per-node capacity multiplier that ``seed`` applies (service times are divided by it)."""
+    return 1.0 + CAPACITY_JITTER * (seeded_uniform(np.array([seed]), compiled.node_keys)[0] - 0.5)
+
+
+def min_servers_for_throughput(compiled: CompiledGraph, target_rps: float, seed: int) -> np.ndarray:
+    """Fewest servers per node for the bottleneck law to allow ``target_rps`` under ``seed``."""
+    capacity = REPLICA_CAPACITY_RPS[compiled.type_codes] * capacity_scale(compiled, seed)
+    needed = np.ceil(target_rps * compiled.visits / capacity - 1e-9)
+    return np.maximum(needed, 1).astype(np.int64)
+
+
+def _steady_state(
+    compiled: CompiledGraph,
+    offered_rps: np.ndarray,
+    seeds: np.ndarray,
+    servers: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Core model over a batch: every per-node array has shape ``(rows, node_count)``."""
+    types = compiled.type_codes
+    servers = compiled.servers if servers is None else servers
+    scale = 1.0 + CAPACITY_JITTER * (seeded_uniform(seeds, compiled.node_keys) - 0.5)
+    capacity = REPLICA_CAPACITY_RPS[types] * servers * scale
+    service_ms = SERVICE_TIME_MS[types] / scale
+    rows = capacity.shape[0]
+
+    visits = compiled.visits
+    if compiled.node_count and (visits > 0).any():
+        max_throughput = (capacity[:, visits > 0] / visits[visits > 0]).min(axis=1)
+    else:
+        max_throughput = np.zeros(rows)
+    served = np.minimum(np.broadcast_to(offered_rps, max_throughput.shape), max_throughput)
+
+    node_throughput = served[:, None] * visits
+    utilization = np.divide(node_throughput, capacity, out=np.zeros_like(capacity), where=capacity > 0)
+    rho = np.minimum(utilization, MAX_UTILIZATION)
+    node_latency = P95_FACTOR * service_ms / (1.0 - rho ** servers)
+
+    path_latency = node_latency.copy()
+    for sources, starts, targets in compiled.latency_levels:
+        path_latency[:, sources] = node_latency[:, sources] + np.maximum.reduceat(
+            path_latency[:, targets], starts, axis=1
+        )
+    if compiled.entries.size:
+        latency = path_latency[:, compiled.entries].max(axis=1)
+    else:
+        latency = np.zeros(rows)
+    return max_throughput, node_throughput, utilization, node_latency, latency
+
+
+def _served_trials(compiled: CompiledGraph, up: np.ndarray) -> np.ndarray:
+    """Bitmask (``up.shape[1]`` words) of trials where a live entry reaches a target over live sync edges."""
+    # Rows hold "reached by a live parent" until their level is processed,
+    # then "reached and live".
+    reach = np.zeros_like(up)
+    reach[compiled.entries] = _ALL_TRIALS
+    for nodes, sources, targets, starts in compiled.reach_levels:
+        reach[nodes] &= up[nodes]
+        if targets.size:
+            reach[targets] |= np.bitwise_or.reduceat(reach[sources], starts, axis=0)
+    if compiled.availability_targets.size == 0:
+        return np.zeros(up.shape[1], dtype=np.uint64)
+    return np.bitwise_or.reduce(reach[compiled.availability_targets], axis=0)
+
+
+def _scenario_up(node_count: int, words: int, nodes: np.ndarray, trials: np.ndarray) -> np.ndarray:
+    """All-live bitmask matrix with node ``nodes[k]`` failed in trial ``trials[k]``."""
+    down = np.zeros((node_count, words), dtype=np.uint64)
+    cells = nodes * words + (trials >> 6)
+    order = np.argsort(cells, kind="stable")
+    cells = cells[order]
+    bits = np.left_shift(np.uint64(1), (trials[order] & 63).astype(np.uint64))
+    if cells.size:
+        starts = np.flatnonzero(np.concatenate(([True], cells[1:] != cells[:-1])))
+        down.ravel()[cells[starts]] = np.bitwise_or.reduceat(bits, starts)
+    return ~down
+
+
+def _sample_failures(
+    failure: np.ndarray, trials: int, rng: np.random.Generator, order: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """``(node, trial)`` pairs of an independent Bernoulli(``failure[node]``) draw per node and trial."""
+    nodes_out: list[np.ndarray] = []
+    trials_out: list[np.ndarray] = []
+    active = order[failure[order] > 0]
+    position = np.full(failure.size, -1, dtype=np.int64)
+    while active.size:
+        mean = trials * failure[active]
+        draws = np.ceil(mean + 4.0 * np.sqrt(mean) + 8.0).astype(np.int64)
+        owner = np.repeat(active, draws)
+        gaps = rng.geometric(failure[owner])
+        # Cumulative sums restarted at each node's segment.
+        totals = np.cumsum(gaps)
+        ends = np.cumsum(draws)
+        offsets = np.repeat(np.concatenate(([0], totals[ends[:-1] - 1])), draws)
+        failed_at = position[owner] + totals - offsets
+        hit = failed_at < trials
+        nodes_out.append(owner[hit])
+        trials_out.append(failed_at[hit])
+        position[active] = failed_at[ends - 1]
+        active = active[position[active] < trials]
+    if not nodes_out:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(nodes_out), np.concatenate(trials_out)
+
+
+def _single_cuts(compiled: CompiledGraph, candidates: np.ndarray) -> np.ndarray:
+    """``candidates`` that lie on every entry-to-target path."""
+    node_count = compiled.node_count
+    moduli = np.array([2147483647, 2147483629], dtype=np.int64)
+    paths_in = np.zeros((node_count, 2), dtype=np.int64)
+    paths_in[compiled.entries] = 1
+    for _, sources, targets, starts in compiled.reach_levels:
+        if targets.size:
+            paths_in[targets] = (paths_in[targets] + np.add.reduceat(paths_in[sources], starts, axis=0)) % moduli
+    paths_out = np.zeros((node_count, 2), dtype=np.int64)
+    paths_out[compiled.availability_targets] = 1
+    for _, sources, targets, starts in reversed(compiled.reach_levels):
+        if targets.size:
+            # Sources are grouped by target here; reduce by source instead.
+            order = np.argsort(sources, kind="stable")
+            by_source, source_starts = np.unique(sources[order], return_index=True)
+            children = np.repeat(targets, np.diff(np.append(starts, sources.size)))[order]
+            paths_out[by_source] = (
+                paths_out[by_source] + np.add.reduceat(paths_out[children], source_starts, axis=0)
+            ) % moduli
+    total = paths_in[compiled.entries] * paths_out[compiled.entries] % moduli
+    total = total.sum(axis=0) % moduli
+    through = paths_in[candidates] * paths_out[candidates] % moduli
+    return candidates[(through == total).all(axis=1) & (total != 0).any()]
+
+
+def _minimal_cut_sets(compiled: CompiledGraph, failure: np.ndarray) -> tuple[tuple[int, ...], ...]:
+    """Single nodes and pairs whose failure stops every request, most likely first."""
+    node_count = compiled.node_count
+    candidates = np.flatnonzero(compiled.on_request_path & (failure > 0))
+    if candidates.size == 0 or compiled.availability_targets.size == 0:
+        return ()
+
+    singles = _single_cuts(compiled, candidates)
+    found = [((int(node),), float(failure[node])) for node in singles]
+
+    # Pairs are checked by simulation, one scenario per trial bit, among
+    # nodes that are not cuts on their own (so every pair found is minimal),
+    # most failure-prone first, within a scenario budget.
+    rest = candidates[~np.isin(candidates, singles)]
+    rest = rest[np.argsort(-failure[rest], kind="stable")]
+    pair_budget = min(MAX_CUT_SET_PAIRS, AVAILABILITY_CELL_LIMIT * 64 // max(node_count, 1))
+    rest = rest[: (1 + math.isqrt(1 + 8 * pair_budget)) // 2]
+    if rest.size >= 2:
+        first, second = np.triu_indices(rest.size, k=1)
+        first, second = rest[first], rest[second]
+        scenarios = np.arange(first.size)
+        up = _scenario_up(
+            node_count,
+            -(-first.size // 64),
+            np.concatenate([first, second]),
+            np.concatenate([scenarios, scenarios]),
+        )
+        served = np.unpackbits(_served_trials(compiled, up).view(np.uint8), bitorder="little")
+        pair_cut = ~served[: first.size].astype(bool)
+        for a, b in zip(first[pair_cut].tolist(), second[pair_cut].tolist()):
+            found.append((tuple(sorted((a, b))), float(failure[a] * failure[b])))
+
+    found.sort(key=lambda item: (-item[1], item[0]))
+    return tuple(cut for cut, _ in found[:MAX_REPORTED_CUT_SETS])
+
+
+def estimate_availability(compiled: CompiledGraph, trials: int = AVAILABILITY_TRIALS) -> AvailabilityEstimate:
+    """Monte Carlo availability of ``compiled``'s request path under independent node failures."""
+    node_count = compiled.node_count
+    failure = np.where(compiled.on_request_path, 1.0 - node_availability(compiled), 0.0)
+    any_failure = -math.expm1(float(np.log1p(-np.minimum(failure, 1.0 - 1e-12)).sum()))
+    affordable = AVAILABILITY_CELL_LIMIT * 64 / max(node_count, 1) / max(any_failure, 1e-12)
+    trials = int(min(trials, max(MIN_AVAILABILITY_TRIALS, affordable)))
+
+    rng = np.random.default_rng(AVAILABILITY_SEED)
+    order = np.lexsort((failure, compiled.node_keys))
+    failed_nodes, failed_trials = _sample_failures(failure, trials, rng, order)
+    failed, scenario = np.unique(failed_trials, return_inverse=True)
+    # One extra scenario, with nothing failed, stands in for every trial without a failure.
+    up = _scenario_up(node_count, failed.size // 64 + 1, failed_nodes, scenario)
+    served_bits = np.unpackbits(_served_trials(compiled, up).view(np.uint8), bitorder="little")
+    served = int(served_bits[: failed.size].sum()) + (trials - failed.size) * int(served_bits[failed.size])
+
+    estimate = served / trials
+    z2 = CONFIDENCE_Z * CONFIDENCE_Z
+    denominator = 1.0 + z2 / trials
+    center = (estimate + z2 / (2 * trials)) / denominator
+    half_width = CONFIDENCE_Z * math.sqrt(estimate * (1 - estimate) / trials + z2 / (4 * trials * trials)) / denominator
+    return AvailabilityEstimate(
+        availability_pct=round(min(MAX_AVAILABILITY_PCT, estimate * 100.0), 2),
+        ci_low_pct=round(max(0.0, center - half_width) * 100.0, 3),
+        ci_high_pct=round(min(1.0, center + half_width) * 100.0, 3),
+        trials=trials,
+        cut_sets=_minimal_cut_sets(compiled, failure),
+    )
+
+
+def critical_path(compiled: CompiledGraph, node_latency: np.ndarray) -> tuple[np.ndarray, float]:
+    """Highest-latency entry-to-sink chain over forward sync edges, and its summed p95."""
+    path_latency = node_latency.copy()
+    successor = np.full(compiled.node_count, -1, dtype=np.int64)
+    for sources, starts, targets in compiled.latency_levels:
+        downstream = path_latency[targets]
+        slowest = np.maximum.reduceat(downstream, starts)
+        lengths = np.diff(np.append(starts, targets.size))
+        positions = np.where(downstream == np.repeat(slowest, lengths), np.arange(targets.size), targets.size)
+        successor[sources] = targets[np.minimum.reduceat(positions, starts)]
+        path_latency[sources] = node_latency[sources] + slowest
+    if compiled.entries.size == 0:
+        return np.empty(0, dtype=np.int64), 0.0
+
+    node = int(compiled.entries[np.argmax(path_latency[compiled.entries])])
+    total = float(path_latency[node])
+    chain = successor.tolist()
+    path = [node]
+    while chain[node] >= 0:
+        node = chain[node]
+        path.append(node)
+    return np.array(path, dtype=np.int64), total
+
+
+def demand_utilization(compiled: CompiledGraph, offered_rps: float, seed: int) -> np.ndarray:
+    """Offered demand over capacity per node under ``seed``; above 1 the node cannot keep up."""
+    capacity = REPLICA_CAPACITY_RPS[compiled.type_codes] * compiled.servers * capacity_scale(compiled, seed)
+    return offered_rps * compiled.visits / capacity
+
+
+def analyze_paths(
+    compiled: CompiledGraph, node_latency: np.ndarray, offered_rps: float, seed: int
+) -> PathAnalysis:
+    """Critical path, per-node headroom and sync cycles for one simulated load, in O(V + E)."""
+    path, path_latency = critical_path(compiled, node_latency)
+    demand = demand_utilization(compiled, offered_rps, seed)
+
+    loaded = np.flatnonzero(compiled.visits > 0)
+    if loaded.size > MAX_REPORTED_BOTTLENECKS:
+        loaded = loaded[np.argpartition(-demand[loaded], MAX_REPORTED_BOTTLENECKS - 1)[:MAX_REPORTED_BOTTLENECKS]]
+    bottlenecks = loaded[np.argsort(-demand[loaded], kind="stable")]
+    closing = compiled.sync & ~compiled.forward
+    return PathAnalysis(
+        critical_path=path,
+        critical_path_latency_ms=path_latency,
+        demand_utilization=demand,
+        bottlenecks=bottlenecks,
+        cycle_edges=np.stack([compiled.src[closing], compiled.dst[closing]], axis=1),
+    )
+
+
+def simulate(compiled: CompiledGraph, offered_rps: float = DEFAULT_OFFERED_RPS, seed: int = 42) -> SimulationResult:
+    """Evaluate a compiled graph under ``offered_rps`` of steady traffic."""
+    max_throughput, node_throughput, utilization, node_latency, latency = _steady_state(
+        compiled, np.asarray(float(offered_rps)), np.array([seed])
+    )
+    availability = estimate_availability(compiled)
+
+    return SimulationResult(
+        throughput_rps=int(max_throughput[0]),
+        latency_p95_ms=max(1, math.ceil(float(latency[0]))),
+        availability_pct=availability.availability_pct,
+        monthly_cost_usd=round(monthly_cost(compiled), 2),
+        offered_rps=float(offered_rps),
+        saturated=bool(offered_rps > max_throughput[0]),
+        node_ids=compiled.node_ids,
+        node_utilization=utilization[0],
+        node_throughput_rps=node_throughput[0],
+        node_latency_p95_ms=node_latency[0],
+        availability_ci_pct=(availability.ci_low_pct, availability.ci_high_pct),
+        cut_sets=tuple(tuple(compiled.node_ids[node] for node in cut) for cut in availability.cut_sets),
+        analysis=analyze_paths(compiled, node_latency[0], float(offered_rps), seed),
+    )
+
+
+def _batch_view(compiled: CompiledGraph, offered_rps: float) -> CompiledGraph:
+    """``compiled`` cut down to the nodes that can set its throughput or p95 under some seed (for ``_steady_state``)."""
+    # Jitter keeps each node's capacity within a known band, so a node that
+    # cannot undercut the slowest bottleneck, or a path that cannot outlast the
+    # fastest critical path, never moves the min or max.  Edge arrays are left
+    # describing the full graph.
+    types, servers, visits = compiled.type_codes, compiled.servers, compiled.visits
+    loaded = np.flatnonzero(visits > 0)
+    if loaded.size == 0 or compiled.entries.size == 0:
+        return compiled
+    low, high = 1.0 - CAPACITY_JITTER / 2, 1.0 + CAPACITY_JITTER / 2
+    base = REPLICA_CAPACITY_RPS[types] * servers
+    ratio = base[loaded] / visits[loaded]
+    keep = np.zeros(compiled.node_count, dtype=bool)
+    keep[loaded[ratio * low <= (ratio * high).min() * (1 + _BOUND_SLACK)]] = True
+
+    def node_latency(scale: float, served: float) -> np.ndarray:
+        rho = np.minimum(served * visits / (base * scale), MAX_UTILIZATION)
+        return P95_FACTOR * SERVICE_TIME_MS[types] / scale / (1.0 - rho ** servers)
+
+    fastest = node_latency(high, min(offered_rps, (ratio * low).min())) * (1 - _BOUND_SLACK)
+    slowest = node_latency(low, min(offered_rps, (ratio * high).min())) * (1 + _BOUND_SLACK)
+    path_low, path_high = fastest.copy(), slowest.copy()
+    for sources, starts, targets in compiled.latency_levels:
+        path_low[sources] = fastest[sources] + np.maximum.reduceat(path_low[targets], starts)
+        path_high[sources] = slowest[sources] + np.maximum.reduceat(path_high[targets], starts)
+
+    # Walk down from the entries, keeping each successor that can still be the slowest.
+    entries = compiled.entries[path_high[compiled.entries] >= path_low[compiled.entries].max()]
+    on_path = np.zeros(compiled.node_count, dtype=bool)
+    on_path[entries] = True
+    levels = []
+    for sources, starts, targets in reversed(compiled.latency_levels):
+        lengths = np.diff(np.append(starts, targets.size))
+        floor = np.repeat(np.maximum.reduceat(path_low[targets], starts), lengths)
+        edges = np.flatnonzero(np.repeat(on_path[sources], lengths) & (path_high[targets] >= floor))
+        on_path[targets[edges]] = True
+        levels.append((np.repeat(sources, lengths)[edges], targets[edges]))
+    keep |= on_path
+
+    nodes = np.flatnonzero(keep)
+    position = np.cumsum(keep) - 1
+    latency_levels = []
+    for edge_sources, edge_targets in reversed(levels):
+        sources, starts = np.unique(edge_sources, return_index=True)
+        latency_levels.append((position[sources], starts, position[edge_targets]))
+    return replace(
+        compiled,
+        node_ids=tuple(compiled.node_ids[node] for node in nodes.tolist()),
+        node_keys=compiled.node_keys[nodes],
+        type_codes=types[nodes],
+        servers=servers[nodes],
+        visits=visits[nodes],
+        entries=position[entries],
+        latency_levels=tuple(latency_levels),
+    )
+
+
+def simulate_batch(
+    compiled: CompiledGraph,
+    seeds: np.ndarray,
+    offered_rps: float = DEFAULT_OFFERED_RPS,
+) -> BatchSimulationResult:
+    """Evaluate many seeds in one vectorized pass; row ``i`` matches ``simulate(..., seed=seeds[i])``."""
+    seeds = np.asarray(seeds, dtype=np.int64)
+    reduced = _batch_view(compiled, float(offered_rps))
+    chunk = max(1, BATCH_CELL_LIMIT // max(reduced.node_count, 1))
+    throughput = np.empty(seeds.size, dtype=np.int64)
+    latency = np.empty(seeds.size, dtype=np.int64)
+    offered = np.asarray(float(offered_rps))
+    for start in range(0, seeds.size, chunk):
+        window = slice(start, start + chunk)
+        max_throughput, _, _, _, path_latency = _steady_state(reduced, offered, seeds[window])
+        throughput[window] = max_throughput.astype(np.int64)
+        latency[window] = np.maximum(1, np.ceil(path_latency)).astype(np.int64)
+
+    return BatchSimulationResult(
+        seeds=seeds,
+        throughput_rps=throughput,
+        latency_p95_ms=latency,
+        availability_pct=np.full(seeds.size, estimate_availability(compiled).availability_pct),
+        monthly_cost_usd=np.full(seeds.size, round(monthly_cost(compiled), 2)),
+    )
+
+
+def simulate_configs(
+    compiled: CompiledGraph,
+    replicas: np.ndarray,
+    shards: np.ndarray,
+    offered_rps: float = DEFAULT_OFFERED_RPS,
+    seed: int = 42,
+) -> ConfigBatchResult:
+    """Evaluate many replica/shard assignments of one topology in one vectorized pass."""
+    replicas = np.asarray(replicas, dtype=np.int64)
+    shards = np.asarray(shards, dtype=np.int64)
+    configs = replicas.shape[0]
+    chunk = max(1, BATCH_CELL_LIMIT // max(compiled.node_count, 1))
+    throughput = np.empty(configs, dtype=np.int64)
+    latency = np.empty(configs, dtype=np.int64)
+    offered = np.asarray(float(offered_rps))
+    seeds = np.array([seed])
+    servers = server_counts(compiled.type_codes, replicas, shards)
+    for start in range(0, configs, chunk):
+        window = slice(start, start + chunk)
+        max_throughput, _, _, _, path_latency = _steady_state(compiled, offered, seeds, servers[window])
+        throughput[window] = max_throughput.astype(np.int64)
+        latency[window] = np.maximum(1, np.ceil(path_latency)).astype(np.int64)
+
+    availability = node_availability(compiled, replicas, shards)[:, compiled.on_request_path].prod(axis=1) * 100.0
+    cost = (REPLICA_MONTHLY_COST_USD[compiled.type_codes] * servers).sum(axis=1)
+    cost += compiled.edge_count * EDGE_MONTHLY_COST_USD
+    # Python's round(), as in ``simulate``, so costs agree with single runs to the cent.
+    return ConfigBatchResult(
+        throughput_rps=throughput,
+        latency_p95_ms=latency,
+        availability_pct=np.array([round(min(MAX_AVAILABILITY_PCT, value), 2) for value in availability.tolist()]),
+        monthly_cost_usd=np.array([round(value, 2) for value in cost.tolist()]),
+    )
+
+
+def simulate_load_ramp(compiled: CompiledGraph, offered_rps: np.ndarray, seed: int = 42) -> LoadRampResult:
+    """Evaluate ``compiled`` at every load in ``offered_rps`` in one vectorized pass."""
+    offered = np.asarray(offered_rps, dtype=float)
+    steps = offered.size
+    chunk = max(1, BATCH_CELL_LIMIT // max(compiled.node_count, 1))
+    served = np.empty(steps, dtype=np.int64)
+    latency = np.empty(steps, dtype=np.int64)
+    bottleneck = np.empty(steps, dtype=np.int64)
+    bottleneck_utilization = np.empty(steps)
+    path_nodes = np.flatnonzero(compiled.on_request_path)
+    max_throughput = np.zeros(1)
+    utilization = np.zeros((1, compiled.node_count))
+    for start in range(0, steps, chunk):
+        window = slice(start, start + chunk)
+        seeds = np.full(offered[window].size, seed)
+        max_throughput, _, utilization, node_latency, path_latency = _steady_state(
+            compiled, offered[window], seeds
+        )
+        served[window] = np.minimum(offered[window], max_throughput).astype(np.int64)
+        latency[window] = np.maximum(1, np.ceil(path_latency)).astype(np.int64)
+        slowest = path_nodes[np.argmax(node_latency[:, path_nodes], axis=1)]
+        bottleneck[window] = slowest
+        bottleneck_utilization[window] = utilization[np.arange(slowest.size), slowest]
+
+    # Utilization scales linearly with load, so the node that saturates first
+    # is the same at every step.
+    saturation_node = int(np.argmax(utilization[0])) if compiled.node_count else -1
+    return LoadRampResult(
+        offered_rps=offered,
+        throughput_rps=served,
+        latency_p95_ms=latency,
+        saturated=offered > max_throughput[0],
+        bottleneck=bottleneck,
+        bottleneck_utilization=bottleneck_utilization,
+        saturation_rps=int(max_throughput[0]),
+        saturation_node=saturation_node,
+    )
+
+
+def _downstream(compiled: CompiledGraph, seeds: np.ndarray) -> np.ndarray:
+    """Mask of ``seeds`` and every node reachable from them over forward edges."""
+    reached = seeds.copy()
+    forward_idx = np.flatnonzero(compiled.forward)
+    for edges in _level_slices(forward_idx, compiled.level[compiled.src[forward_idx]]):
+        reached[compiled.dst[edges[reached[compiled.src[edges]]]]] = True
+    return reached
+
+
+def _flow_schedule(
+    compiled: CompiledGraph, simulated: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, list[tuple[int, int, int, list[tuple[np.ndarray, ...]]]]]:
+    """Row layout and per-level pushes for the ``simulated`` nodes of the fluid model."""
+    is_queue = compiled.type_codes == _QUEUE_CODE
+    nodes = np.flatnonzero(simulated)
+    nodes = nodes[np.lexsort((is_queue[nodes], compiled.level[nodes]))]
+    row_of = np.full(compiled.node_count, -1, dtype=np.int64)
+    row_of[nodes] = np.arange(nodes.size)
+    level = compiled.level[nodes]
+    depths = np.unique(level)
+    bounds = np.searchsorted(level, depths, side="right")
+    queued = np.searchsorted(level * 2 + is_queue[nodes], depths * 2 + 1)
+
+    base = np.zeros(nodes.size)
+    if compiled.entries.size:
+        np.add.at(base, row_of[compiled.entries][simulated[compiled.entries]], 1.0 / compiled.entries.size)
+    forward = compiled.forward & simulated[compiled.dst]
+    feeding = np.flatnonzero(forward & ~simulated[compiled.src])
+    np.add.at(base, row_of[compiled.dst[feeding]], compiled.visits[compiled.src[feeding]] * compiled.edge_weight[feeding])
+
+    inner = np.flatnonzero(forward & simulated[compiled.src])
+    src, dst = row_of[compiled.src[inner]], row_of[compiled.dst[inner]]
+    edge_level = level[src]
+    levels = []
+    begin = 0
+    for depth, end, split in zip(depths.tolist(), bounds.tolist(), queued.tolist()):
+        edges = np.flatnonzero(edge_level == depth)
+        edges = edges[np.argsort(dst[edges], kind="stable")]
+        _, starts, lengths = np.unique(dst[edges], return_index=True, return_counts=True)
+        rank = np.arange(edges.size) - np.repeat(starts, lengths)
+        pushes: list[tuple[np.ndarray, ...]] = []
+        for k in range(min(int(lengths.max(initial=0)), FLOW_RANK_LIMIT)):
+            ranked = edges[rank == k]
+            pushes.append((src[ranked], compiled.edge_weight[inner[ranked], None], dst[ranked]))
+        rest = edges[rank >= FLOW_RANK_LIMIT]
+        if rest.size:
+            targets, rest_starts = np.unique(dst[rest], return_index=True)
+            pushes.append((src[rest], compiled.edge_weight[inner[rest], None], targets, rest_starts))
+        levels.append((begin, split, end, pushes))
+        begin = end
+    return nodes, base, levels
+
+
+def queue_drain_rps(compiled: CompiledGraph, capacity: np.ndarray) -> np.ndarray:
+    """How fast each node can pass work on: its capacity, capped for queues by what consumers accept."""
+    drain = capacity.copy()
+    queue_edges = (compiled.type_codes[compiled.src] == _QUEUE_CODE) & compiled.forward & (compiled.edge_weight > 0)
+    np.minimum.at(
+        drain,
+        compiled.src[queue_edges],
+        capacity[compiled.dst[queue_edges]] / compiled.edge_weight[queue_edges],
+    )
+    return drain
+
+
+def simulate_profile(
+    compiled: CompiledGraph,
+    offered_rps: np.ndarray,
+    tick_s: float,
+    seed: int = 42,
+    points: int = 200,
+    tracked: np.ndarray | None = None,
+) -> ProfileResult:
+    """Step a fluid model of ``compiled`` through ``offered_rps`` (one entry per tick of ``tick_s`` seconds)."""
+    offered = np.maximum(np.asarray(offered_rps, dtype=float), 0.0)
+    ticks = offered.size
+    node_count = compiled.node_count
+    tracked = np.arange(node_count) if tracked is None else np.asarray(tracked, dtype=np.int64)
+    per_point = max(1, -(-ticks // max(points, 1)))
+    buckets = -(-ticks // per_point)
+
+    types = compiled.type_codes
+    scale = capacity_scale(compiled, seed)
+    capacity = REPLICA_CAPACITY_RPS[types] * compiled.servers * scale
+    service_ms = SERVICE_TIME_MS[types] / scale
+    drain = queue_drain_rps(compiled, capacity)
+    is_queue = types == _QUEUE_CODE
+    limit = np.where(is_queue, drain, capacity)
+    simulated = _downstream(compiled, offered.max(initial=0.0) * compiled.visits > limit)
+    nodes, base, levels = _flow_schedule(compiled, simulated)
+    row_capacity = capacity[nodes, None]
+    row_drain = drain[nodes, None]
+    # Whole buckets per chunk, so downsampling never straddles two chunks.
+    chunk = min(ticks, max(1, BATCH_CELL_LIMIT // max(nodes.size, 1) // per_point) * per_point)
+
+    offered_series = np.zeros(buckets)
+    served_series = np.zeros(buckets)
+    drop_series = np.zeros(buckets)
+    dropped_requests = 0.0
+    latency_series = np.zeros(buckets)
+    node_backlog = np.zeros((tracked.size, buckets))
+    node_drop = np.zeros((tracked.size, buckets))
+    node_latency_series = np.zeros((tracked.size, buckets))
+    peak_served = np.zeros(node_count)
+    peak_backlog = np.zeros(node_count)
+    dropped = np.zeros(node_count)
+    row_dropped = np.zeros(nodes.size)
+    carry = np.zeros((nodes.size, 1))
+    inflow_buffer = np.empty((nodes.size, chunk))
+    served_buffer = np.empty((nodes.size, chunk))
+    backlog_buffer = np.zeros((nodes.size, chunk))
+
+    for start in range(0, ticks, chunk):
+        load = offered[start : start + chunk]
+        rows = load.size
+        # Rows run level by level; only queue rows of ``backlog`` are ever non-zero.
+        inflow = inflow_buffer[:, :rows]
+        served = served_buffer[:, :rows]
+        backlog = backlog_buffer[:, :rows]
+        np.multiply(base[:, None], load, out=inflow)
+        lost = np.zeros(rows)
+        for direct, queued, end, pushes in levels:
+            np.minimum(inflow[direct:queued], row_capacity[direct:queued], out=served[direct:queued])
+            shed = inflow[direct:queued] - served[direct:queued]
+            lost += shed.sum(axis=0)
+            row_dropped[direct:queued] += shed.sum(axis=1) * tick_s
+            if queued < end:
+                queues = slice(queued, end)
+                net = np.cumsum((inflow[queues] - row_drain[queues]) * tick_s, axis=1)
+                backlog[queues] = net - np.minimum(np.minimum.accumulate(net, axis=1), -carry[queues])
+                served[queues] = inflow[queues] - np.diff(backlog[queues], axis=1, prepend=carry[queues]) / tick_s
+                carry[queues] = backlog[queues, -1:]
+            for push in pushes:
+                sources, weights, targets = push[:3]
+                if len(push) == 3:
+                    inflow[targets] += served[sources] * weights
+                else:
+                    inflow[targets] += np.add.reduceat(served[sources] * weights, push[3], axis=0)
+
+        bucket_starts = np.arange(0, rows, per_point)
+        window = slice(start // per_point, start // per_point + bucket_starts.size)
+        counts = np.diff(np.append(bucket_starts, rows))
+        offered_sum = np.add.reduceat(load, bucket_starts)
+        lost_sum = np.add.reduceat(np.minimum(lost, load), bucket_starts)
+        dropped_requests += float(lost_sum.sum()) * tick_s
+        offered_series[window] = offered_sum / counts
+        served_series[window] = (offered_sum - lost_sum) / counts
+        drop_series[window] = np.divide(lost_sum, offered_sum, out=np.zeros(counts.size), where=offered_sum > 0)
+
+        # Per bucket and in node order from here on; untouched nodes carry ``load * visits``.
+        bucket_inflow = np.outer(compiled.visits, offered_sum)
+        bucket_dropped = np.zeros_like(bucket_inflow)
+        bucket_served = np.outer(compiled.visits, np.maximum.reduceat(load, bucket_starts))
+        bucket_backlog = np.zeros_like(bucket_served)
+        if nodes.size:
+            bucket_inflow[nodes] = np.add.reduceat(inflow, bucket_starts, axis=1)
+            bucket_dropped[nodes] = bucket_inflow[nodes] - np.add.reduceat(served, bucket_starts, axis=1)
+            bucket_dropped[is_queue] = 0.0
+            bucket_served[nodes] = np.maximum.reduceat(served, bucket_starts, axis=1)
+            bucket_backlog[nodes] = np.maximum.reduceat(backlog, bucket_starts, axis=1)
+        node_latency = _fluid_latency(compiled, bucket_served, bucket_backlog, capacity, service_ms, drain)
+        path_latency = node_latency.copy()
+        for sources, level_starts, targets in compiled.latency_levels:
+            path_latency[sources] = node_latency[sources] + np.maximum.reduceat(
+                path_latency[targets], level_starts, axis=0
+            )
+        if compiled.entries.size:
+            latency_series[window] = path_latency[compiled.entries].max(axis=0)
+
+        node_backlog[:, window] = bucket_backlog[tracked]
+        node_drop[:, window] = np.divide(
+            bucket_dropped[tracked],
+            bucket_inflow[tracked],
+            out=np.zeros((tracked.size, counts.size)),
+            where=bucket_inflow[tracked] > 0,
+        )
+        node_latency_series[:, window] = node_latency[tracked]
+        np.maximum(peak_served, bucket_served.max(axis=1), out=peak_served)
+        np.maximum(peak_backlog, bucket_backlog.max(axis=1), out=peak_backlog)
+
+    dropped[nodes] = row_dropped
+    return ProfileResult(
+        tick_s=tick_s,
+        ticks_per_point=per_point,
+        time_s=np.arange(buckets) * per_point * tick_s,
+        offered_rps=offered_series,
+        served_rps=served_series,
+        drop_rate=drop_series,
+        latency_p95_ms=latency_series,
+        dropped_requests=dropped_requests,
+        tracked=tracked,
+        backlog=node_backlog,
+        node_drop_rate=node_drop,
+        node_latency_p95_ms=node_latency_series,
+        peak_backlog=peak_backlog,
+        dropped=dropped,
+        peak_latency_p95_ms=_fluid_latency(
+            compiled, peak_served[:, None], peak_backlog[:, None], capacity, service_ms, drain
+        )[:, 0],
+    )
+
+
+def _fluid_latency(
+    compiled: CompiledGraph,
+    served: np.ndarray,
+    backlog: np.ndarray,
+    capacity: np.ndarray,
+    service_ms: np.ndarray,
+    drain: np.ndarray,
+) -> np.ndarray:
+    """Per-node p95 (``nodes x columns``): the steady-state p95 at ``served``, plus the wait behind ``backlog``."""
+    rho = np.minimum(served / capacity[:, None], MAX_UTILIZATION)
+    latency = P95_FACTOR * service_ms[:, None] / (1.0 - rho ** compiled.servers[:, None])
+    wait_ms = np.divide(1000.0, drain, out=np.zeros_like(drain), where=drain > 0)
+    return latency + backlog * wait_ms[:, None]
 
 
-def run_simulation(seed: int = 42) -> SimulationResult:
-    # Placeholder deterministic values for early wiring and API contracts
-    return SimulationResult(throughput_rps=1200 + seed % 100, latency_p95_ms=48, availability_pct=99.2)
+def run_simulation(
+    nodes: Iterable[Mapping[str, Any]],
+    edges: Iterable[Mapping[str, Any]],
+    offered_rps: float = DEFAULT_OFFERED_RPS,
+    seed: int = 42,
+) -> SimulationResult:
+    return simulate(compile_graph(nodes, edges), offered_rps=offered_rps, seed=seed)